@@ -1,16 +1,29 @@
-import ollama, asyncio, json, re, numpy as np
-from typing import List
+import asyncio, json, re, time, numpy as np
+from typing import List, Optional, Tuple
+from beanie import PydanticObjectId
 from fastapi import Request
-from app.config import markdown_cleaning_prompt, json_generation_prompt
+from app.config import (
+    markdown_cleaning_prompt, json_generation_prompt, merged_clean_extract_prompt, CLEANING_FANOUT,
+    MERGED_JSON_OVERHEAD_TOKENS, MERGED_CTX_SAFETY,
+    CHUNK_TOKEN_BUDGET, CHUNK_OVERLAP_TOKENS, EMBEDDING_MODEL, EMBED_BATCH_SIZE,
+    rag_answer_prompt, RAG_CONTEXT_CHARS, QUERY_EMBED_CACHE_SIZE, LLM_STRUCTURED_OUTPUT
+)
+from app.utils.chunking import chunk_markdown, estimate_tokens
 from pydantic import ValidationError
-from langchain.chat_models import ChatOpenAI
-from langchain.agents import initialize_agent, Tool
-from app.models import CleanedArticle
-import logging, numpy as np
-from sentence_transformers import SentenceTransformer
-from app.models import Article
+from app.models import CleanedArticle, SocialPost
+import logging, threading, numpy as np
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from app.models import Article, ArticleContextView
+from app.utils.llm import AsyncLLMClient, get_llm_client
+from app.utils.embedding_service import EmbeddingService
+from app.utils.json_repair import loads_tolerant
 logging.basicConfig(level=logging.INFO)
 
+# JSON schemas passés à Ollama (`format`) pour contraindre la sortie du modèle
+CLEANED_ARTICLE_SCHEMA = CleanedArticle.model_json_schema()
+SOCIAL_POSTS_SCHEMA = {"type": "array", "items": SocialPost.model_json_schema(), "minItems": 1}
+
 # --- Accès aux agents ---
 async def get_markdown_cleaner_agent(request: Request):
     agent = getattr(request.app.state, "markdownCleaner_agent", None)
@@ -36,16 +49,63 @@ async def get_rag_agent(request: Request):
         await agent._ready_event.wait()
     return agent
 
+# --- Accès à l'index FAISS (chargé en arrière-plan après le modèle d'embeddings) ---
+async def get_ready_vector_store(request: Request):
+    ready = getattr(request.app.state, "vector_store_ready", None)
+    if ready is None:
+        raise RuntimeError("Vector store not initialized yet.")
+    await ready.wait()
+    vector_store = getattr(request.app.state, "vector_store", None)
+    if vector_store is None:
+        raise RuntimeError("Vector store failed to load, see /stats/ready.")
+    return vector_store
+
+async def remove_article_vectors(request: Request, article_ids: List[str]) -> int:
+    """
+    Retire les vecteurs d'articles supprimés sans attendre l'index FAISS : s'il n'est pas
+    encore chargé, les ids sont mis de côté et retirés au chargement (warm_up).
+    N'échoue jamais : la suppression Mongo est déjà faite. Retourne le nombre de vecteurs retirés.
+    """
+    state = request.app.state
+    vector_store = getattr(state, "vector_store", None)
+    if vector_store is None:
+        state.pending_vector_removals.update(article_ids)
+        return 0
+    try:
+        removed = vector_store.remove(article_ids)
+        if removed:
+            await vector_store.asave()
+        return removed
+    except Exception as e:
+        logging.error(f"❌ Vecteurs FAISS non retirés pour {len(article_ids)} article(s) : {e}")
+        return 0
+
 class MarkdownCleanerAgent:
     def __init__(
         self, 
         cleaning_prompt_template: str = markdown_cleaning_prompt,
         json_prompt_template: str = json_generation_prompt,
-        max_retries: int = 3
+        max_retries: int = 3,
+        cleaning_fanout: int = CLEANING_FANOUT,
+        chunk_tokens: int = CHUNK_TOKEN_BUDGET,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+        llm_client: Optional[AsyncLLMClient] = None,
+        structured_output: bool = LLM_STRUCTURED_OUTPUT,
+        merged_prompt_template: str = merged_clean_extract_prompt,
+        merged_max_tokens: Optional[int] = None
     ):
         self.cleaning_prompt_template = cleaning_prompt_template
         self.json_prompt_template = json_prompt_template
+        self.merged_prompt_template = merged_prompt_template
+        # Cumul des rapports clean_and_extract (appels et tokens économisés par le chemin fusionné)
+        self.stats: Counter = Counter()
         self.max_retries = max_retries
+        self.cleaning_fanout = cleaning_fanout
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.structured_output = structured_output
+        self.llm_client = llm_client or get_llm_client()
+        self.merged_max_tokens = merged_max_tokens if merged_max_tokens is not None else self._merged_threshold()
         self.ready = False
         self._ready_event = asyncio.Event()
         self.agent_instance = None
@@ -53,64 +113,149 @@ class MarkdownCleanerAgent:
 
     async def initialize(self):
         logging.info("🔧 Initialisation de MarkdownCleanerAgent...")
-        await asyncio.sleep(1)
         self.agent_instance = "LLM instance"
         self.ready = True
         self._ready_event.set()
         logging.info("✅ MarkdownCleanerAgent est prêt")
 
+    async def clean(self, markdown_text: str, link: str) -> 'CleanedArticle':
+        cleaned_article, _ = await self.clean_and_extract(markdown_text, link)
+        return cleaned_article
+
+    async def clean_and_extract(self, markdown_text: str, link: str) -> Tuple['CleanedArticle', dict]:
+        """
+        Markdown brut → CleanedArticle.
+        - Article court (≤ merged_max_tokens) : nettoyage et extraction en un seul appel structuré
+        - Article long, ou échec du chemin fusionné : N appels de nettoyage par segment + 1 appel JSON
+        Retourne aussi un rapport : mode, appels LLM faits / économisés, tokens (estimés) économisés.
+        """
+        await self._ready_event.wait()
+        input_tokens = estimate_tokens(markdown_text)
+        segments = len(chunk_markdown(markdown_text, max_tokens=self.chunk_tokens, overlap_tokens=self.chunk_overlap))
+        report = {"mode": "segmented", "input_tokens": input_tokens, "segments": segments}
+        merged_tokens = 0
+
+        if input_tokens <= self.merged_max_tokens:
+            start = time.time()
+            prompt = self.merged_prompt_template.format(markdown_text=markdown_text, link=link)
+            schema = CLEANED_ARTICLE_SCHEMA if self.structured_output else None
+            try:
+                content = await self._call_llm_with_retries(prompt, format=schema)
+                cleaned_article = CleanedArticle(**loads_tolerant(content, source="cleaned_article_merged"))
+                report.update(mode="merged", llm_calls=1, **self._savings(segments, input_tokens, cleaned_article, prompt))
+                logging.info(
+                    f"⚡ Nettoyage + extraction en un appel pour {link} ({time.time() - start:.2f}s, "
+                    f"{report['llm_calls_saved']} appel(s) et ~{report['tokens_saved']} tokens économisés)"
+                )
+                self._record(report)
+                return cleaned_article, report
+            except Exception as e:
+                await self.llm_client.invalidate(self._build_messages(prompt), format=schema)
+                merged_tokens = estimate_tokens(prompt)
+                report["mode"] = "merged_fallback"
+                logging.warning(f"⚠️ Chemin fusionné en échec pour {link}, retour au nettoyage segmenté: {e}")
+
+        cleaned_text = await self.clean_markdown_in_batches(markdown_text, link)
+        cleaned_article = await self.generate_json_from_cleaned_text(cleaned_text, link)
+        wasted = 1 if report["mode"] == "merged_fallback" else 0
+        report.update(llm_calls=segments + 1 + wasted, llm_calls_saved=-wasted, tokens_saved=-merged_tokens)
+        self._record(report)
+        return cleaned_article, report
+
+    def _merged_threshold(self) -> int:
+        """
+        Taille d'entrée max (tokens estimés) du chemin fusionné, dérivée de num_ctx :
+        le prompt (template + markdown) et la sortie (texte nettoyé ≤ entrée + champs JSON)
+        doivent tenir ensemble dans la fenêtre de contexte.
+        """
+        budget = int(self.llm_client.num_ctx * MERGED_CTX_SAFETY)
+        template = estimate_tokens(self.merged_prompt_template.format(markdown_text="", link=""))
+        return max(0, (budget - template - MERGED_JSON_OVERHEAD_TOKENS) // 2)
+
+    def _savings(self, segments: int, input_tokens: int, cleaned_article: 'CleanedArticle', merged_prompt: str) -> dict:
+        """
+        Estimation de ce qu'aurait coûté le chemin segmenté pour le même article :
+        entrée = gabarit de nettoyage × segments + Markdown + gabarit JSON + texte nettoyé renvoyé,
+        sortie = texte nettoyé (segments) puis JSON qui le répète.
+        """
+        cleaned_tokens = estimate_tokens(cleaned_article.text_clean)
+        json_tokens = estimate_tokens(cleaned_article.model_dump_json())
+        cleaning_template = estimate_tokens(self.cleaning_prompt_template)
+        json_template = estimate_tokens(self.json_prompt_template)
+        segmented = (cleaning_template * segments + input_tokens + cleaned_tokens) + (json_template + cleaned_tokens + json_tokens)
+        merged = estimate_tokens(merged_prompt) + json_tokens
+        return {"llm_calls_saved": segments, "tokens_saved": segmented - merged}
+
+    def _record(self, report: dict):
+        self.stats[report["mode"]] += 1
+        self.stats["llm_calls"] += report["llm_calls"]
+        self.stats["llm_calls_saved"] += report["llm_calls_saved"]
+        self.stats["tokens_saved"] += report["tokens_saved"]
+
     async def clean_markdown_in_batches(self, markdown_text: str, link: str) -> str:
         await self._ready_event.wait()
         logging.info(f"📄 Début nettoyage markdown pour {link}")
+        start = time.time()
 
-        batch_size = 1000
-        segments = [markdown_text[i:i+batch_size] for i in range(0, len(markdown_text), batch_size)]
+        # Découpage sur les frontières de blocs (titres, paragraphes, listes) selon un budget de tokens
+        segments = chunk_markdown(markdown_text, max_tokens=self.chunk_tokens, overlap_tokens=self.chunk_overlap)
         logging.info(f"🧩 Segmentation du texte en {len(segments)} batch(s)")
-        cleaned_parts = []
 
-        for idx, seg in enumerate(segments, start=1):
-            logging.info(f"⏳ Nettoyage batch {idx}/{len(segments)}")
-            prompt = self.cleaning_prompt_template.format(markdown_segment=seg, link=link)
-            try:
-                cleaned_text = await self._call_llm_with_retries(prompt)
-                cleaned_parts.append(cleaned_text)
-                logging.info(f"✅ Batch {idx} nettoyé avec succès")
-            except Exception as e:
-                logging.warning(f"⚠️ Échec nettoyage batch {idx}: {e}")
+        # Fan-out borné : plusieurs segments en vol, le client LLM garde le plafond global
+        semaphore = asyncio.Semaphore(self.cleaning_fanout)
+        fallbacks = 0
+
+        async def clean_segment(idx: int, seg: str) -> str:
+            nonlocal fallbacks
+            async with semaphore:
+                logging.info(f"⏳ Nettoyage batch {idx}/{len(segments)}")
+                prompt = self.cleaning_prompt_template.format(markdown_segment=seg, link=link)
+                try:
+                    cleaned_text = await self._call_llm_with_retries(prompt)
+                    logging.info(f"✅ Batch {idx} nettoyé avec succès")
+                    return cleaned_text
+                except Exception as e:
+                    # On garde le segment brut plutôt que de perdre du contenu
+                    fallbacks += 1
+                    logging.warning(f"⚠️ Échec nettoyage batch {idx}, segment brut conservé: {e}")
+                    return seg
+
+        # gather() conserve l'ordre des segments
+        cleaned_parts = await asyncio.gather(
+            *(clean_segment(idx, seg) for idx, seg in enumerate(segments, start=1))
+        )
 
         final_cleaned_text = "\n\n".join(cleaned_parts)
         final_cleaned_text = re.sub(r'\n{3,}', '\n\n', final_cleaned_text).strip()
-        logging.info("🧹 Texte final concaténé et post-traité")
+        logging.info(
+            f"🧹 Texte final concaténé et post-traité pour {link} : {len(segments)} batch(s), "
+            f"{fallbacks} fallback(s), {time.time() - start:.2f}s"
+        )
         return final_cleaned_text
 
     async def generate_json_from_cleaned_text(self, cleaned_text: str, link: str) -> 'CleanedArticle':
         await self._ready_event.wait()
         prompt = self.json_prompt_template.format(cleaned_text=cleaned_text, link=link)
+        schema = CLEANED_ARTICLE_SCHEMA if self.structured_output else None
         logging.info(f"📄 Début génération JSON pour {link}")
         try:
-            response_content = await self._call_llm_with_retries(prompt)
-            data_dict = json.loads(response_content)
+            response_content = await self._call_llm_with_retries(prompt, format=schema)
+            data_dict = loads_tolerant(response_content, source="cleaned_article")
             cleaned_article = CleanedArticle(**data_dict)
             logging.info("✅ JSON généré et CleanedArticle créé avec succès")
             return cleaned_article
         except Exception as e:
+            # Ne pas resservir une réponse invalide depuis le cache
+            await self.llm_client.invalidate(self._build_messages(prompt), format=schema)
             logging.warning(f"⚠️ Échec génération JSON ou validation CleanedArticle: {e}")
             raise ValueError(f"Échec génération JSON ou validation CleanedArticle: {e}")
 
-    async def _call_llm_with_retries(self, prompt: str) -> str:
+    async def _call_llm_with_retries(self, prompt: str, format: Optional[dict] = None) -> str:
         last_exception = None
         for attempt in range(1, self.max_retries + 1):
             logging.info(f"🤖 Appel LLM, tentative {attempt}/{self.max_retries}")
             try:
-                response = ollama.chat(
-                    model="gemma3:latest",
-                    messages=[
-                        {"role": "system", "content": "You are an assistant that processes markdown."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    stream=False
-                )
-                content = self._extract_content(response)
+                content = await self.llm_client.chat(messages=self._build_messages(prompt), format=format)
                 if content:
                     return content.strip()
             except Exception as e:
@@ -119,10 +264,11 @@ class MarkdownCleanerAgent:
                 await asyncio.sleep(2 ** attempt)
         raise RuntimeError(f"💥 Échec LLM après {self.max_retries} tentatives: {last_exception}")
 
-    def _extract_content(self, response) -> str:
-        if isinstance(response, dict):
-            return response.get("message", {}).get("content")
-        return getattr(getattr(response, "message", None), "content", None)
+    def _build_messages(self, prompt: str) -> List[dict]:
+        return [
+            {"role": "system", "content": "You are an assistant that processes markdown."},
+            {"role": "user", "content": prompt}
+        ]
 
 class MarketingAgent:
     """
@@ -131,10 +277,12 @@ class MarketingAgent:
     Utilise Ollama uniquement (pas ChatOpenAI).
     """
 
-    def __init__(self):
+    def __init__(self, llm_client: Optional[AsyncLLMClient] = None, structured_output: bool = LLM_STRUCTURED_OUTPUT):
         self.ready = False
+        self.structured_output = structured_output
         self._ready_event = asyncio.Event()
         self.agent_instance = None
+        self.llm_client = llm_client or get_llm_client()
 
         self.prompt_template = (
             "You are a senior marketing strategist specialized in precious stones and metals in Colombia.\n\n"
@@ -159,7 +307,6 @@ class MarketingAgent:
 
     async def initialize(self):
         """Initialise l'agent Ollama."""
-        await asyncio.sleep(1)
         self.agent_instance = "Ollama Marketing Agent"
         self.ready = True
         self._ready_event.set()
@@ -173,42 +320,32 @@ class MarketingAgent:
         await self._ready_event.wait()
 
         prompt = self.prompt_template.format(text=text, link=link)
+        messages = [{"role": "user", "content": prompt}]
+        schema = SOCIAL_POSTS_SCHEMA if self.structured_output else None
         try:
-            response = ollama.chat(
-                model="gemma3:latest",
-                messages=[{"role": "user", "content": prompt}],
-                stream=False
-            )
+            content = await self.llm_client.chat(messages=messages, format=schema)
         except Exception as e:
             raise RuntimeError(f"Ollama call failed: {e}")
 
-        content = getattr(getattr(response, "message", None), "content", None)
         if not content:
             raise ValueError("Ollama response invalid or empty")
 
-        # Nettoyage Markdown ou blocs de code éventuels
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[len("```json"):].strip()
-        if content.endswith("```"):
-            content = content[:-3].strip()
-
-        # Tentative de parsing JSON
+        # Sortie contrainte par le schema ; réparation tolérante si le modèle s'en écarte
         try:
-            posts = json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback : parfois le modèle renvoie des quotes simples
-            content_fixed = content.replace("'", '"')
-            try:
-                posts = json.loads(content_fixed)
-            except Exception:
-                raise ValueError(f"Ollama did not return valid JSON: {content[:400]}")
+            posts = loads_tolerant(content.strip(), source="social_posts")
+        except ValueError:
+            await self.llm_client.invalidate(messages, format=schema)
+            raise ValueError(f"Ollama did not return valid JSON: {content[:400]}")
+        if isinstance(posts, dict) and isinstance(posts.get("posts"), list):
+            posts = posts["posts"]
 
         # Validation légère du format
         if not isinstance(posts, list):
+            await self.llm_client.invalidate(messages, format=schema)
             raise ValueError("Expected a JSON list of posts.")
         for post in posts:
             if not isinstance(post, dict) or "text" not in post:
+                await self.llm_client.invalidate(messages, format=schema)
                 raise ValueError(f"Invalid post structure: {post}")
 
         return posts
@@ -218,42 +355,249 @@ class RAGAgent:
     Agent spécialisé pour répondre à des questions
     en s'appuyant sur la base vectorielle FAISS des articles.
     """
-    def __init__(self, top_k: int = 5, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        top_k: int = 5,
+        model_name: str = EMBEDDING_MODEL,
+        batch_size: int = EMBED_BATCH_SIZE,
+        llm_client: Optional[AsyncLLMClient] = None
+    ):
         """
         top_k: nombre d'articles à retourner
-        model_name: modèle de sentence-transformers pour les embeddings
+        model_name: modèle de sentence-transformers pour les embeddings (chargé à la demande)
+        batch_size: nombre de textes encodés par passe du modèle
+        llm_client: client Ollama partagé pour la génération de la réponse
         """
         self.top_k = top_k
-        self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.llm_client = llm_client or get_llm_client()
+        self.prompt_template = rag_answer_prompt
+        self.context_chars = RAG_CONTEXT_CHARS
+        # Cache LRU des embeddings de questions (clé = question normalisée)
+        self.query_cache_size = QUERY_EMBED_CACHE_SIZE
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
+        # Modèle chargé par initialize() (en arrière-plan) ou au premier encodage
+        self.model_name = model_name
+        self.model = None
+        self.dim: Optional[int] = None
+        self.load_seconds: Optional[float] = None
+        self.ready = False
+        self._ready_event = asyncio.Event()
+        self._model_lock = threading.Lock()
+        # Thread dédié : l'encodage (CPU/GPU) ne bloque jamais l'event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings")
+        self.embedding_service = EmbeddingService(self.embed_texts, self._executor)
+
+    def load_model(self):
+        """
+        Charge sentence-transformers (import compris, plusieurs secondes) une seule fois.
+        Synchrone : appelé sur le thread d'embeddings.
+        """
+        with self._model_lock:
+            if self.model is not None:
+                return self.model
+            start = time.time()
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.model_name)
+            self.dim = model.get_sentence_embedding_dimension()
+            self.model = model
+            self.load_seconds = round(time.time() - start, 2)
+            logging.info(f"🧠 Modèle d'embeddings {self.model_name} chargé en {self.load_seconds}s (dim={self.dim})")
+            return model
+
+    async def initialize(self):
+        """Préchauffe le modèle sur le thread d'embeddings sans bloquer l'event loop."""
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.load_model)
+            self.ready = True
+        finally:
+            # En cas d'échec, les appelants ne restent pas bloqués : l'encodage retentera le chargement
+            self._ready_event.set()
 
     def embed_text(self, text: str) -> np.ndarray:
         """
         Transforme un texte en vecteur float32 compatible FAISS.
         """
-        return self.model.encode(text, convert_to_numpy=True).astype("float32")
+        return self.embed_texts([text])[0]
 
-    async def answer_question(self, question: str, articles, faiss_index):
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
         """
-        Recherche les articles les plus proches dans FAISS et génère une réponse concise.
+        Encode une liste de textes par batchs, matrice (n, dim) float32 normalisée.
         """
-        # Crée le vecteur de la question
-        q_vector = np.array([self.embed_text(question)], dtype='float32')
+        model = self.model or self.load_model()
+        return model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        ).astype("float32")
 
-        # Recherche des k plus proches voisins
-        D, I = faiss_index.search(q_vector, self.top_k)  # distances et indices
+    async def aembed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Version async de embed_texts : passe par le service de micro-batching,
+        qui fusionne les demandes concurrentes et encode sur le thread d'embeddings.
+        """
+        return await self.embedding_service.embed(texts)
 
-        # Récupère les articles correspondants
-        closest_articles = [articles[i] for i in I[0] if i < len(articles)]
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        """Clé de cache d'une question : minuscules, espaces réduits, ponctuation finale retirée."""
+        return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!.¿¡ ")
 
-        # Génère une réponse simple basée sur les titres et contenus
-        titles = [a.title for a in closest_articles]
-        context_texts = [a.content for a in closest_articles]
-        answer = f"Found {len(closest_articles)} relevant articles: {titles}"
+    async def aembed_queries(self, questions: List[str]) -> np.ndarray:
+        """
+        Embeddings de questions avec cache LRU : seules les questions absentes du cache
+        (dédupliquées) sont encodées, en un seul appel batché au modèle.
+        """
+        keys = [self.normalize_query(q) for q in questions]
+        found = {k: self._query_cache[k] for k in keys if k in self._query_cache}
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        self.query_cache_hits += sum(1 for k in keys if k in found)
+        self.query_cache_misses += len(keys) - sum(1 for k in keys if k in found)
+        if missing:
+            vectors = await self.aembed_texts(missing)
+            found.update(zip(missing, vectors))
+        for key in keys:
+            self._query_cache[key] = found[key]
+            self._query_cache.move_to_end(key)
+        while len(self._query_cache) > self.query_cache_size:
+            self._query_cache.popitem(last=False)
+        return np.stack([found[k] for k in keys]).astype("float32")
+
+    def query_cache_stats(self) -> dict:
+        lookups = self.query_cache_hits + self.query_cache_misses
+        return {
+            "entries": len(self._query_cache),
+            "max_entries": self.query_cache_size,
+            "hits": self.query_cache_hits,
+            "misses": self.query_cache_misses,
+            "hit_rate": round(self.query_cache_hits / lookups, 3) if lookups else 0.0
+        }
+
+    async def retrieve_batch(
+        self, questions: List[str], vector_store, k: Optional[int] = None
+    ) -> Tuple[List[List[Tuple[str, float]]], dict]:
+        """
+        Encode les questions (batch + cache) puis interroge FAISS en une seule requête matricielle.
+        Retourne, par question, les (article_id, distance), et les latences par étape.
+        """
+        timings = {}
+        start = time.perf_counter()
+        q_vectors = await self.aembed_queries(questions)
+        timings["embed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        hits = await asyncio.to_thread(vector_store.search, q_vectors, k or self.top_k)
+        timings["search_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return hits, timings
+
+    async def retrieve(self, question: str, vector_store, k: Optional[int] = None) -> Tuple[List[Tuple[str, float]], dict]:
+        """
+        Encode la question hors de l'event loop puis interroge FAISS.
+        Retourne les (article_id, distance) et les latences par étape.
+        """
+        hits, timings = await self.retrieve_batch([question], vector_store, k)
+        return hits[0], timings
+
+    async def hydrate(self, article_ids: List[str]) -> List[ArticleContextView]:
+        """
+        Charge les articles retrouvés en une seule requête $in, projetée sur les champs utiles,
+        dans l'ordre de pertinence FAISS.
+        """
+        if not article_ids:
+            return []
+        docs = await Article.find(
+            {"_id": {"$in": [PydanticObjectId(a) for a in article_ids]}}
+        ).project(ArticleContextView).to_list()
+        by_id = {str(d.id): d for d in docs}
+        return [by_id[a] for a in article_ids if a in by_id]
+
+    async def generate_answer(self, question: str, articles: List[ArticleContextView]) -> str:
+        """Génère une réponse ancrée sur les articles fournis avec le modèle local."""
+        context = "\n\n".join(
+            f"[{i}] {a.name}\n{a.description}\n{a.cleaned_text[:self.context_chars]}"
+            for i, a in enumerate(articles, start=1)
+        )
+        prompt = self.prompt_template.format(context=context, question=question)
+        content = await self.llm_client.chat(messages=[{"role": "user", "content": prompt}])
+        if not content:
+            raise ValueError("Ollama response invalid or empty")
+        return content.strip()
+
+    async def answer_question(self, question: str, vector_store) -> dict:
+        """
+        Recherche les articles les plus proches dans FAISS et génère une réponse concise.
+        """
+        total_start = time.perf_counter()
+        hits, timings = await self.retrieve(question, vector_store)
+
+        start = time.perf_counter()
+        articles = await self.hydrate([article_id for article_id, _ in hits])
+        timings["hydrate_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        if articles:
+            answer = await self.generate_answer(question, articles)
+        else:
+            answer = "No relevant articles found."
+        timings["generate_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        timings["total_ms"] = round((time.perf_counter() - total_start) * 1000, 2)
 
         return {
             "question": question,
             "answer": answer,
-            "articles": [a.dict() for a in closest_articles],
-            "titles": titles,
-            "context_texts": context_texts
+            "articles": self._format_articles(articles, hits),
+            "timings": timings
         }
+
+    async def answer_questions(self, questions: List[str], vector_store, generate: bool = False) -> dict:
+        """
+        Version batch de answer_question : un encodage batché, une recherche FAISS matricielle,
+        une seule requête $in pour l'union des articles retrouvés. Avec generate=True,
+        les réponses sont générées en parallèle (plafonnées par le client LLM).
+        """
+        total_start = time.perf_counter()
+        all_hits, timings = await self.retrieve_batch(questions, vector_store)
+
+        start = time.perf_counter()
+        union_ids = list(dict.fromkeys(article_id for hits in all_hits for article_id, _ in hits))
+        by_id = {str(a.id): a for a in await self.hydrate(union_ids)}
+        per_question = [[by_id[a] for a, _ in hits if a in by_id] for hits in all_hits]
+        timings["hydrate_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        answers = [None] * len(questions)
+        if generate:
+            answers = await asyncio.gather(*(
+                self.generate_answer(q, arts) if arts else asyncio.sleep(0, "No relevant articles found.")
+                for q, arts in zip(questions, per_question)
+            ), return_exceptions=True)
+            answers = [f"Error: {a}" if isinstance(a, Exception) else a for a in answers]
+        timings["generate_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        timings["total_ms"] = round((time.perf_counter() - total_start) * 1000, 2)
+
+        return {
+            "results": [
+                {"question": q, "answer": answer, "articles": self._format_articles(arts, hits)}
+                for q, answer, arts, hits in zip(questions, answers, per_question, all_hits)
+            ],
+            "timings": timings,
+            "query_cache": self.query_cache_stats()
+        }
+
+    @staticmethod
+    def _format_articles(articles: List[ArticleContextView], hits: List[Tuple[str, float]]) -> List[dict]:
+        distances = dict(hits)
+        return [
+            {
+                "id": str(a.id),
+                "name": a.name,
+                "description": a.description,
+                "link": a.link,
+                "distance": distances.get(str(a.id))
+            }
+            for a in articles
+        ]
@@ -33,3 +33,168 @@ Output ONLY the JSON object.
 Cleaned text: "{cleaned_text}"
 Source link: "{link}"
 """
+
+# Prompt 1+2 fusionnés : nettoyage et extraction en un seul appel (articles courts)
+merged_clean_extract_prompt = """
+You are a professional Markdown processing assistant. Your goal is to clean the provided markdown article and generate a single JSON object for database insertion, in one step.
+
+Cleaning requirements for text_clean (do not add, remove, or invent content outside of the original text):
+1. Remove all Markdown links, keeping only the link text.
+2. Remove any HTML tags or embedded scripts.
+3. Remove URLs, email addresses, or references to external websites.
+4. Flatten lists into simple text without bullets or dashes.
+5. Normalize whitespace: collapse multiple blank lines into a maximum of two.
+6. Preserve headings as simple text but without Markdown symbols (#, ##, etc.).
+7. Keep the text in the same language as the original content.
+
+Generate the following fields in JSON exactly and in this order:
+   - name → a title or slug of the article
+   - description → a short summary of 2-3 sentences
+   - tags → 3 to 6 representative keywords
+   - text_clean → the main cleaned content with a coherent title for the content at the top
+   - link → the source URL
+Do not add any other fields or explanations.
+
+Output ONLY the JSON object.
+
+Markdown article: "{markdown_text}"
+Source link: "{link}"
+"""
+
+# --------------------------
+# Pipeline d'ingestion des liens (Google Sheet)
+# --------------------------
+PIPELINE_FETCH_CONCURRENCY = 8   # téléchargements HTML en parallèle
+PIPELINE_LLM_CONCURRENCY = 2     # articles envoyés au LLM en parallèle
+PIPELINE_QUEUE_SIZE = 16         # taille max des files entre étapes (backpressure)
+
+# --------------------------
+# Client LLM (Ollama)
+# --------------------------
+OLLAMA_HOST = "http://localhost:11434"
+LLM_MODEL = "gemma3:latest"
+LLM_MAX_CONCURRENCY = 2          # appels Ollama simultanés (tous agents confondus)
+LLM_TIMEOUT = 300                # secondes max par appel
+LLM_MAX_CONNECTIONS = 10         # taille du pool HTTP vers Ollama
+LLM_STRUCTURED_OUTPUT = True     # JSON contraint par schema (Ollama `format`) pour les sorties structurées
+LLM_NUM_CTX = 8192               # fenêtre de contexte (options.num_ctx), la même pour tous les appels : pas de rechargement du modèle
+
+# --------------------------
+# Nettoyage Markdown
+# --------------------------
+CLEANING_FANOUT = 4              # segments d'un même article nettoyés en parallèle
+
+# --------------------------
+# Cache disque des réponses LLM
+# --------------------------
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = "./cache/llm_cache.sqlite"
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024   # 200 Mo
+LLM_CACHE_MAX_ENTRIES = 50_000
+LLM_CACHE_TTL = 30 * 24 * 3600            # 30 jours
+LLM_CACHE_PURGE_EVERY = 200               # écritures entre deux purges des entrées expirées
+
+# --------------------------
+# Découpage (chunking) des textes envoyés au LLM
+# --------------------------
+CHARS_PER_TOKEN = 4              # estimation grossière pour gemma3 (texte latin)
+CHUNK_TOKEN_BUDGET = 768         # tokens max par segment envoyé au LLM
+CHUNK_OVERLAP_TOKENS = 0         # recouvrement entre segments (0 = aucun doublon en sortie)
+MERGED_JSON_OVERHEAD_TOKENS = 256  # sortie de l'appel fusionné hors texte nettoyé (name, description, tags, syntaxe JSON)
+MERGED_CTX_SAFETY = 0.9          # part de num_ctx utilisée pour le seuil fusionné (estimate_tokens reste approximatif)
+
+# --------------------------
+# Client HTTP de scraping (partagé)
+# --------------------------
+HTTP_MAX_CONNECTIONS = 50        # connexions totales du pool
+HTTP_PER_HOST_CONCURRENCY = 2    # requêtes simultanées max par domaine
+HTTP_PER_HOST_MIN_INTERVAL = 0.5 # secondes min entre deux requêtes vers un même domaine
+HTTP_TIMEOUT = 15                # secondes
+HTTP_MAX_RETRIES = 3             # nouvelles tentatives sur 5xx / 429 / timeout
+HTTP_MAX_RETRY_AFTER = 30        # secondes max d'attente demandées par Retry-After
+HTTP_MAX_BYTES = 5 * 1024 * 1024 # taille max d'une page (5 Mo)
+HTTP_USER_AGENT = "Mozilla/5.0 (compatible; EmeraldsBusinessBot/1.0)"
+
+# --------------------------
+# Cache des pages téléchargées (GET conditionnel)
+# --------------------------
+FETCH_CACHE_ENABLED = True
+FETCH_CACHE_PATH = "./cache/fetch_cache.sqlite"
+FETCH_CACHE_MAX_BYTES = 500 * 1024 * 1024  # 500 Mo
+FETCH_CACHE_MAX_ENTRIES = 20_000
+
+# --------------------------
+# Embeddings / FAISS
+# --------------------------
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 64            # textes encodés par appel au modèle
+FAISS_INDEX_MODE = "auto"        # "auto" | "flat" | "hnsw" | "ivfpq"
+FAISS_ANN_THRESHOLD = 50_000     # en mode auto : flat en dessous, IVF-PQ au-dessus
+FAISS_IVF_MIN_VECTORS = 10_000   # en dessous, IVF-PQ est mal entraîné → flat
+FAISS_IVF_TRAIN_PER_LIST = 64    # points d'entraînement par liste IVF
+FAISS_IVF_NPROBE = 16            # listes visitées par requête
+FAISS_HNSW_M = 32                # voisins par nœud HNSW
+FAISS_HNSW_EF_CONSTRUCTION = 80
+FAISS_HNSW_EF_SEARCH = 64
+
+# Prompt 3 : réponse RAG ancrée sur les articles retrouvés
+rag_answer_prompt = """
+You are a research assistant for a precious stones and metals business. Answer the question using ONLY the articles below.
+If the articles do not contain the answer, say so explicitly. Cite the articles you use with their number, like [1] or [2].
+Answer in the same language as the question, in a concise paragraph.
+
+Articles:
+{context}
+
+Question: "{question}"
+"""
+RAG_CONTEXT_CHARS = 1500         # caractères de cleaned_text par article dans le contexte
+QUERY_EMBED_CACHE_SIZE = 2048   # embeddings de questions gardés en mémoire (LRU)
+EMBED_MICROBATCH_MAX_TEXTS = 64  # textes max regroupés dans un micro-batch
+EMBED_MICROBATCH_MAX_WAIT_MS = 10  # attente max pour remplir un micro-batch
+
+# --------------------------
+# Jobs en arrière-plan
+# --------------------------
+JOB_WORKERS = 2                  # jobs exécutés en parallèle
+
+# --------------------------
+# Posts sociaux
+# --------------------------
+POSTS_CONCURRENCY = 2            # articles envoyés en parallèle à l'agent marketing
+POSTS_WRITE_BATCH = 20           # articles par bulk_write (et par page de lecture)
+
+# --------------------------
+# Index Mongo / empreintes de contenu
+# --------------------------
+FINGERPRINT_BACKFILL_BATCH = 500  # articles mis à jour par bulk_write lors du calcul des empreintes manquantes
+MINHASH_PERMUTATIONS = 128       # taille de la signature MinHash
+MINHASH_SHINGLE_WORDS = 5        # mots par shingle
+LSH_BANDS = 32                   # bandes LSH (lignes par bande = permutations / bandes)
+NEAR_DUPLICATE_THRESHOLD = 0.8   # similarité de Jaccard estimée au-delà de laquelle un article est un quasi-doublon
+NEAR_DUPLICATE_MAX_CANDIDATES = 50  # candidats LSH vérifiés par lookup
+
+# --------------------------
+# Recherche plein texte (BM25)
+# --------------------------
+SEARCH_FIELD_WEIGHTS = {         # poids des champs dans la fréquence des termes (BM25F simplifié)
+    "name": 3.0,
+    "description": 2.0,
+    "cleaned_text": 1.0,
+    "translation": 1.0,
+}
+SEARCH_BM25_K1 = 1.2             # saturation de la fréquence des termes
+SEARCH_BM25_B = 0.75             # normalisation par la longueur du document
+SEARCH_BUILD_BATCH = 500         # articles tokenisés par lot lors de la construction
+SEARCH_COMPACT_RATIO = 0.2       # part de documents supprimés / remplacés déclenchant une reconstruction
+SEARCH_SNIPPET_CHARS = 160       # taille d'un extrait surligné
+SEARCH_MAX_SNIPPETS = 3          # extraits par champ
+SEARCH_HIGHLIGHT_TAGS = ("**", "**")  # balises autour des termes trouvés (Markdown, affiché par Streamlit)
+
+# --------------------------
+# Recherche hybride (BM25 + FAISS)
+# --------------------------
+HYBRID_CANDIDATES = 100          # documents retrouvés par chaque source avant fusion
+HYBRID_RRF_K = 60                # constante de la fusion RRF : 1 / (k + rang)
+HYBRID_CACHE_SIZE = 256          # fenêtres de résultats gardées en mémoire (LRU)
+HYBRID_CACHE_TTL = 300           # secondes avant de relancer les deux recherches
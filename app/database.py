@@ -1,22 +1,25 @@
 # database.py
-import os, gspread, logging
+import os, gspread, logging, time
 import asyncio
+from typing import Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
 import faiss
 import numpy as np
 from app.utils.utils import find_config
 from google.oauth2.service_account import Credentials
+from app.utils.faiss_index import FaissStore, FAISS_INDEX_PATH
 
 logging.basicConfig(level=logging.INFO)
 load_dotenv()
 
-config = find_config(creds="mongo_creds.json")
-
 # --------------------------
 # MongoDB async
 # --------------------------
 async def init_db():
+    # Lu à la connexion et non à l'import : les modules qui importent app.database restent importables sans identifiants
+    config = find_config(creds="mongo_creds.json")
     MONGODB_URL = config.get("emeralds_business_url")
     if not MONGODB_URL:
         logging.error("MONGODB_URL not found in config.")
@@ -33,33 +36,87 @@ async def init_db():
     logging.info("Connected to MongoDB.")
     return db
 
+# --------------------------
+# Index Mongo
+# --------------------------
+async def ensure_indexes(document) -> Dict[str, dict]:
+    """
+    Crée les index déclarés dans `document.Settings.indexes` (init_beanie est appelé avec skip_indexes=True).
+    Un index qui ne peut pas être créé (ex. liens en double pour link_unique) est signalé
+    sans bloquer le démarrage. Retourne l'état de chaque index : exists, created ou failed.
+    """
+    collection = document.get_pymongo_collection()
+    existing = await collection.index_information()
+    report: Dict[str, dict] = {}
+    for model in getattr(document.Settings, "indexes", []):
+        spec = model.document
+        name = spec["name"]
+        keys = [[field, direction] for field, direction in spec["key"].items()]
+        if name in existing:
+            report[name] = {"keys": keys, "status": "exists"}
+            continue
+        start = time.time()
+        try:
+            await collection.create_indexes([model])
+            report[name] = {"keys": keys, "status": "created", "seconds": round(time.time() - start, 2)}
+            logging.info(f"🗂️ Index {document.Settings.name}.{name} créé en {time.time() - start:.2f}s")
+        except OperationFailure as e:
+            report[name] = {"keys": keys, "status": "failed", "error": str(e)}
+            logging.error(f"❌ Index {document.Settings.name}.{name} non créé : {e}")
+    return report
+
+def summarize_plan(explain: dict) -> dict:
+    """Résumé d'un explain() : étapes du plan gagnant, index utilisés, scan complet, tri en mémoire, coûts."""
+    winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+    winning = winning.get("queryPlan", winning)     # moteur SBE (MongoDB 7+)
+    stages, indexes, stack = [], [], [winning]
+    while stack:
+        node = stack.pop()
+        stages.append(node.get("stage"))
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        if "inputStage" in node:
+            stack.append(node["inputStage"])
+        stack.extend(node.get("inputStages", []))
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "time_ms": stats.get("executionTimeMillis")
+    }
+
 # --------------------------
 # FAISS vector database
 # --------------------------
-_faiss_index = None
-_faiss_dim = 128  # adapte selon ton embedding
+_vector_store: Optional[FaissStore] = None
 
-def init_faiss(dim=_faiss_dim, path="./faiss_index.index"):
+def init_faiss(dim: int, path=FAISS_INDEX_PATH) -> FaissStore:
     """
-    Initialise un index FAISS sur disque ou mémoire.
+    Initialise l'index FAISS depuis le disque, ou un index vide.
+    dim : dimension des embeddings, dérivée du modèle (RAGAgent.dim).
     """
-    global _faiss_index
-    if os.path.exists(path):
-        logging.info(f"Loading FAISS index from {path}")
-        _faiss_index = faiss.read_index(path)
+    global _vector_store
+    store = FaissStore(dim, path)
+    if store.load():
+        logging.info(f"Loading FAISS index from {path} ({len(store)} vecteurs)")
     else:
         logging.info("Creating new FAISS index")
-        _faiss_index = faiss.IndexFlatL2(dim)
-    return _faiss_index
+    _vector_store = store
+    return _vector_store
 
-async def get_faiss_index():
+async def get_vector_store(dim: int) -> FaissStore:
     """
     Retourne l'index FAISS de manière async-safe.
     """
-    global _faiss_index
-    if _faiss_index is None:
-        _faiss_index = await asyncio.to_thread(init_faiss)
-    return _faiss_index
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = await asyncio.to_thread(init_faiss, dim)
+    return _vector_store
 
 
 # --------------------------
@@ -1,16 +1,25 @@
 # main.py
 from fastapi import FastAPI
 from beanie import init_beanie
-import asyncio
+import asyncio, time
 from contextlib import asynccontextmanager
-from app.models import Article
+from app.models import Article, Job, JobItem
 from app.routes.colllections import router as collection_routers
 from app.routes.ia_actions import router as articles_routers
 from app.routes.stats import router as stats_routers
+from app.routes.jobs import router as jobs_routers
+from app.routes.search import router as search_routers
 from app.agents import MarketingAgent, MarkdownCleanerAgent, RAGAgent
 from app.utils.utils import find_config
-from app.database import init_db, get_faiss_index, connect_to_sheet, read_links
+from app.database import init_db, ensure_indexes, get_vector_store, connect_to_sheet, read_links
 from app.config import markdown_cleaning_prompt, json_generation_prompt
+from app.utils.llm import get_llm_client, close_llm_client
+from app.utils.http import get_article_fetcher, close_article_fetcher
+from app.utils.fetch_cache import get_fetch_cache, close_fetch_cache
+from app.config import FETCH_CACHE_ENABLED, JOB_WORKERS
+from app.utils.jobs import JobManager, JOB_HANDLERS
+from app.utils.search import get_search_index, HybridResultCache
+from app.utils.fingerprint import backfill_fingerprints
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -23,11 +32,97 @@ try:
 except Exception as e:
     logging.error(f"[ERROR] Échec chargement des templates de prompt :\n{e}")
 
+def load_sheet_links(app: FastAPI):
+    """Connexion Google Sheets et lecture des liens (I/O bloquante → appelée via to_thread)."""
+    sheet = connect_to_sheet()
+    if sheet:
+        app.state.sheet = sheet
+        logging.info("✅ Google Sheet connecté et stocké dans app.state")
+        articles_links = read_links(sheet)
+        if articles_links:
+            app.state.articles_links = articles_links
+            logging.info(f"{len(articles_links)} liens récupérés depuis la feuille Google")
+        else:
+            logging.warning("❌ Aucun lien trouvé dans la feuille Google")
+
+async def warm_up(app: FastAPI):
+    """
+    Chargements lourds lancés après l'ouverture du serveur :
+    modèle d'embeddings puis index FAISS (dont la dimension dépend du modèle), index plein texte,
+    empreintes de contenu manquantes et Google Sheets.
+    Les routes qui en dépendent attendent les events correspondants.
+    """
+    startup = app.state.startup
+
+    async def warm_rag():
+        try:
+            rag_agent = app.state.rag_agent
+            await rag_agent.initialize()
+            logging.info("RAGAgent initialized and added to app.state")
+            # Vector DB FAISS (dimension dérivée du modèle, ids stables, rechargée depuis le disque)
+            vector_store = await get_vector_store(rag_agent.dim)
+            # Articles supprimés pendant le chargement : vecteurs retirés avant de servir l'index
+            pending = app.state.pending_vector_removals
+            removed = vector_store.remove(list(pending))
+            pending.clear()
+            app.state.vector_store = vector_store
+            if removed:
+                logging.info(f"🗑️ {removed} vecteur(s) d'articles supprimés pendant le chargement retirés")
+                await vector_store.asave()
+            # Index ANN (HNSW / IVF-PQ) reconstruit en arrière-plan si le corpus le justifie
+            app.state.vector_store.schedule_rebuild()
+        except Exception as e:
+            startup["errors"]["rag"] = str(e)
+            logging.error(f"❌ Échec du préchauffage RAG / FAISS :\n{e}")
+        finally:
+            app.state.vector_store_ready.set()
+
+    async def warm_sheet():
+        try:
+            await asyncio.to_thread(load_sheet_links, app)
+        except Exception as e:
+            startup["errors"]["google_sheet"] = str(e)
+            logging.error(f"❌ Échec de connexion à Google Sheets :\n{e}")
+        finally:
+            app.state.sheet_ready.set()
+
+    async def warm_search():
+        search_index = app.state.search_index
+        try:
+            await search_index.rebuild()
+        except Exception as e:
+            startup["errors"]["search_index"] = str(e)
+            logging.error(f"❌ Échec de construction de l'index plein texte :\n{e}")
+        finally:
+            search_index.ready.set()
+
+    async def warm_fingerprints():
+        try:
+            await backfill_fingerprints()
+        except Exception as e:
+            startup["errors"]["fingerprints"] = str(e)
+            logging.error(f"❌ Échec du calcul des empreintes de contenu :\n{e}")
+
+    await asyncio.gather(warm_rag(), warm_sheet(), warm_search(), warm_fingerprints())
+    startup["warm_after_s"] = round(time.perf_counter() - startup["t0"], 2)
+    logging.info(f"🔥 Préchauffage terminé {startup['warm_after_s']}s après le lancement")
+
 # --- Async context manager pour FastAPI lifespan ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    marketing_agent = MarketingAgent()
-    markdownCleaner_agent = MarkdownCleanerAgent()
+    app.state.startup = {"t0": time.perf_counter(), "serving_after_s": None, "warm_after_s": None, "errors": {}}
+
+    # Client Ollama async partagé (pool HTTP + plafond de concurrence)
+    llm_client = get_llm_client()
+    app.state.llm_client = llm_client
+
+    # Client HTTP de scraping partagé (keep-alive, HTTP/2, politesse par domaine)
+    app.state.http_fetcher = get_article_fetcher()
+    # Cache des pages (ETag / Last-Modified) pour éviter de retraiter les pages inchangées
+    app.state.fetch_cache = get_fetch_cache() if FETCH_CACHE_ENABLED else None
+
+    marketing_agent = MarketingAgent(llm_client=llm_client)
+    markdownCleaner_agent = MarkdownCleanerAgent(llm_client=llm_client)
 
     # Initialisation des agents
     await asyncio.gather(
@@ -41,41 +136,51 @@ async def lifespan(app: FastAPI):
 
     # Base de données Mongo / Beanie
     db = await init_db()
-    await init_beanie(database=db, document_models=[Article])
+    # Index déclarés dans Settings.indexes, créés ici pour qu'un échec (doublons) ne bloque pas le démarrage
+    await init_beanie(database=db, document_models=[Article, Job, JobItem], skip_indexes=True)
     app.state.db = db
+    app.state.indexes = {
+        Article.Settings.name: await ensure_indexes(Article),
+        Job.Settings.name: await ensure_indexes(Job),
+        JobItem.Settings.name: await ensure_indexes(JobItem)
+    }
 
-    # Vector DB FAISS
-    faiss_index = await get_faiss_index()
-    app.state.faiss_index = faiss_index
+    # RAGAgent créé sans modèle : sentence-transformers, FAISS et Google Sheets
+    # sont chargés en arrière-plan pour que le serveur accepte les requêtes tout de suite
+    rag_agent = RAGAgent(5, llm_client=llm_client)
+    app.state.rag_agent = rag_agent
+    app.state.vector_store_ready = asyncio.Event()
+    # Suppressions reçues avant le chargement de FAISS (appliquées par warm_up)
+    app.state.pending_vector_removals = set()
+    app.state.sheet_ready = asyncio.Event()
+    # Index BM25 de /collections/search, construit depuis Mongo pendant le préchauffage
+    app.state.search_index = get_search_index()
+    # Fenêtres de /search/hybrid (pagination sans relancer BM25 + FAISS)
+    app.state.hybrid_cache = HybridResultCache()
+    warm_task = asyncio.create_task(warm_up(app))
 
-    # Set pour suivre les IDs déjà vectorisés
-    app.state.article_ids = set()
+    # Jobs en arrière-plan (persistés dans Mongo, repris s'ils étaient inachevés)
+    job_manager = JobManager(app, JOB_HANDLERS, workers=JOB_WORKERS)
+    await job_manager.start()
+    app.state.job_manager = job_manager
 
-    # --- Initialisation du RAGAgent ---
-    rag_agent = RAGAgent(top_k=5)
-    app.state.rag_agent = rag_agent
-    logging.info("RAGAgent initialized and added to app.state")
-
-    # --- Connexion Google Sheets ---
-    try:
-        sheet = connect_to_sheet()
-        if sheet:
-            app.state.sheet = sheet
-            logging.info("✅ Google Sheet connecté et stocké dans app.state")
-            articles_links = read_links(sheet)
-            if articles_links:
-                app.state.articles_links = articles_links
-                logging.info(f"{len(articles_links)} liens récupérés depuis la feuille Google")
-            else:
-                logging.warning("❌ Aucun lien trouvé dans la feuille Google")
-    except Exception as e:
-        logging.error(f"❌ Échec de connexion à Google Sheets :\n{e}")
-
-    logging.info("App lifespan setup complete")
+    app.state.startup["serving_after_s"] = round(time.perf_counter() - app.state.startup["t0"], 2)
+    logging.info(f"App lifespan setup complete ({app.state.startup['serving_after_s']}s)")
     yield  # permet au serveur de démarrer
 
+    # --- Arrêt ---
+    await job_manager.close()
+    if not warm_task.done():
+        warm_task.cancel()
+    await rag_agent.embedding_service.close()
+    await close_llm_client()
+    await close_article_fetcher()
+    close_fetch_cache()
+
 # --- Création de l'app FastAPI ---
 app = FastAPI(lifespan=lifespan)
 app.include_router(collection_routers, prefix="/collections", tags=["Collections"])
 app.include_router(articles_routers, prefix="/ia", tags=["IA"])
 app.include_router(stats_routers, prefix="/stats", tags=["Stats"])
+app.include_router(jobs_routers, prefix="/jobs", tags=["Jobs"])
+app.include_router(search_routers, prefix="/search", tags=["Search"])
@@ -1,5 +1,6 @@
-from beanie import Document
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, HASHED, IndexModel
 from datetime import datetime
 from typing import List, Optional
 
@@ -11,8 +12,12 @@ class SocialPost(BaseModel):
 class Article(Document):
     name: str = Field(default="")
     description: str = Field(default="")
-    link: str = Field(..., unique=True)
+    link: str = Field(..., description="Lien original (index unique)")
     cleaned_text: str = Field(default="")
+    content_hash: Optional[str] = Field(default=None, description="SHA-256 du texte nettoyé (déduplication par contenu)")
+    source_hash: Optional[str] = Field(default=None, description="SHA-256 du Markdown source, avant LLM")
+    minhash: Optional[List[int]] = Field(default=None, description="Signature MinHash du Markdown source (quasi-doublons)")
+    lsh_buckets: List[str] = Field(default_factory=list, description="Clés de bandes LSH de la signature")
     date_added: datetime = Field(default_factory=datetime.now)
     processed: bool = Field(default=False)
     articles: List[SocialPost] = Field(default_factory=list)
@@ -20,6 +25,55 @@ class Article(Document):
 
     class Settings:
         name = "Articles"
+        # Créés au démarrage par ensure_indexes (app/database.py)
+        indexes = [
+            IndexModel([("link", ASCENDING)], name="link_unique", unique=True),
+            IndexModel([("content_hash", HASHED)], name="content_hash_hashed"),
+            IndexModel([("source_hash", HASHED)], name="source_hash_hashed"),
+            IndexModel([("lsh_buckets", ASCENDING)], name="lsh_buckets"),
+            IndexModel([("processed", ASCENDING), ("date_added", DESCENDING)], name="processed_date_added"),
+            IndexModel([("date_added", DESCENDING), ("_id", DESCENDING)], name="date_added_id"),
+        ]
+
+class JobItem(Document):
+    """
+    Résultat d'un élément traité par un job (lien, article ou batch).
+    Un document par élément : le Job ne garde que ses compteurs et reste loin de la limite de 16 Mo.
+    """
+    job_id: PydanticObjectId
+    key: str
+    status: str = Field(..., description="success | skipped | failed")
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    finished_at: datetime = Field(default_factory=datetime.now)
+
+    class Settings:
+        name = "JobItems"
+        indexes = [
+            IndexModel([("job_id", ASCENDING), ("_id", ASCENDING)], name="job_id_id"),
+        ]
+
+class Job(Document):
+    kind: str
+    status: str = Field(default="queued", description="queued | running | completed | failed | cancelled")
+    params: dict = Field(default_factory=dict)
+    total: Optional[int] = None
+    succeeded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    summary: Optional[dict] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "Jobs"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+            IndexModel([("created_at", DESCENDING)], name="created_at"),
+        ]
 
 class CleanedArticle(BaseModel):
     name: str = Field(..., description="Titre principal de l'article")
@@ -27,3 +81,51 @@ class CleanedArticle(BaseModel):
     tags: List[str] = Field(default_factory=list, description="Mots-clés représentatifs")
     text_clean: str = Field(..., description="Version nettoyée du Markdown")
     link: str = Field(..., description="Lien original de l'article")
+
+class ArticleTextView(BaseModel):
+    """Projection légère utilisée pour la vectorisation (évite de charger posts et traduction)."""
+    id: PydanticObjectId = Field(alias="_id")
+    name: str = ""
+    cleaned_text: str = ""
+
+class ArticleIdView(BaseModel):
+    """Projection réduite à l'identifiant (suppressions groupées)."""
+    id: PydanticObjectId = Field(alias="_id")
+
+class ArticlePostView(BaseModel):
+    """Projection utilisée pour la génération des posts sociaux."""
+    id: PydanticObjectId = Field(alias="_id")
+    name: str = ""
+    link: str = ""
+    translation: Optional[str] = None
+
+class ArticleContextView(BaseModel):
+    """Projection utilisée par le RAG : de quoi citer et contextualiser un article."""
+    id: PydanticObjectId = Field(alias="_id")
+    name: str = ""
+    description: str = ""
+    link: str = ""
+    cleaned_text: str = ""
+
+class ArticleSearchView(BaseModel):
+    """Projection utilisée par l'index plein texte : champs tokenisés et de quoi afficher un résultat."""
+    id: PydanticObjectId = Field(alias="_id")
+    name: str = ""
+    description: str = ""
+    link: str = ""
+    date_added: Optional[datetime] = None
+    cleaned_text: str = ""
+    translation: Optional[str] = None
+
+class ContentFingerprint(BaseModel):
+    """Empreintes d'un texte : exacte (SHA-256) et quasi-doublon (MinHash + bandes LSH)."""
+    source_hash: str
+    minhash: Optional[List[int]] = None
+    lsh_buckets: List[str] = Field(default_factory=list)
+
+class ArticleFingerprintView(BaseModel):
+    """Projection des candidats d'un lookup de doublons."""
+    id: PydanticObjectId = Field(alias="_id")
+    link: str = ""
+    source_hash: Optional[str] = None
+    minhash: Optional[List[int]] = None
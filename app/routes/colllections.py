@@ -3,14 +3,12 @@ from fastapi import APIRouter, HTTPException, Query, Request
 from app.models import *
 from app.database import *
 from fastapi import Query
-from faker import Faker
 from datetime import datetime
 from typing import List, Optional
 from bson import ObjectId
-import logging, time, re
-from playwright.sync_api import sync_playwright
+import logging, time, re, json
 from bs4 import BeautifulSoup
-from app.agents import MarkdownCleanerAgent, MarketingAgent
+from app.agents import MarkdownCleanerAgent, MarketingAgent, remove_article_vectors
 # routes/vectorize.py
 import numpy as np
 import logging
@@ -18,43 +16,114 @@ from app.utils.ia import (
     create_article_in_db,
     clean_markdown_with_llm,
     get_article_html,
+    commit_fetched_page,
     html_to_markdown
 )
+from app.utils.pipeline import process_links_pipeline
+from app.utils.http import FetchFailed
+from app.utils.sse import sse_response
+from app.routes.jobs import submit_job
+from app.utils.search import get_search_index, get_ready_search_index, parse_keywords, hydrate_hits
+from app.utils.fingerprint import fingerprint_content, find_duplicate
+from app.utils.pagination import (
+    ARTICLE_SORTS, parse_fields, keyset_filter, sort_spec, encode_cursor, json_default, serialize_doc
+)
+from fastapi.responses import StreamingResponse
+from app.config import PIPELINE_FETCH_CONCURRENCY, PIPELINE_LLM_CONCURRENCY
 router = APIRouter()
-fake = Faker()
 
 # --------------------- GET -------------------------------------------------------------------------------------
 # 🔹 OBTENER TODOS LOS ARTÍCULOS
 # ---------------------
 @router.get("/all")
-async def get_articles():
+async def get_articles(
+    limit: int = Query(50, ge=0, le=1000, description="Documentos por página (0 = sin límite, solo en modo ndjson)"),
+    cursor: Optional[str] = Query(None, description="Valor next_cursor de la página anterior"),
+    sort: str = Query("_id", description="Orden: '_id' (inserción) o '-date_added' (más recientes primero)"),
+    fields: Optional[str] = Query(None, description="Campos a devolver separados por comas, ej: name,link,date_added"),
+    format: str = Query("json", description="'json' (una página) o 'ndjson' (flujo de documentos)")
+):
     """
-    Devuelve todos los artículos almacenados en la base de datos.
+    Devuelve los artículos por páginas (keyset sobre _id / date_added, sin skip),
+    con proyección de campos opcional. En modo ndjson los documentos se envían
+    uno por línea a medida que el cursor de Mongo los entrega.
     """
+    if sort not in ARTICLE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort debe ser uno de: {', '.join(ARTICLE_SORTS)}")
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format debe ser 'json' o 'ndjson'.")
     try:
-        articles = await Article.find_all().to_list()
-        return {"count": len(articles), "articles": articles}
+        projection = parse_fields(fields)
+        query = keyset_filter(cursor, sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    collection = Article.get_pymongo_collection()
+    if fields and sort != "_id":
+        # Le curseur suivant a besoin de la valeur de tri
+        projection[ARTICLE_SORTS[sort][0]] = 1
+
+    if format == "ndjson":
+        async def stream():
+            mongo_cursor = collection.find(query, projection).sort(sort_spec(sort)).limit(limit)
+            async for doc in mongo_cursor:
+                yield json.dumps(doc, default=json_default, ensure_ascii=False) + "\n"
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    if limit == 0:
+        raise HTTPException(status_code=400, detail="limit=0 solo está permitido en modo ndjson.")
+    try:
+        docs = await collection.find(query, projection).sort(sort_spec(sort)).limit(limit).to_list(length=limit)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"❌ Error al obtener los artículos: {str(e)}. Verifica la conexión con la base de datos o la integridad de los datos."
         )
+    next_cursor = encode_cursor(docs[-1], sort) if len(docs) == limit else None
+    return {
+        "count": len(docs),
+        "articles": [serialize_doc(doc) for doc in docs],
+        "next_cursor": next_cursor
+    }
 
 # ---------------------
 # 🔹 BÚSQUEDA FULL-TEXT
 # ---------------------
 @router.get("/search")
-async def search_articles(query: str, limit: int = 20):
+async def search_articles(
+    keywords: Optional[str] = Query(None, description="Palabras clave separadas por comas; una clave de varias palabras exige todas"),
+    query: Optional[str] = Query(None, description="Texto libre: cada palabra cuenta como una clave"),
+    match: str = Query("any", description="'any' (al menos una clave) o 'all' (todas las claves)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000, description="Resultados a saltar (paginación)")
+):
     """
-    Busca artículos por palabra clave en 'name' o 'description'.
+    Búsqueda de texto completo en name, description, cleaned_text y translation
+    mediante un índice invertido en memoria, ordenada por BM25 (sin acentos ni mayúsculas).
+    Cada resultado incluye su puntuación y extractos con los términos resaltados.
     """
     start_time = time.time()
+    if match not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="match debe ser 'any' o 'all'.")
+    groups = parse_keywords(keywords, query)
+    if not groups:
+        raise HTTPException(status_code=400, detail="⚠️ Indica al menos una palabra clave significativa (keywords o query).")
     try:
-        regex = re.compile(query, re.IGNORECASE)
-        articles = await Article.find({"$or": [{"name": regex}, {"description": regex}]}).limit(limit).to_list()
-        duration = round(time.time() - start_time, 2)
-        print(f"[DURACIÓN] /search '{query}': {duration}s")
-        return {"count": len(articles), "query": query, "articles": articles}
+        search_index = await get_ready_search_index()
+        total, hits = search_index.search(groups, match=match, limit=limit, offset=offset)
+        articles = await hydrate_hits(hits, groups)
+        duration = round(time.time() - start_time, 3)
+        print(f"[DURACIÓN] /search {groups} ({match}): {duration}s")
+        return {
+            "count": len(articles),
+            "total": total,
+            "offset": offset,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "keywords": [" ".join(group) for group in groups],
+            "match": match,
+            "took_ms": round(duration * 1000, 1),
+            "articles": articles
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"💥 Error al buscar artículos: {str(e)}")
 
@@ -78,9 +147,15 @@ async def get_recent_articles(limit: int = Query(10, ge=1, le=50)):
 # 🔹 CREAR UN ARTÍCULO DESDE UN ENLACE
 # ---------------------
 @router.post("/add/")
-async def create_article_from_link(link: str, request: Request):
+async def create_article_from_link(
+    link: str,
+    request: Request,
+    force: bool = Query(False, description="Procesar aunque el contenido duplique un artículo existente")
+):
     """
     Crea un nuevo artículo extrayendo contenido desde un enlace (scraping + limpieza + guardado).
+    Si el contenido es un duplicado exacto o casi exacto de un artículo existente (SHA-256 / MinHash),
+    se devuelve ese artículo sin llamar al LLM ni traducir.
     """
     total_start = time.time()
     logger = logging.getLogger("article_creation")
@@ -96,10 +171,26 @@ async def create_article_from_link(link: str, request: Request):
 
         # 1️⃣ Récupération HTML
         start = time.time()
-        clean_html = await get_article_html(link)
+        try:
+            clean_html, unchanged, page = await get_article_html(
+                link, request.app.state.http_fetcher, request.app.state.fetch_cache
+            )
+        except FetchFailed as e:
+            logger.error(f"No se pudo descargar el enlace {link}: {e}")
+            raise HTTPException(status_code=502, detail=f"⚠️ No se pudo descargar el enlace: {e}")
         if not clean_html:
             logger.error(f"No se pudo extraer contenido HTML del enlace: {link}")
             raise HTTPException(status_code=422, detail="⚠️ No se pudo extraer contenido HTML del enlace proporcionado.")
+        existing = await Article.find_one(Article.link == link)
+        if unchanged and existing:
+            logger.info(f"Página sin cambios desde la última ingesta, se omite el LLM: {link}")
+            return {
+                "success": True,
+                "article_id": str(existing.id),
+                "unchanged": True,
+                "duration_seconds": round(time.time() - total_start, 2),
+                "message": "♻️ La página no ha cambiado, se conserva el artículo existente."
+            }
         logger.info(f"HTML extraído correctamente desde {link} en {time.time() - start:.2f}s")
 
         # 2️⃣ Conversion HTML → Markdown
@@ -110,31 +201,60 @@ async def create_article_from_link(link: str, request: Request):
             raise HTTPException(status_code=422, detail="⚠️ El contenido convertido a Markdown está vacío o corrupto.")
         logger.info(f"HTML convertido a Markdown correctamente en {time.time() - start:.2f}s")
 
+        # 2️⃣bis Détection de doublons avant tout appel LLM
+        fingerprint = await asyncio.to_thread(fingerprint_content, markdown_text)
+        duplicate = None if force else await find_duplicate(fingerprint, exclude_id=existing.id if existing else None)
+        if duplicate:
+            logger.info(f"Duplicado {duplicate['kind']} ({duplicate['similarity']}) de {duplicate['link']}, se omite el LLM: {link}")
+            return {
+                "success": True,
+                "article_id": duplicate["article_id"],
+                "duplicate": duplicate,
+                "duration_seconds": round(time.time() - total_start, 2),
+                "message": "♊ El contenido ya existe en otro artículo, no se crea uno nuevo."
+            }
+
         # 3️⃣ Nettoyage et extraction LLM
         start = time.time()
         cleaned_article = None
         retries = 3
         for attempt in range(retries):
             try:
-                cleaned_article = await clean_markdown_with_llm(markdown_agent, markdown_text, link)
-                if cleaned_article and "name" in cleaned_article:
+                cleaned_article, llm_report = await markdown_agent.clean_and_extract(markdown_text, link)
+                if cleaned_article and cleaned_article.name:
                     logger.info(f"Limpieza y extracción LLM exitosa en intento {attempt + 1}")
                     break
             except Exception as e:
                 logger.warning(f"Intento {attempt + 1} de limpieza LLM falló: {e}")
                 await asyncio.sleep(1)
 
-        if not cleaned_article or "name" not in cleaned_article:
+        if not cleaned_article or not cleaned_article.name:
             logger.warning(f"LLM falló tras {retries} intentos, usando fallback con Markdown crudo")
+            llm_report = None
             cleaned_article = CleanedArticle(
                 text_clean=re.sub(r'\s+', ' ', markdown_text.strip())[:5000],
-                name=link.split("/")[-1][:50]
+                name=link.split("/")[-1][:50],
+                description="",
+                link=link
             )
         logger.info(f"Proceso de limpieza/fallback completado en {time.time() - start:.2f}s")
 
         # 4️⃣ Insertion en DB
         start = time.time()
-        article = await create_article_in_db(cleaned_article)
+        article, is_duplicate = await create_article_in_db(
+            cleaned_article, fingerprint, getattr(request.app.state, "vector_store", None)
+        )
+        await commit_fetched_page(request.app.state.fetch_cache, page)
+        if is_duplicate:
+            logger.info(f"Texto limpio idéntico a {article.link}, se conserva el artículo existente: {link}")
+            return {
+                "success": True,
+                "article_id": str(article.id),
+                "duplicate": {"article_id": str(article.id), "link": article.link, "kind": "exact", "similarity": 1.0},
+                "duration_seconds": round(time.time() - total_start, 2),
+                "llm": llm_report,
+                "message": "♊ El contenido ya existe en otro artículo, no se crea uno nuevo."
+            }
         logger.info(f"Artículo insertado en DB correctamente en {time.time() - start:.2f}s")
 
         total_duration = time.time() - total_start
@@ -143,6 +263,7 @@ async def create_article_from_link(link: str, request: Request):
             "success": True,
             "article_id": str(article.id),
             "duration_seconds": round(total_duration, 2),
+            "llm": llm_report,
             "message": "✅ Artículo creado correctamente desde el enlace."
         }
 
@@ -156,112 +277,73 @@ async def create_article_from_link(link: str, request: Request):
         )
 
 
-@router.post("/process_all_sheets_links/")
-async def process_all_article_links(request: Request):
+@router.post("/process_all_sheets_links/", status_code=202)
+async def process_all_article_links(
+    request: Request,
+    fetch_concurrency: int = Query(PIPELINE_FETCH_CONCURRENCY, ge=1, le=32, description="Téléchargements HTML en parallèle"),
+    llm_concurrency: int = Query(PIPELINE_LLM_CONCURRENCY, ge=1, le=8, description="Articles envoyés au LLM en parallèle"),
+    refresh: bool = Query(False, description="Revalider les liens déjà en DB (GET conditionnel) et retraiter les pages modifiées")
+):
     """
-    Parcourt tous les liens stockés dans app.state.articles_links, nettoie le contenu via
-    MarkdownCleanerAgent et crée les articles dans la DB si ils n'existent pas encore.
-    Ignore et log les doublons.
+    Met en file l'ingestion de tous les liens de app.state.articles_links (job "process_sheet_links")
+    et renvoie immédiatement l'id du job. Le pipeline (fetch, LLM, DB) tourne en arrière-plan ;
+    progression, résultat par lien et résumé final (created / skipped / failed, failed_links)
+    sur GET /jobs/{job_id}.
     """
-    try:
-        markdown_agent: MarkdownCleanerAgent = request.app.state.markdownCleaner_agent
+    return await submit_job(request, "process_sheet_links", {
+        "fetch_concurrency": fetch_concurrency, "llm_concurrency": llm_concurrency, "refresh": refresh
+    })
+
+@router.post("/process_all_sheets_links/stream")
+async def process_all_article_links_stream(
+    request: Request,
+    fetch_concurrency: int = Query(PIPELINE_FETCH_CONCURRENCY, ge=1, le=32, description="Téléchargements HTML en parallèle"),
+    llm_concurrency: int = Query(PIPELINE_LLM_CONCURRENCY, ge=1, le=8, description="Articles envoyés au LLM en parallèle"),
+    refresh: bool = Query(False, description="Revalider les liens déjà en DB (GET conditionnel) et retraiter les pages modifiées")
+):
+    """
+    Variante SSE de /process_all_sheets_links/ : un événement par lien dès qu'il avance
+    (started, puis created / skipped / failed avec les durées fetch_s, llm_s, db_s),
+    et un événement final "done" avec le résumé.
+    """
+    markdown_agent: MarkdownCleanerAgent = request.app.state.markdownCleaner_agent
+    sheet_ready = getattr(request.app.state, "sheet_ready", None)
+
+    async def run(on_event):
+        if sheet_ready is not None:
+            await sheet_ready.wait()
         article_links = getattr(request.app.state, "articles_links", [])
         if not article_links:
-            logging.info("❌ Aucun lien trouvé dans app.state.articles_links.")
-            return {"success": False, "message": "❌ Aucun lien trouvé dans app.state.articles_links."}
-
-        created_articles = []
-        skipped_links = []
-
-        for link in article_links:
-            # Vérifier si l'article existe déjà dans MongoDB
-            existing = await request.app.state.db["IA"].find_one({"lien": link})
-            if existing:
-                skipped_links.append(link)
-                logging.info(f"Lien déjà présent en DB, ignoré: {link}")
-                continue
-
-            # Récupération HTML
-            clean_html = await get_article_html(link)
-            if not clean_html:
-                logging.warning(f"Impossible d'extraire HTML: {link}")
-                continue
-
-            # Conversion HTML → Markdown
-            markdown_text = await html_to_markdown(clean_html)
-            if not markdown_text.strip():
-                logging.warning(f"Markdown vide après conversion: {link}")
-                continue
-
-            # Nettoyage batch + génération JSON
-            try:
-                cleaned_text = await markdown_agent.clean_markdown_in_batches(markdown_text, link)
-                cleaned_article = await markdown_agent.generate_json_from_cleaned_text(cleaned_text, link)
-            except Exception as e:
-                logging.warning(f"Échec nettoyage ou génération JSON pour {link}: {e}")
-                continue
-
-            # Création article en DB
-            try:
-                article = await create_article_in_db(cleaned_article)
-                created_articles.append(str(article.id))
-                logging.info(f"Article créé avec succès: {link}")
-            except Exception as e:
-                logging.warning(f"Erreur insertion DB pour {link}: {e}")
-                continue
-
+            raise ValueError("Aucun lien trouvé dans app.state.articles_links.")
+        start = time.time()
+        summary = await process_links_pipeline(
+            article_links,
+            markdown_agent,
+            fetch_concurrency=fetch_concurrency,
+            llm_concurrency=llm_concurrency,
+            fetcher=request.app.state.http_fetcher,
+            fetch_cache=request.app.state.fetch_cache,
+            vector_store=getattr(request.app.state, "vector_store", None),
+            refresh=refresh,
+            on_event=on_event
+        )
         return {
-            "success": True,
-            "created_articles": created_articles,
-            "skipped_links": skipped_links,
-            "total_links_processed": len(article_links)
+            "total_links_processed": len(article_links),
+            "created": len(summary["created_articles"]),
+            "skipped": len(summary["skipped_links"]),
+            "failed": len(summary["failed_links"]),
+            "elapsed_s": round(time.time() - start, 2)
         }
 
-    except Exception as e:
-        logging.exception(f"💥 Erreur inattendue lors du traitement des liens:\n{str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"💥 Erreur inattendue lors du traitement des liens:\n{str(e)}"
-        )
+    return sse_response(run)
 
-@router.post("/vectorize_articles")
+@router.post("/vectorize_articles", status_code=202)
 async def vectorize_all_articles(request: Request):
     """
-    Récupère tous les articles de MongoDB et les ajoute dans l'index FAISS.
-    Ignore ceux déjà présents.
+    Met en file l'ajout des embeddings des articles absents de l'index FAISS (job "vectorize_articles").
+    Progression sur GET /jobs/{job_id}.
     """
-    try:
-        faiss_index = request.app.state.faiss_index
-        article_ids = request.app.state.article_ids  # set des IDs déjà indexés
-
-        # Récupérer tous les articles
-        articles = await Article.find_all().to_list()
-        logging.info(f"Found {len(articles)} articles in MongoDB")
-
-        new_articles = []
-        vectors_to_add = []
-        ids_to_add = []
-
-        for art in articles:
-            str_id = str(art.id)
-            if str_id not in article_ids:
-                vector = np.array(art.embedding if hasattr(art, "embedding") else [0.0]*128, dtype='float32')
-                vectors_to_add.append(vector)
-                ids_to_add.append(str_id)
-                new_articles.append(art)
-
-        if vectors_to_add:
-            faiss_index.add(np.array(vectors_to_add, dtype='float32'))
-            article_ids.update(ids_to_add)
-            logging.info(f"Added {len(new_articles)} new articles to FAISS index")
-        else:
-            logging.info("No new articles to add to FAISS index")
-
-        return {"added": len(new_articles), "total_in_index": len(article_ids)}
-
-    except Exception as e:
-        logging.exception("Error vectorizing articles")
-        raise HTTPException(status_code=500, detail=f"Error vectorizing articles: {e}")
+    return await submit_job(request, "vectorize_articles", {})
 
 # --------------------- PUT -------------------------------------------------------------------------------------
 # ---------------------
@@ -296,6 +378,7 @@ async def update_article(
             article.processed = processed
 
         await article.save()
+        get_search_index().upsert(article)
         return {"message": "✅ Artículo actualizado correctamente.", "id": str(article.id)}
 
     except HTTPException:
@@ -352,6 +435,7 @@ async def update_metadata(
 # ---------------------
 @router.delete("/bulk-delete")
 async def bulk_delete_articles(
+    request: Request,
     processed: Optional[bool] = None,
     older_than: Optional[datetime] = None,
     language: Optional[str] = None
@@ -368,7 +452,13 @@ async def bulk_delete_articles(
         if older_than:
             query["date_added"] = {"$lt": older_than}
 
+        # IDs ciblés, pour retirer aussi leurs vecteurs de FAISS
+        deleted_ids = [str(a.id) async for a in Article.find(query).project(ArticleIdView)]
         result = await Article.find(query).delete()
+        search_index = get_search_index()
+        search_index.remove(deleted_ids)
+        search_index.schedule_rebuild()
+        await remove_article_vectors(request, deleted_ids)
         duration = round(time.time() - start_time, 2)
         print(f"[DURACIÓN] /bulk-delete {query}: {duration}s")
         return {"deleted_count": result.deleted_count, "filters": query}
@@ -380,7 +470,7 @@ async def bulk_delete_articles(
 # 🔹 ELIMINAR UN ARTÍCULO
 # ---------------------
 @router.delete("/delete/{article_id}")
-async def delete_article(article_id: str):
+async def delete_article(article_id: str, request: Request):
     """
     Elimina un artículo de la base de datos por su ID.
     """
@@ -393,6 +483,10 @@ async def delete_article(article_id: str):
             raise HTTPException(status_code=404, detail="⚠️ El artículo no existe o ya fue eliminado.")
 
         await article.delete()
+        search_index = get_search_index()
+        search_index.remove([str(article_id)])
+        search_index.schedule_rebuild()
+        await remove_article_vectors(request, [str(article_id)])
         return {"message": "🗑️ Artículo eliminado exitosamente.", "id": str(article_id)}
 
     except HTTPException:
@@ -1,240 +1,107 @@
-from fastapi import APIRouter, Request, Query, HTTPException
+from fastapi import APIRouter, Request, Query, HTTPException, Body
 from datetime import datetime
 from app.models import Article, SocialPost
 from typing import List, Dict, Any
-import logging
-from app.agents import RAGAgent
+import logging, time
+from app.agents import RAGAgent, get_rag_agent, get_marketing_agent, get_ready_vector_store
 from beanie import PydanticObjectId
 from fastapi import APIRouter, Request, HTTPException
 from app.models import Article
 import numpy as np
-from sentence_transformers import SentenceTransformer  # ou ton modèle d'embeddings
+from app.utils.ia import generate_posts_for_unprocessed
+from app.utils.faiss_index import FAISS_INDEX_MODES
+from app.utils.sse import sse_response
+from app.routes.jobs import submit_job
+from app.config import POSTS_CONCURRENCY
 
-embed_model = SentenceTransformer("all-MiniLM-L6-v2")  # exemple de modèle
 logger = logging.getLogger("social_posts")
 router = APIRouter()
 
-@router.post("/vectorize_articles")
+@router.post("/vectorize_articles", status_code=202)
 async def vectorize_all_articles(request: Request):
     """
-    Récupère tous les articles de MongoDB et les ajoute dans l'index FAISS.
-    Ignore ceux déjà présents. Renvoie toujours une réponse même en cas d'erreur.
+    Met en file l'ajout des embeddings des articles absents de l'index FAISS (job "vectorize_articles")
+    et renvoie l'id du job ; progression sur GET /jobs/{job_id}.
     """
-    try:
-        faiss_index = request.app.state.faiss_index
-        article_ids = request.app.state.article_ids  # set des IDs déjà indexés
-
-        # Récupérer tous les articles
-        articles = await Article.find_all().to_list()
-        logging.info(f"Found {len(articles)} articles in MongoDB")
-
-        new_articles = []
-        vectors_to_add = []
-        ids_to_add = []
-
-        for art in articles:
-            str_id = str(art.id)
-            if str_id not in article_ids:
-                vector = np.array(art.embedding if hasattr(art, "embedding") else [0.0]*128, dtype='float32')
-                vectors_to_add.append(vector)
-                ids_to_add.append(str_id)
-                new_articles.append(art)
-
-        if vectors_to_add:
-            faiss_index.add(np.array(vectors_to_add, dtype='float32'))
-            article_ids.update(ids_to_add)
-            logging.info(f"Added {len(new_articles)} new articles to FAISS index")
-        else:
-            logging.info("No new articles to add to FAISS index")
-
-        return {"added": len(new_articles), "total_in_index": len(article_ids), "status": "success"}
+    return await submit_job(request, "vectorize_articles", {})
 
-    except Exception as e:
-        logging.exception("Error vectorizing articles")
-        # On renvoie l’erreur dans le JSON au lieu de lever une exception
-        return {"added": 0, "total_in_index": len(request.app.state.article_ids), "status": "error", "detail": str(e)}
+@router.post("/vector_index/rebuild")
+async def rebuild_vector_index(
+    request: Request,
+    mode: str = Query(default="auto", description="Mode de l'index : auto, flat, hnsw ou ivfpq")
+):
+    """
+    Reconstruit l'index FAISS dans le mode demandé, en tâche de fond.
+    Les requêtes /ask continuent sur l'index courant jusqu'à la bascule.
+    """
+    vector_store = await get_ready_vector_store(request)
+    if mode not in ("auto", *FAISS_INDEX_MODES):
+        raise HTTPException(status_code=400, detail=f"Mode inconnu : {mode}")
+    vector_store.mode = mode
+    scheduled = vector_store.schedule_rebuild()
+    return {
+        "scheduled": scheduled,
+        "target_mode": vector_store.desired_mode(),
+        "stats": vector_store.stats()
+    }
 
-@router.post("/generate_social_posts/")
+@router.post("/generate_social_posts/", status_code=202)
 async def generate_social_posts(
     request: Request,
-    count: int = Query(default=1, ge=1, le=10, description="Nombre de posts à générer par article (1–10)")
+    count: int = Query(default=1, ge=1, le=10, description="Nombre de posts à générer par article (1–10)"),
+    concurrency: int = Query(default=POSTS_CONCURRENCY, ge=1, le=8, description="Articles générés en parallèle")
 ):
     """
-    Génère des posts sociaux pour les articles non traités (processed=False).
-    Utilise la traduction espagnole de chaque article.
-    Marque processed=True uniquement si tous les posts sont générés correctement.
+    Met en file la génération des posts sociaux des articles non traités (job "generate_social_posts")
+    et renvoie l'id du job. Un article n'est marqué processed=True que si tous ses posts sont générés ;
+    résultat par article et résumé sur GET /jobs/{job_id}.
     """
+    logger.info(f"📋 Génération des posts sociaux mise en file : count={count}, concurrency={concurrency}")
+    return await submit_job(request, "generate_social_posts", {"count": count, "concurrency": concurrency})
 
-    # Vérification basique du contexte applicatif
-    if not hasattr(request.app.state, "marketing_agent"):
-        logger.error("🚫 Aucun agent de marketing détecté dans l'application FastAPI.")
-        raise HTTPException(
-            status_code=500,
-            detail="Agent de marketing non initialisé dans l'application. Vérifiez request.app.state.marketing_agent."
-        )
-
-    marketing_agent = request.app.state.marketing_agent
-    logger.info("🔎 Démarrage génération des posts sociaux...")
-    logger.info(f"Paramètres reçus : count={count}")
+@router.post("/generate_social_posts/stream")
+async def generate_social_posts_stream(
+    request: Request,
+    count: int = Query(default=1, ge=1, le=10, description="Nombre de posts à générer par article (1–10)"),
+    concurrency: int = Query(default=POSTS_CONCURRENCY, ge=1, le=8, description="Articles générés en parallèle")
+):
+    """
+    Variante SSE de /generate_social_posts/ : un événement "started" puis "success" ou "failed"
+    (avec la durée de génération) par article, et un événement final "done" avec le résumé.
+    """
+    marketing_agent = await get_marketing_agent(request)
 
-    try:
-        unprocessed_articles = await Article.find(Article.processed == False).to_list()
-    except Exception as e:
-        logger.exception("💥 Erreur lors de la récupération des articles non traités.")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la lecture de la base de données : {e}"
-        )
-
-    if not unprocessed_articles:
-        logger.warning("⚠️ Aucun article non traité trouvé dans la base.")
+    async def run(on_event):
+        start = time.time()
+        outcome = await generate_posts_for_unprocessed(marketing_agent, count, on_event=on_event, concurrency=concurrency)
         return {
-            "success": False,
-            "message": "Aucun article non traité trouvé.",
-            "hint": "Ajoutez ou réinitialisez des articles avec processed=False pour les traiter."
+            "total": outcome["total"],
+            "processed": len(outcome["results"]),
+            "errors": len(outcome["errors"]),
+            "elapsed_s": round(time.time() - start, 2)
         }
 
-    total_articles = len(unprocessed_articles)
-    logger.info(f"📚 {total_articles} article(s) à traiter.")
-
-    results = []
-    errors = []
-
-    for i, article in enumerate(unprocessed_articles, start=1):
-        logger.info(f"\n——— [{i}/{total_articles}] Traitement de : {article.name} ——–")
-        success = False
-
-        try:
-            # Vérification des champs essentiels
-            if not article.translation:
-                msg = f"Aucune traduction espagnole trouvée pour l'article ({article.link})."
-                logger.warning(f"🚫 {msg}")
-                errors.append({
-                    "article_id": str(article.id),
-                    "error": msg,
-                    "suggestion": "Assurez-vous que la clé 'translation' contient du texte espagnol."
-                })
-                continue
-
-            if not isinstance(article.translation, str) or len(article.translation.strip()) < 30:
-                msg = f"Contenu traduit vide ou trop court pour l'article ({article.link})."
-                logger.warning(f"🚫 {msg}")
-                errors.append({
-                    "article_id": str(article.id),
-                    "error": msg,
-                    "suggestion": "Vérifiez que la traduction de l'article est bien complète."
-                })
-                continue
-
-            # Génération via agent
-            logger.info(f"🤖 Génération des posts via Ollama pour {article.link} ...")
-            try:
-                posts = await marketing_agent.generate_for_article(article.translation, article.link)
-            except Exception as e:
-                raise RuntimeError(f"Erreur lors de la génération par l'agent : {e}")
-
-            if not posts or not isinstance(posts, list):
-                raise ValueError(f"Aucun post valide généré pour {article.link}.")
-
-            posts = posts[:count]
-            formatted_posts = []
-
-            for post in posts:
-                # Validation structurelle de chaque post
-                if not isinstance(post, dict):
-                    raise ValueError(f"Structure inattendue pour un post : {post}")
-                if not all(k in post for k in ("title", "text", "tags")):
-                    raise ValueError(f"Post mal formé : {post}")
-
-                formatted_posts.append({
-                    "title": post.get("title", "Sin título"),
-                    "text": post.get("text", "").strip(),
-                    "tags": post.get("tags", [])
-                })
-
-            # Vérification du résultat final
-            if not formatted_posts:
-                raise ValueError(f"Aucun post utilisable généré pour {article.link}.")
-
-            # Mise à jour DB
-            article.articles = formatted_posts
-            article.processed = True
-            article.date_added = datetime.now()
-            await article.save()
-            success = True
-
-            results.append({
-                "article_id": str(article.id),
-                "posts_generated": len(formatted_posts),
-                "link": article.link,
-                "status": "success"
-            })
-
-            logger.info(f"✅ {len(formatted_posts)} posts générés et sauvegardés pour {article.name}")
-
-        except Exception as e:
-            logger.exception(f"💥 Erreur avec {article.link} → {e}")
-            errors.append({
-                "article_id": str(article.id),
-                "error": str(e),
-                "suggestion": "Consultez les logs du serveur pour plus de détails sur l'exception."
-            })
-
-        if not success:
-            logger.info(f"⚠️ Article {article.name} non traité complètement, processed reste False.")
-
-    logger.info(f"🏁 Terminé : {len(results)} articles mis à jour, {len(errors)} erreurs détectées.")
-
-    # Réponse enrichie et explicite
-    return {
-        "success": True if results else False,
-        "message": f"Traitement terminé : {len(results)} article(s) mis à jour, {len(errors)} erreur(s).",
-        "summary": {
-            "articles_traites": len(results),
-            "articles_en_erreur": len(errors),
-            "total_initial": total_articles
-        },
-        "details_succes": results,
-        "details_erreurs": errors,
-        "suggestions": [
-            "Vérifiez que chaque article contient une clé 'translation' non vide.",
-            "Assurez-vous que l'agent marketing (Ollama / LLM) est bien initialisé et fonctionnel.",
-            "Consultez les logs pour identifier les articles ignorés ou les erreurs de génération."
-        ]
-    }
+    return sse_response(run)
 
 @router.post("/ask")
 async def ask_knowledge(request: Request, question: str):
     """
     Pose une question à la base de connaissances vectorielle FAISS.
-    Retourne les articles les plus proches et une réponse générée.
+    Retourne les articles les plus proches, une réponse générée et les latences par étape.
     """
     try:
         logging.info("[/ask] Received question: %s", question)
 
         # Accès aux ressources du serveur
-        faiss_index = request.app.state.faiss_index
-        rag_agent = request.app.state.rag_agent
-        article_ids = list(request.app.state.article_ids)  # IDs déjà dans FAISS
+        vector_store = await get_ready_vector_store(request)
+        rag_agent = await get_rag_agent(request)
 
-        if not article_ids:
+        if not len(vector_store):
             logging.warning("[/ask] No articles in FAISS yet.")
             return {"question": question, "answer": "No articles indexed yet.", "articles": []}
 
-        # Crée le vecteur de la question via l'agent RAG
-        q_vector = np.array([rag_agent.markdown_agent.embed_text(question)], dtype='float32')
-
-        # Recherche des k voisins les plus proches
-        D, I = faiss_index.search(q_vector, rag_agent.top_k)
-        logging.info("[/ask] FAISS returned %d nearest neighbors", len(I[0]))
-
-        # Récupérer les IDs correspondants
-        closest_ids = [article_ids[i] for i in I[0] if i < len(article_ids)]
-        logging.info("[/ask] Closest article IDs: %s", closest_ids)
-
-        # Obtenir les contenus via l'agent RAG
-        result = await rag_agent.answer_question_by_ids(question, closest_ids)
-        logging.info("[/ask] Returning answer to client")
+        result = await rag_agent.answer_question(question, vector_store)
+        logging.info("[/ask] Returning answer to client (%s)", result["timings"])
 
         return result
 
@@ -243,3 +110,29 @@ async def ask_knowledge(request: Request, question: str):
         raise HTTPException(status_code=500, detail=f"Error in RAG query: {e}")
 
 
+@router.post("/ask_batch")
+async def ask_knowledge_batch(
+    request: Request,
+    questions: List[str] = Body(..., embed=True, min_length=1, max_length=200),
+    generate: bool = Query(default=False, description="Générer aussi une réponse LLM par question")
+):
+    """
+    Pose plusieurs questions en une fois : un seul encodage batché et une seule
+    recherche FAISS matricielle. Pensé pour les dashboards qui envoient des questions prédéfinies.
+    """
+    try:
+        logging.info("[/ask_batch] Received %d questions", len(questions))
+        vector_store = await get_ready_vector_store(request)
+        rag_agent = await get_rag_agent(request)
+
+        if not len(vector_store):
+            logging.warning("[/ask_batch] No articles in FAISS yet.")
+            return {"results": [{"question": q, "answer": "No articles indexed yet.", "articles": []} for q in questions]}
+
+        result = await rag_agent.answer_questions(questions, vector_store, generate=generate)
+        logging.info("[/ask_batch] Returning %d answers (%s)", len(questions), result["timings"])
+        return result
+
+    except Exception as e:
+        logging.error("[/ask_batch] Error during RAG batch query: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error in RAG batch query: {e}")
@@ -0,0 +1,111 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from beanie import PydanticObjectId
+from typing import Optional
+from app.models import Job, JobItem
+from app.config import PIPELINE_FETCH_CONCURRENCY, PIPELINE_LLM_CONCURRENCY, POSTS_CONCURRENCY
+import logging
+
+router = APIRouter()
+
+
+def get_job_manager(request: Request):
+    job_manager = getattr(request.app.state, "job_manager", None)
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Gestionnaire de jobs non initialisé.")
+    return job_manager
+
+def job_overview(job: Job) -> dict:
+    """Résumé d'un job sans la liste de ses éléments."""
+    done = job.succeeded + job.skipped + job.failed
+    return {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "params": job.params,
+        "progress": {
+            "done": done,
+            "total": job.total,
+            "succeeded": job.succeeded,
+            "skipped": job.skipped,
+            "failed": job.failed,
+            "percent": round(100 * done / job.total, 1) if job.total else None
+        },
+        "summary": job.summary,
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+async def submit_job(request: Request, kind: str, params: dict) -> dict:
+    """Met un job en file et renvoie son id ; la progression se suit sur GET /jobs/{job_id}."""
+    job = await get_job_manager(request).submit(kind, params)
+    return {"job_id": str(job.id), "kind": kind, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+# --------------------- POST : mise en file ---------------------------------------------------------------------
+
+@router.post("/process_sheet_links", status_code=202)
+async def enqueue_process_sheet_links(
+    request: Request,
+    fetch_concurrency: int = Query(PIPELINE_FETCH_CONCURRENCY, ge=1, le=32),
+    llm_concurrency: int = Query(PIPELINE_LLM_CONCURRENCY, ge=1, le=8),
+    refresh: bool = Query(False)
+):
+    """Met en file l'ingestion des liens Google Sheets (comme POST /collections/process_all_sheets_links/)."""
+    return await submit_job(request, "process_sheet_links", {
+        "fetch_concurrency": fetch_concurrency, "llm_concurrency": llm_concurrency, "refresh": refresh
+    })
+
+@router.post("/generate_social_posts", status_code=202)
+async def enqueue_generate_social_posts(
+    request: Request,
+    count: int = Query(default=1, ge=1, le=10, description="Nombre de posts à générer par article (1–10)"),
+    concurrency: int = Query(default=POSTS_CONCURRENCY, ge=1, le=8, description="Articles générés en parallèle")
+):
+    """Met en file la génération des posts sociaux (comme POST /ia/generate_social_posts/)."""
+    return await submit_job(request, "generate_social_posts", {"count": count, "concurrency": concurrency})
+
+@router.post("/vectorize_articles", status_code=202)
+async def enqueue_vectorize_articles(request: Request):
+    """Met en file la vectorisation des nouveaux articles (comme POST /ia/vectorize_articles)."""
+    return await submit_job(request, "vectorize_articles", {})
+
+# --------------------- GET : suivi -----------------------------------------------------------------------------
+
+@router.get("/")
+async def list_jobs(
+    status: Optional[str] = Query(None, description="queued, running, completed, failed ou cancelled"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Derniers jobs, du plus récent au plus ancien."""
+    query = Job.find(Job.status == status) if status else Job.find_all()
+    jobs = await query.sort(-Job.created_at).limit(limit).to_list()
+    return [job_overview(job) for job in jobs]
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: PydanticObjectId,
+    offset: int = Query(0, ge=0, description="Premier élément renvoyé"),
+    limit: int = Query(100, ge=1, le=1000, description="Nombre d'éléments renvoyés")
+):
+    """Progression d'un job et résultats par élément (paginés)."""
+    job = await Job.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable.")
+    items = JobItem.find(JobItem.job_id == job_id)
+    page = await items.sort("+_id").skip(offset).limit(limit).to_list()
+    return {
+        **job_overview(job),
+        "items": [item.model_dump(exclude={"id", "job_id", "revision_id"}) for item in page],
+        "items_total": await items.count()
+    }
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(request: Request, job_id: PydanticObjectId):
+    """Annule un job en file ou en cours ; les éléments déjà traités restent enregistrés."""
+    job = await get_job_manager(request).cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job introuvable.")
+    logging.info(f"🛑 Annulation demandée pour le job {job_id}")
+    return {"job_id": str(job.id), "status": job.status, "cancel_requested": True}
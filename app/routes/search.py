@@ -0,0 +1,122 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.agents import RAGAgent, get_rag_agent, get_ready_vector_store
+from app.utils.search import (
+    get_ready_search_index, parse_keywords, hydrate_hits, reciprocal_rank_fusion, HybridResultCache
+)
+from app.config import HYBRID_CANDIDATES, HYBRID_RRF_K
+import asyncio, logging, time
+
+router = APIRouter()
+
+
+async def compute_hybrid_window(request: Request, q: str, groups, match: str, candidates: int, rrf_k: int, weights: dict) -> dict:
+    """
+    Lance BM25 et FAISS en parallèle (chacun sur son thread), puis fusionne les deux classements par RRF.
+    Si une source échoue (modèle ou index indisponible), la fenêtre est construite avec l'autre.
+    """
+
+    async def lexical():
+        start = time.perf_counter()
+        search_index = await get_ready_search_index()
+        total, hits = await asyncio.to_thread(search_index.search, groups, match, candidates, 0)
+        return {"hits": hits, "total": total, "ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def vector():
+        start = time.perf_counter()
+        vector_store = await get_ready_vector_store(request)
+        rag_agent = await get_rag_agent(request)
+        hits, timings = (await rag_agent.retrieve(q, vector_store, k=candidates)) if len(vector_store) else ([], {})
+        return {"hits": hits, "total": len(hits), "ms": round((time.perf_counter() - start) * 1000, 2), **timings}
+
+    outcomes = dict(zip(("lexical", "vector"), await asyncio.gather(lexical(), vector(), return_exceptions=True)))
+    sources, rankings, details = {}, {}, {}
+    for name, outcome in outcomes.items():
+        if isinstance(outcome, Exception):
+            logging.warning(f"⚠️ Recherche hybride : source {name} indisponible ({outcome})")
+            sources[name] = {"error": str(outcome)}
+            continue
+        hits = outcome.pop("hits")
+        sources[name] = outcome
+        rankings[name] = [article_id for article_id, _ in hits]
+        details[name] = dict(hits)
+    if not rankings:
+        raise RuntimeError("; ".join(f"{name}: {info['error']}" for name, info in sources.items()))
+
+    fused = reciprocal_rank_fusion(rankings, k=rrf_k, weights=weights)
+    for entry in fused:
+        if entry["id"] in details.get("lexical", {}):
+            entry["lexical_score"] = round(details["lexical"][entry["id"]], 4)
+        if entry["id"] in details.get("vector", {}):
+            entry["vector_distance"] = round(details["vector"][entry["id"]], 4)
+    return {"results": fused, "sources": sources}
+
+# --------------------- GET -------------------------------------------------------------------------------------
+
+@router.get("/hybrid")
+async def hybrid_search(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Texte de la recherche (mots-clés ou question)"),
+    match: str = Query("any", description="Côté BM25 : 'any' (au moins un mot) ou 'all' (tous les mots)"),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, description="Résultats à sauter dans la fenêtre fusionnée"),
+    candidates: int = Query(HYBRID_CANDIDATES, ge=10, le=500, description="Documents retrouvés par chaque source avant fusion"),
+    rrf_k: int = Query(HYBRID_RRF_K, ge=1, le=1000),
+    lexical_weight: float = Query(1.0, ge=0.0, le=10.0),
+    vector_weight: float = Query(1.0, ge=0.0, le=10.0)
+):
+    """
+    Recherche hybride : BM25 (index plein texte) et FAISS (embeddings) interrogés en parallèle,
+    classements fusionnés par Reciprocal Rank Fusion, seule la page demandée est chargée depuis Mongo ($in).
+    La fenêtre fusionnée est mise en cache par requête : les pages suivantes ne relancent aucune recherche.
+    """
+    total_start = time.perf_counter()
+    if match not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="match doit valoir 'any' ou 'all'.")
+    groups = parse_keywords(query=q)
+
+    cache: HybridResultCache = request.app.state.hybrid_cache
+    search_index = getattr(request.app.state, "search_index", None)
+    vector_store = getattr(request.app.state, "vector_store", None)
+    key = (
+        RAGAgent.normalize_query(q), match, candidates, rrf_k, lexical_weight, vector_weight,
+        search_index.version if search_index is not None else None,
+        vector_store.version if vector_store is not None else None
+    )
+    window = cache.get(key)
+    cached = window is not None
+    try:
+        if window is None:
+            window = await compute_hybrid_window(
+                request, q, groups, match, candidates, rrf_k,
+                {"lexical": lexical_weight, "vector": vector_weight}
+            )
+            # Fenêtre dégradée (une source en erreur) : non mise en cache
+            if not any("error" in info for info in window["sources"].values()):
+                cache.put(key, window)
+
+        start = time.perf_counter()
+        page = window["results"][offset:offset + limit]
+        articles = await hydrate_hits([(entry["id"], entry["score"]) for entry in page], groups)
+        ranks = {entry["id"]: entry for entry in page}
+        for article in articles:
+            entry = ranks[article["_id"]]
+            article["score"] = round(entry["score"], 6)
+            for field in ("lexical_rank", "lexical_score", "vector_rank", "vector_distance"):
+                article[field] = entry.get(field)
+        hydrate_ms = round((time.perf_counter() - start) * 1000, 2)
+    except Exception as e:
+        logging.error(f"[/search/hybrid] Erreur : {e}")
+        raise HTTPException(status_code=500, detail=f"Erreur de recherche hybride : {e}")
+
+    total = len(window["results"])
+    return {
+        "query": q,
+        "count": len(articles),
+        "total": total,
+        "offset": offset,
+        "next_offset": offset + limit if offset + limit < total else None,
+        "cached": cached,
+        "sources": window["sources"],
+        "timings": {"hydrate_ms": hydrate_ms, "total_ms": round((time.perf_counter() - total_start) * 1000, 2)},
+        "articles": articles
+    }
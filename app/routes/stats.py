@@ -1,6 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from app.models import Article
-import time
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from app.utils.json_repair import parse_stats
+from app.utils.fingerprint import dedup_stats
+from app.utils.pagination import sort_spec
+from app.database import summarize_plan
+from app.models import Article, Job, JobItem
+from app.config import POSTS_WRITE_BATCH
+import asyncio, time
 
 router = APIRouter()
 
@@ -65,7 +71,259 @@ async def oldest_unprocessed(limit: int = 10):
     Retorna los artículos no procesados más antiguos.
     """
     try:
-        articles = await Article.find({"processed": False}).sort("created_at", 1).limit(limit).to_list()
+        articles = await Article.find({"processed": False}).sort("date_added", 1).limit(limit).to_list()
         return {"oldest_unprocessed": articles}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener antiguos no procesados: {e}")
+
+# ---------------------
+# 🔹 Caché de respuestas LLM
+# ---------------------
+
+@router.get("/llm-cache")
+async def llm_cache_stats(request: Request):
+    """
+    Hits, misses, evicciones y tamaño del caché en disco de respuestas LLM.
+    """
+    llm_client = getattr(request.app.state, "llm_client", None)
+    if llm_client is None or llm_client.cache is None:
+        return {"enabled": False}
+    try:
+        stats = await asyncio.to_thread(llm_client.cache.stats)
+        return {"enabled": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al leer el caché LLM: {e}")
+
+@router.delete("/llm-cache")
+async def llm_cache_clear(request: Request):
+    """
+    Vacía el caché de respuestas LLM.
+    """
+    llm_client = getattr(request.app.state, "llm_client", None)
+    if llm_client is None or llm_client.cache is None:
+        return {"enabled": False}
+    await asyncio.to_thread(llm_client.cache.clear)
+    return {"enabled": True, "cleared": True}
+
+@router.get("/llm-json")
+async def llm_json_stats():
+    """
+    Respuestas JSON del LLM por origen: parseadas directamente, reparadas o fallidas.
+    """
+    return parse_stats()
+
+@router.get("/cleaning")
+async def cleaning_stats(request: Request):
+    """
+    Limpieza de artículos: cuántos pasaron por la llamada única (merged) o por segmentos,
+    y llamadas LLM / tokens (estimados) ahorrados por la ruta fusionada.
+    """
+    agent = getattr(request.app.state, "markdownCleaner_agent", None)
+    if agent is None:
+        raise HTTPException(status_code=503, detail="MarkdownCleanerAgent no inicializado.")
+    modes = ("merged", "segmented", "merged_fallback")
+    articles = sum(agent.stats[mode] for mode in modes)
+    return {
+        "articles": articles,
+        "merged_max_tokens": agent.merged_max_tokens,
+        "num_ctx": agent.llm_client.num_ctx,
+        **{key: agent.stats[key] for key in (*modes, "llm_calls", "llm_calls_saved", "tokens_saved")},
+        "tokens_saved_per_article": round(agent.stats["tokens_saved"] / articles) if articles else 0
+    }
+
+# ---------------------
+# 🔹 Caché de páginas descargadas
+# ---------------------
+
+@router.get("/fetch-cache")
+async def fetch_cache_stats(request: Request):
+    """
+    Páginas en caché, revalidaciones sin cambios y evicciones.
+    """
+    fetch_cache = getattr(request.app.state, "fetch_cache", None)
+    if fetch_cache is None:
+        return {"enabled": False}
+    try:
+        stats = await asyncio.to_thread(fetch_cache.stats)
+        return {"enabled": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al leer el caché de páginas: {e}")
+
+# ---------------------
+# 🔹 Índice vectorial FAISS
+# ---------------------
+
+@router.get("/vector-index")
+async def vector_index_stats(request: Request, measure_recall: bool = False, k: int = 10):
+    """
+    Modo del índice FAISS (flat / hnsw / ivfpq), latencias p50/p95 y recall@k opcional.
+    """
+    vector_store = getattr(request.app.state, "vector_store", None)
+    if vector_store is None:
+        raise HTTPException(status_code=503, detail="Índice vectorial no inicializado.")
+    try:
+        if measure_recall:
+            await asyncio.to_thread(vector_store.measure_recall, k)
+        return vector_store.stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al leer el índice vectorial: {e}")
+
+# ---------------------
+# 🔹 Índice de búsqueda de texto (BM25)
+# ---------------------
+
+@router.get("/search-index")
+async def search_index_stats(request: Request, rebuild: bool = False):
+    """
+    Tamaño del índice invertido (documentos, términos, postings), documentos muertos
+    pendientes de compactación, latencias p50/p95 y caché de /search/hybrid.
+    rebuild=true fuerza una reconstrucción.
+    """
+    search_index = getattr(request.app.state, "search_index", None)
+    if search_index is None:
+        raise HTTPException(status_code=503, detail="Índice de búsqueda no inicializado.")
+    scheduled = search_index.schedule_rebuild(force=True) if rebuild else False
+    hybrid_cache = getattr(request.app.state, "hybrid_cache", None)
+    return {
+        **search_index.stats(),
+        "rebuild_scheduled": scheduled,
+        "hybrid_cache": hybrid_cache.stats() if hybrid_cache else None
+    }
+
+# ---------------------
+# 🔹 Servicio de embeddings
+# ---------------------
+
+@router.get("/embeddings")
+async def embeddings_stats(request: Request):
+    """
+    Métricas del micro-batching de embeddings y del caché de preguntas.
+    """
+    rag_agent = getattr(request.app.state, "rag_agent", None)
+    if rag_agent is None:
+        raise HTTPException(status_code=503, detail="RAGAgent no inicializado.")
+    return {
+        "model": {"name": rag_agent.model_name, "loaded": rag_agent.model is not None, "load_seconds": rag_agent.load_seconds},
+        "microbatching": rag_agent.embedding_service.stats(),
+        "query_cache": rag_agent.query_cache_stats()
+    }
+
+# ---------------------
+# 🔹 Deduplicación por huella de contenido
+# ---------------------
+
+@router.get("/dedup")
+async def dedup_statistics():
+    """
+    Comprobaciones de duplicados antes del LLM: candidatos LSH examinados,
+    duplicados exactos (SHA-256) y casi duplicados (MinHash) detectados.
+    """
+    return dedup_stats()
+
+# ---------------------
+# 🔹 Índices Mongo y planes de consulta
+# ---------------------
+
+async def route_queries() -> list:
+    """Consultas representativas de cada ruta, con valores reales de la colección cuando existen."""
+    sample = await Article.get_pymongo_collection().find_one(
+        {}, {"link": 1, "content_hash": 1, "source_hash": 1, "lsh_buckets": 1}
+    ) or {}
+    sample_job = await Job.get_pymongo_collection().find_one({}, {"_id": 1}, sort=[("created_at", -1)]) or {}
+    return [
+        {"route": "POST /collections/add/ (duplicado por enlace)", "model": Article,
+         "filter": {"link": sample.get("link", "https://example.com")}, "limit": 1},
+        {"route": "create_article_in_db (duplicado por contenido)", "model": Article,
+         "filter": {"content_hash": sample.get("content_hash") or "0" * 64}, "limit": 1},
+        {"route": "find_duplicate (SHA-256 + buckets LSH, antes del LLM)", "model": Article,
+         "filter": {"$or": [
+             {"source_hash": sample.get("source_hash") or "0" * 64},
+             {"lsh_buckets": {"$in": sample.get("lsh_buckets") or ["0:0"]}}
+         ]}, "limit": 50},
+        {"route": "POST /ia/generate_social_posts/ (no procesados)", "model": Article,
+         "filter": {"processed": False}, "sort": [("_id", 1)], "limit": POSTS_WRITE_BATCH},
+        {"route": "GET /stats/overview (procesados)", "model": Article, "filter": {"processed": True}},
+        {"route": "GET /stats/oldest-unprocessed", "model": Article,
+         "filter": {"processed": False}, "sort": [("date_added", 1)], "limit": 10},
+        {"route": "GET /collections/recent", "model": Article, "filter": {}, "sort": [("date_added", -1)], "limit": 10},
+        {"route": "GET /collections/all?sort=-date_added", "model": Article,
+         "filter": {}, "sort": sort_spec("-date_added"), "limit": 50},
+        {"route": "GET /jobs/?status=running", "model": Job,
+         "filter": {"status": "running"}, "sort": [("created_at", -1)], "limit": 20},
+        {"route": "JobManager.start (reanudación)", "model": Job,
+         "filter": {"status": {"$in": ["queued", "running"]}}, "sort": [("created_at", 1)]},
+        {"route": "GET /jobs/{job_id} (elementos paginados)", "model": JobItem,
+         "filter": {"job_id": sample_job.get("_id")}, "sort": [("_id", 1)], "limit": 100},
+    ]
+
+@router.get("/indexes")
+async def indexes_report(request: Request, explain: bool = True):
+    """
+    Estado de los índices declarados en los modelos (exists / created / failed al arrancar),
+    índices presentes en Mongo y, con explain=true, el plan de consulta de cada ruta:
+    índice usado, COLLSCAN, ordenación en memoria y documentos examinados.
+    """
+    try:
+        body = {"declared": getattr(request.app.state, "indexes", {}), "existing": {}}
+        for model in (Article, Job, JobItem):
+            info = await model.get_pymongo_collection().index_information()
+            body["existing"][model.Settings.name] = {name: spec["key"] for name, spec in info.items()}
+        if explain:
+            plans = []
+            for query in await route_queries():
+                cursor = query["model"].get_pymongo_collection().find(query["filter"])
+                if query.get("sort"):
+                    cursor = cursor.sort(query["sort"])
+                if query.get("limit"):
+                    cursor = cursor.limit(query["limit"])
+                plan = summarize_plan(await cursor.explain())
+                plans.append({"route": query["route"], "filter": query["filter"], **plan})
+            body["query_plans"] = plans
+            body["collection_scans"] = [p["route"] for p in plans if p["collection_scan"]]
+        return body
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al leer los índices: {e}")
+
+# ---------------------
+# 🔹 Estado de arranque (readiness)
+# ---------------------
+
+@router.get("/ready")
+async def readiness(request: Request):
+    """
+    Qué componentes ya están cargados. Devuelve 503 mientras el precalentamiento
+    (modelo de embeddings, índice FAISS, índice de búsqueda) no haya terminado.
+    Google Sheets se informa aparte en "optional": un fallo de conexión no bloquea el servicio.
+    """
+    state = request.app.state
+    rag_agent = getattr(state, "rag_agent", None)
+    markdown_agent = getattr(state, "markdownCleaner_agent", None)
+    marketing_agent = getattr(state, "marketing_agent", None)
+    sheet_ready = getattr(state, "sheet_ready", None)
+    search_index = getattr(state, "search_index", None)
+    components = {
+        "llm_client": getattr(state, "llm_client", None) is not None,
+        "http_fetcher": getattr(state, "http_fetcher", None) is not None,
+        "database": getattr(state, "db", None) is not None,
+        "markdown_cleaner_agent": bool(markdown_agent and markdown_agent.ready),
+        "marketing_agent": bool(marketing_agent and marketing_agent.ready),
+        "embedding_model": bool(rag_agent and rag_agent.ready),
+        "vector_store": getattr(state, "vector_store", None) is not None,
+        "search_index": search_index is not None and search_index.built_at is not None,
+    }
+    optional = {
+        "google_sheet": getattr(state, "sheet", None) is not None,
+    }
+    startup = getattr(state, "startup", {})
+    warming = sheet_ready is None or not sheet_ready.is_set() or startup.get("warm_after_s") is None
+    body = {
+        "ready": all(components.values()),
+        "warming_up": warming,
+        "components": components,
+        "optional": optional,
+        "serving_after_s": startup.get("serving_after_s"),
+        "warm_after_s": startup.get("warm_after_s"),
+        "embedding_model_load_s": rag_agent.load_seconds if rag_agent else None,
+        "errors": startup.get("errors", {})
+    }
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
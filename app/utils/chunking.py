@@ -0,0 +1,138 @@
+# app/utils/chunking.py
+import math, re
+from typing import Iterable, List
+from app.config import CHUNK_TOKEN_BUDGET, CHUNK_OVERLAP_TOKENS, CHARS_PER_TOKEN
+
+# Début de bloc Markdown : titre, élément de liste, citation, bloc de code
+_MD_BLOCK_START = re.compile(r"^(#{1,6}\s|\s*[-*+]\s|\s*\d+[.)]\s|>|```)")
+_MD_HEADING = re.compile(r"^#{1,6}\s")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimation rapide du nombre de tokens (≈ CHARS_PER_TOKEN caractères par token).
+    Suffisant pour dimensionner les prompts sans charger de tokenizer.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def split_markdown_blocks(markdown_text: str) -> List[str]:
+    """
+    Découpe le Markdown en blocs logiques : paragraphes (séparés par une ligne vide),
+    titres et éléments de liste. Les blocs de code ``` restent entiers.
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    in_code = False
+
+    def flush():
+        if current:
+            block = "\n".join(current).strip("\n")
+            if block.strip():
+                blocks.append(block)
+            current.clear()
+
+    for line in markdown_text.splitlines():
+        if line.lstrip().startswith("```"):
+            if not in_code:
+                flush()
+            current.append(line)
+            in_code = not in_code
+            if not in_code:
+                flush()
+            continue
+        if in_code:
+            current.append(line)
+            continue
+        if not line.strip():
+            flush()
+            continue
+        if _MD_BLOCK_START.match(line):
+            flush()
+        current.append(line)
+        if _MD_HEADING.match(line):
+            flush()
+    flush()
+    return blocks
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Découpe un bloc trop long sur les fins de phrase, puis sur les espaces en dernier recours."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(block):
+        if len(sentence) > max_chars:
+            # Phrase interminable : coupe sur les mots
+            for word in sentence.split(" "):
+                if current and len(current) + len(word) + 1 > max_chars:
+                    pieces.append(current)
+                    current = ""
+                current = f"{current} {word}" if current else word
+            continue
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_blocks(
+    blocks: Iterable[str],
+    max_tokens: int = CHUNK_TOKEN_BUDGET,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    separator: str = "\n\n",
+    is_heading=lambda block: bool(_MD_HEADING.match(block))
+) -> List[str]:
+    """
+    Regroupe des blocs consécutifs en chunks d'au plus `max_tokens` tokens.
+    - Un bloc n'est jamais coupé, sauf s'il dépasse seul le budget.
+    - Un titre n'est jamais laissé seul en fin de chunk : il part avec sa section.
+    - `overlap_tokens` > 0 répète les derniers blocs du chunk précédent en tête du suivant.
+    """
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    sep_tokens = estimate_tokens(separator)
+
+    for block in blocks:
+        parts = [block] if estimate_tokens(block) <= max_tokens else _split_oversized(block, max_tokens)
+        for part in parts:
+            part_tokens = estimate_tokens(part)
+            only_headings = all(is_heading(b) for b in current)
+            if current and not only_headings and current_tokens + sep_tokens + part_tokens > max_tokens:
+                # Reporter les titres orphelins au chunk suivant
+                carried: List[str] = []
+                while current and is_heading(current[-1]) and len(current) > 1:
+                    carried.insert(0, current.pop())
+                chunks.append(current)
+
+                overlap: List[str] = []
+                if overlap_tokens > 0:
+                    budget = overlap_tokens
+                    for prev in reversed(current):
+                        cost = estimate_tokens(prev) + sep_tokens
+                        if cost > budget:
+                            break
+                        overlap.insert(0, prev)
+                        budget -= cost
+                current = overlap + carried
+                current_tokens = sum(estimate_tokens(b) + sep_tokens for b in current)
+            current.append(part)
+            current_tokens += part_tokens + sep_tokens
+
+    if current:
+        chunks.append(current)
+    return [separator.join(chunk) for chunk in chunks]
+
+
+def chunk_markdown(
+    markdown_text: str,
+    max_tokens: int = CHUNK_TOKEN_BUDGET,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS
+) -> List[str]:
+    """Découpe un texte Markdown en chunks respectant la structure (titres, paragraphes, listes)."""
+    return chunk_blocks(split_markdown_blocks(markdown_text), max_tokens, overlap_tokens)
@@ -0,0 +1,122 @@
+# app/utils/embedding_service.py
+import asyncio, logging, time
+from concurrent.futures import Executor
+from typing import Callable, List, Optional
+import numpy as np
+from app.config import EMBED_MICROBATCH_MAX_TEXTS, EMBED_MICROBATCH_MAX_WAIT_MS
+
+logging.basicConfig(level=logging.INFO)
+
+
+class EmbeddingService:
+    """
+    Service d'embeddings in-process avec micro-batching :
+    les demandes concurrentes (/ask, vectorisation, dédoublonnage…) sont placées
+    dans une file asyncio, regroupées en micro-batchs (taille max ou délai max atteint),
+    encodées en un seul appel sur le thread dédié, puis chaque appelant reçoit
+    ses propres lignes via une future.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        executor: Executor,
+        max_batch_texts: int = EMBED_MICROBATCH_MAX_TEXTS,
+        max_wait_ms: float = EMBED_MICROBATCH_MAX_WAIT_MS
+    ):
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.max_batch_texts = max_batch_texts
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Métriques
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.encode_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Encode des textes ; l'appel est fusionné avec les demandes concurrentes."""
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        first = await self._queue.get()
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_texts:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            # Les appelants annulés entre-temps sont ignorés
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                continue
+            all_texts = [t for texts, _, _ in batch for t in texts]
+            now = time.perf_counter()
+            start = now
+            try:
+                vectors = await loop.run_in_executor(self.executor, self.encode_fn, all_texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.encode_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += len(all_texts)
+
+            offset = 0
+            for texts, future, queued_at in batch:
+                self.queue_wait_seconds += now - queued_at
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "avg_texts_per_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "encode_seconds": round(self.encode_seconds, 3),
+            "texts_per_second": round(self.texts / self.encode_seconds, 1) if self.encode_seconds else 0.0,
+            "avg_queue_wait_ms": round(self.queue_wait_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+            "max_batch_texts": self.max_batch_texts,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
@@ -0,0 +1,70 @@
+# app/utils/extraction.py
+import logging
+from typing import Iterator
+from bs4 import BeautifulSoup, Tag
+from markdownify import MarkdownConverter
+
+# Parser le plus rapide disponible : lxml (C) sinon html.parser (pur Python)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Balises de contenu conservées ; un bloc retenu n'est pas re-parcouru (pas de doublons)
+CONTENT_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "li", "strong", "em"}
+SKIPPED_TAGS = {"script", "style", "noscript"}
+
+_md_converter = MarkdownConverter(heading_style="ATX", autolinks=True)
+
+
+def _is_content_div(tag: Tag) -> bool:
+    classes = tag.get("class") or []
+    return any("content" in c.lower() for c in classes)
+
+
+def iter_content_blocks(soup: BeautifulSoup) -> Iterator[Tag]:
+    """
+    Parcourt le DOM une seule fois et produit les blocs de contenu autorisés,
+    limités aux divs 'content' les plus externes (ou au body à défaut).
+    """
+    roots = []
+    stack = [soup]
+    while stack:
+        node = stack.pop()
+        for child in reversed(node.contents):
+            if not isinstance(child, Tag) or child.name in SKIPPED_TAGS:
+                continue
+            if child.name == "div" and _is_content_div(child):
+                roots.append(child)
+            else:
+                stack.append(child)
+    if not roots:
+        logging.warning("⚠️ Aucun div 'content' trouvé, utilisation du body")
+        roots = [soup.body or soup]
+
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        if node.name in CONTENT_TAGS:
+            # Le bloc est émis avec ses enfants : on ne descend pas plus bas
+            yield node
+            continue
+        stack.extend(
+            child for child in reversed(node.contents)
+            if isinstance(child, Tag) and child.name not in SKIPPED_TAGS
+        )
+
+
+def extract_markdown(html: str) -> str:
+    """
+    Extraction en une passe : un seul parse du DOM, blocs de contenu convertis
+    directement en Markdown, assemblage par join (pas de concaténation quadratique).
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    parts = []
+    for block in iter_content_blocks(soup):
+        md = _md_converter.convert_soup(block).strip()
+        if md:
+            parts.append(md)
+    return "\n\n".join(parts)
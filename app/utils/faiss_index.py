@@ -0,0 +1,352 @@
+# app/utils/faiss_index.py
+# Index FAISS (fabrique + FaissStore) sans effet de bord à l'import (utilisé par app.database et scripts/bench_faiss.py)
+import asyncio, hashlib, json, logging, math, os, threading, time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import faiss
+import numpy as np
+from app.config import (
+    FAISS_INDEX_MODE, FAISS_ANN_THRESHOLD, FAISS_IVF_MIN_VECTORS, FAISS_IVF_TRAIN_PER_LIST,
+    FAISS_IVF_NPROBE, FAISS_HNSW_M, FAISS_HNSW_EF_CONSTRUCTION, FAISS_HNSW_EF_SEARCH
+)
+
+FAISS_INDEX_MODES = ("flat", "hnsw", "ivfpq")
+FAISS_INDEX_PATH = "./faiss_index.index"
+
+
+def choose_index_mode(n_vectors: int, mode: str = FAISS_INDEX_MODE) -> str:
+    """Mode effectif : le mode configuré, ou en 'auto' flat/IVF-PQ selon la taille du corpus."""
+    if mode == "auto":
+        mode = "ivfpq" if n_vectors >= FAISS_ANN_THRESHOLD else "flat"
+    if mode == "ivfpq" and n_vectors < FAISS_IVF_MIN_VECTORS:
+        logging.warning(f"⚠️ {n_vectors} vecteurs : trop peu pour entraîner IVF-PQ, index flat utilisé")
+        return "flat"
+    if mode not in FAISS_INDEX_MODES:
+        raise ValueError(f"Mode d'index FAISS inconnu : {mode}")
+    return mode
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Plus grand nombre de sous-quantifieurs PQ divisant dim (≥ 4 dimensions chacun)."""
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1):
+        if dim % m == 0 and dim // m >= 4:
+            return m
+    return 1
+
+
+def build_faiss_index(mode: str, dim: int, train_vectors: Optional[np.ndarray] = None):
+    """
+    Fabrique d'index FAISS :
+    - flat  : recherche exacte (IndexFlatL2)
+    - hnsw  : graphe HNSW (IndexHNSWFlat), sans entraînement
+    - ivfpq : IVF + Product Quantization, entraîné sur un échantillon de train_vectors
+    """
+    if mode == "flat":
+        return faiss.IndexFlatL2(dim)
+    if mode == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, FAISS_HNSW_M)
+        index.hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+        return index
+    if mode == "ivfpq":
+        if train_vectors is None or not len(train_vectors):
+            raise ValueError("IVF-PQ nécessite des vecteurs d'entraînement")
+        n = len(train_vectors)
+        nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), 8)
+        sample_size = min(n, nlist * FAISS_IVF_TRAIN_PER_LIST)
+        sample = train_vectors[np.random.default_rng(0).choice(n, sample_size, replace=False)]
+        logging.info(f"🏋️ Entraînement IVF-PQ : nlist={nlist}, échantillon={sample_size}")
+        index.train(np.ascontiguousarray(sample, dtype="float32"))
+        index.nprobe = min(FAISS_IVF_NPROBE, nlist)
+        return index
+    raise ValueError(f"Mode d'index FAISS inconnu : {mode}")
+
+
+def article_vector_id(article_id: str) -> int:
+    """
+    Identifiant FAISS stable (int64 positif) dérivé de l'ObjectId de l'article.
+    Indépendant de l'ordre d'insertion : survit aux redémarrages et aux suppressions.
+    """
+    digest = hashlib.blake2b(str(article_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+class FaissStore:
+    """
+    Index FAISS dont chaque vecteur porte l'identifiant stable de son article,
+    avec la table inverse id FAISS → id Mongo.
+    - `flat` (IndexIDMap2 + IndexFlatL2) est la source de vérité : ajouts, suppressions,
+      reconstruction et vérité terrain pour le rappel. Lui seul est persisté
+      (fichier temporaire + os.replace) et rechargé au démarrage.
+    - `ann` (HNSW / IVF-PQ) sert les requêtes quand le corpus le justifie ; il est
+      reconstruit en arrière-plan pendant que les requêtes continuent sur l'index courant.
+    """
+
+    def __init__(self, dim: int, path: str = FAISS_INDEX_PATH, mode: str = FAISS_INDEX_MODE):
+        self.dim = dim
+        self.path = path
+        self.ids_path = f"{path}.ids.json"
+        self.mode = mode
+        self._lock = threading.RLock()
+        self.flat = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        self.ann = None
+        self.active_mode = "flat"
+        self.id_map: Dict[int, str] = {}
+        # Suppressions non appliquées à l'index ANN (HNSW ne supporte pas remove_ids ; IVF-PQ les applique)
+        self.tombstones: set = set()
+        # Vecteurs remplacés dont l'ancienne copie reste dans l'index ANN (HNSW), jusqu'à la reconstruction
+        self.replaced: set = set()
+        # Mutations survenues pendant une reconstruction, rejouées avant la bascule
+        self._journal: Optional[list] = None
+        self.rebuilding = False
+        self._rebuild_task: Optional[asyncio.Task] = None
+        # Incrémentée à chaque mutation : invalide les fenêtres de la recherche hybride
+        self.version = 0
+        self._latencies = deque(maxlen=2000)
+        self.last_recall: Optional[dict] = None
+
+    def __len__(self) -> int:
+        return len(self.id_map)
+
+    def contains(self, article_id: str) -> bool:
+        return article_vector_id(article_id) in self.id_map
+
+    # ---------- Mutations ----------
+    def add(self, article_ids: List[str], vectors: np.ndarray):
+        """Ajoute (ou remplace) les vecteurs des articles donnés."""
+        vector_ids = np.array([article_vector_id(a) for a in article_ids], dtype="int64")
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        with self._lock:
+            existing = np.array([v for v in vector_ids if v in self.id_map], dtype="int64")
+            if len(existing):
+                self.flat.remove_ids(existing)
+                if self.ann is not None:
+                    self._ann_discard(self.ann, existing, self.replaced)
+                if self._journal is not None:
+                    self._journal.append(("replace", existing, None))
+            self.flat.add_with_ids(vectors, vector_ids)
+            for vid, article_id in zip(vector_ids.tolist(), article_ids):
+                self.id_map[vid] = str(article_id)
+                if vid in self.tombstones:
+                    # Supprimé puis ré-ajouté : l'ancienne copie est toujours dans l'index ANN
+                    self.tombstones.discard(vid)
+                    self.replaced.add(vid)
+            if self.ann is not None:
+                self.ann.add_with_ids(vectors, vector_ids)
+            self.version += 1
+            if self._journal is not None:
+                self._journal.append(("add", vector_ids, vectors))
+
+    def remove(self, article_ids: List[str]) -> int:
+        """Retire les vecteurs des articles supprimés. Retourne le nombre retiré."""
+        vector_ids = [article_vector_id(a) for a in article_ids]
+        with self._lock:
+            vector_ids = np.array([v for v in vector_ids if v in self.id_map], dtype="int64")
+            if not len(vector_ids):
+                return 0
+            self.flat.remove_ids(vector_ids)
+            for vid in vector_ids.tolist():
+                self.id_map.pop(vid, None)
+                self.replaced.discard(vid)
+            if self.ann is not None:
+                self._ann_remove(self.ann, vector_ids, self.tombstones)
+            self.version += 1
+            if self._journal is not None:
+                self._journal.append(("remove", vector_ids, None))
+        return len(vector_ids)
+
+    @staticmethod
+    def _ann_remove(ann, vector_ids: np.ndarray, tombstones: set):
+        try:
+            ann.remove_ids(vector_ids)
+        except RuntimeError:
+            tombstones.update(vector_ids.tolist())
+
+    @staticmethod
+    def _ann_discard(ann, vector_ids: np.ndarray, replaced: set):
+        """Retire l'ancienne copie des vecteurs remplacés ; sinon (HNSW) la signale pour la recherche."""
+        try:
+            ann.remove_ids(vector_ids)
+        except RuntimeError:
+            replaced.update(vector_ids.tolist())
+
+    # ---------- Recherche ----------
+    def search(self, vectors: np.ndarray, k: int, record: bool = True) -> List[List[Tuple[str, float]]]:
+        """Recherche k-NN ; retourne, pour chaque requête, une liste (article_id, distance)."""
+        start = time.perf_counter()
+        with self._lock:
+            if not self.id_map:
+                return [[] for _ in range(len(vectors))]
+            index = self.ann if self.ann is not None else self.flat
+            vectors = np.ascontiguousarray(vectors, dtype="float32")
+            # Marge pour compenser les tombstones / doublons filtrés
+            extra = min(len(self.tombstones) + len(self.replaced), k) if self.ann is not None else 0
+            D, I = index.search(vectors, k + extra)
+            results = []
+            for query, row_ids, row_dist in zip(vectors, I, D):
+                hits, seen, resort = [], set(), False
+                for vid, dist in zip(row_ids.tolist(), row_dist.tolist()):
+                    if vid in seen or vid in self.tombstones or vid not in self.id_map:
+                        continue
+                    seen.add(vid)
+                    if vid in self.replaced:
+                        # L'index ANN peut renvoyer l'ancienne copie : distance exacte depuis flat
+                        dist = float(np.sum((query - self.flat.reconstruct(vid)) ** 2))
+                        resort = True
+                    hits.append((self.id_map[vid], float(dist)))
+                if resort:
+                    hits.sort(key=lambda hit: hit[1])
+                results.append(hits[:k])
+        if record:
+            self._latencies.append((time.perf_counter() - start) * 1000 / max(1, len(vectors)))
+        return results
+
+    # ---------- Reconstruction ANN ----------
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        n = self.flat.ntotal
+        vectors = self.flat.index.reconstruct_n(0, n) if n else np.zeros((0, self.dim), dtype="float32")
+        ids = faiss.vector_to_array(self.flat.id_map).copy()
+        return vectors, ids
+
+    def desired_mode(self) -> str:
+        return choose_index_mode(len(self), self.mode)
+
+    def rebuild(self, mode: Optional[str] = None):
+        """
+        Reconstruit l'index de service dans le mode demandé (ou le mode désiré).
+        Construction hors verrou : les requêtes continuent sur l'index courant,
+        puis les mutations journalisées sont rejouées et l'index est basculé.
+        """
+        with self._lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+            target = choose_index_mode(len(self), mode or self.mode)
+            vectors, ids = self._snapshot()
+            self._journal = []
+        try:
+            start = time.time()
+            ann = None
+            if target != "flat":
+                ann = build_faiss_index(target, self.dim, vectors)
+                if target == "hnsw":
+                    # HNSW n'accepte pas d'ids. IVF les gère nativement : sous IndexIDMap, son remove_ids
+                    # compacterait id_map sans renuméroter les listes inversées (résultats décalés)
+                    ann = faiss.IndexIDMap(ann)
+                ann.add_with_ids(vectors, ids)
+            with self._lock:
+                tombstones: set = set()
+                replaced: set = set()
+                for op, vector_ids, op_vectors in self._journal:
+                    if ann is None:
+                        continue
+                    if op == "add":
+                        ann.add_with_ids(op_vectors, vector_ids)
+                        readded = tombstones.intersection(vector_ids.tolist())
+                        tombstones.difference_update(readded)
+                        replaced.update(readded)
+                    elif op == "replace":
+                        self._ann_discard(ann, vector_ids, replaced)
+                    else:
+                        self._ann_remove(ann, vector_ids, tombstones)
+                self.ann = ann
+                self.tombstones = tombstones
+                self.replaced = replaced
+                self.active_mode = target
+                self.version += 1
+                self.last_recall = None
+            logging.info(f"🔁 Index FAISS reconstruit en mode '{target}' ({len(ids)} vecteurs) en {time.time() - start:.2f}s")
+        finally:
+            with self._lock:
+                self._journal = None
+                self.rebuilding = False
+
+    async def arebuild(self, mode: Optional[str] = None):
+        await asyncio.to_thread(self.rebuild, mode)
+
+    def schedule_rebuild(self, mode: Optional[str] = None) -> bool:
+        """Lance une reconstruction en tâche de fond si le mode cible diffère du mode actif."""
+        target = choose_index_mode(len(self), mode or self.mode)
+        if self.rebuilding or (target == self.active_mode and not self.tombstones and not self.replaced):
+            return False
+        self._rebuild_task = asyncio.create_task(self.arebuild(mode))
+        return True
+
+    # ---------- Statistiques ----------
+    def measure_recall(self, k: int = 10, n_queries: int = 100) -> dict:
+        """Rappel@k de l'index de service par rapport à la recherche exacte, sur des vecteurs du corpus bruités."""
+        with self._lock:
+            n = self.flat.ntotal
+            if not n:
+                return {"k": k, "queries": 0, "recall": None}
+            rows = np.random.default_rng().choice(n, min(n, n_queries), replace=False)
+            queries = np.stack([self.flat.index.reconstruct(int(r)) for r in rows])
+        queries = queries + np.random.default_rng().normal(0, 0.01, queries.shape).astype("float32")
+        with self._lock:
+            _, truth = self.flat.search(queries, k)
+        approx = self.search(queries, k, record=False)
+        inv = {article_id: vid for vid, article_id in self.id_map.items()}
+        recalls = []
+        for true_row, hits in zip(truth, approx):
+            expected = {int(v) for v in true_row if v >= 0}
+            found = {inv.get(a) for a, _ in hits}
+            recalls.append(len(expected & found) / max(1, len(expected)))
+        self.last_recall = {"k": k, "queries": len(recalls), "recall": round(float(np.mean(recalls)), 4)}
+        return self.last_recall
+
+    def stats(self) -> dict:
+        latencies = np.array(self._latencies) if self._latencies else None
+        return {
+            "configured_mode": self.mode,
+            "active_mode": self.active_mode,
+            "desired_mode": self.desired_mode(),
+            "vectors": len(self),
+            "version": self.version,
+            "dim": self.dim,
+            "rebuilding": self.rebuilding,
+            "tombstones": len(self.tombstones),
+            "replaced": len(self.replaced),
+            "latency_ms": {
+                "count": int(len(latencies)),
+                "p50": round(float(np.percentile(latencies, 50)), 3),
+                "p95": round(float(np.percentile(latencies, 95)), 3)
+            } if latencies is not None else None,
+            "recall": self.last_recall
+        }
+
+    # ---------- Persistance ----------
+    def save(self):
+        """Écriture atomique de l'index flat (source de vérité) et de la table d'ids."""
+        with self._lock:
+            tmp_index = f"{self.path}.tmp"
+            tmp_ids = f"{self.ids_path}.tmp"
+            faiss.write_index(self.flat, tmp_index)
+            with open(tmp_ids, "w", encoding="utf-8") as f:
+                json.dump({str(k): v for k, v in self.id_map.items()}, f)
+            os.replace(tmp_index, self.path)
+            os.replace(tmp_ids, self.ids_path)
+        logging.info(f"💾 Index FAISS sauvegardé ({len(self)} vecteurs) → {self.path}")
+
+    async def asave(self):
+        await asyncio.to_thread(self.save)
+
+    def load(self) -> bool:
+        """Recharge l'index depuis le disque ; False si absent ou incohérent."""
+        if not (os.path.exists(self.path) and os.path.exists(self.ids_path)):
+            return False
+        index = faiss.read_index(self.path)
+        with open(self.ids_path, "r", encoding="utf-8") as f:
+            id_map = {int(k): v for k, v in json.load(f).items()}
+        if index.d != self.dim:
+            logging.warning(f"⚠️ Index FAISS en dimension {index.d}, modèle en {self.dim} : nouvel index créé")
+            return False
+        if index.ntotal != len(id_map):
+            logging.warning("⚠️ Index FAISS et table d'ids désynchronisés : nouvel index créé")
+            return False
+        with self._lock:
+            self.flat = index
+            self.id_map = id_map
+            self.version += 1
+        return True
@@ -0,0 +1,163 @@
+# app/utils/fetch_cache.py
+import hashlib, logging, os, sqlite3, threading, time
+from typing import Optional
+from app.config import FETCH_CACHE_PATH, FETCH_CACHE_MAX_BYTES, FETCH_CACHE_MAX_ENTRIES
+
+logging.basicConfig(level=logging.INFO)
+
+
+class CachedPage:
+    def __init__(self, url: str, body: bytes, encoding: str, etag: Optional[str], last_modified: Optional[str], body_hash: str):
+        self.url = url
+        self.body = body
+        self.encoding = encoding
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body_hash = body_hash
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+    def conditional_headers(self) -> dict:
+        """En-têtes If-None-Match / If-Modified-Since pour revalider la page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class FetchCache:
+    """
+    Cache disque (SQLite) des pages HTML brutes avec leurs validateurs HTTP
+    (ETag / Last-Modified) et le hash du corps.
+    Éviction LRU par nombre d'entrées et taille totale, tenus en mémoire
+    (pas de COUNT / SUM à chaque écriture).
+    Les méthodes sont synchrones : les appeler via asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        path: str = FETCH_CACHE_PATH,
+        max_bytes: int = FETCH_CACHE_MAX_BYTES,
+        max_entries: int = FETCH_CACHE_MAX_ENTRIES
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.revalidated = 0   # 304 ou corps identique
+        self.changed = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fetch_cache ("
+            " url TEXT PRIMARY KEY,"
+            " body BLOB,"
+            " encoding TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " body_hash TEXT,"
+            " size INTEGER,"
+            " fetched_at REAL,"
+            " last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetch_cache_access ON fetch_cache(last_access)")
+        # Seul scan complet : totaux initiaux, ensuite mis à jour à chaque écriture
+        self._count, self._total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fetch_cache").fetchone()
+        self._conn.commit()
+
+    @staticmethod
+    def hash_body(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, encoding, etag, last_modified, body_hash FROM fetch_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE fetch_cache SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        return CachedPage(url, *row)
+
+    def set(self, url: str, body: bytes, encoding: str, etag: Optional[str], last_modified: Optional[str]) -> str:
+        body_hash = self.hash_body(body)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM fetch_cache WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fetch_cache"
+                " (url, body, encoding, etag, last_modified, body_hash, size, fetched_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, encoding, etag, last_modified, body_hash, len(body), now, now)
+            )
+            if previous is None:
+                self._count += 1
+            self._total += len(body) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+        return body_hash
+
+    def touch(self, url: str):
+        """Page revalidée (304) : on rafraîchit simplement les dates."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE fetch_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+    def _evict(self):
+        """LRU jusqu'à respecter les limites (totaux en mémoire, lecture par lots via l'index last_access)."""
+        while self._count > self.max_entries or self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM fetch_cache ORDER BY last_access ASC LIMIT ?",
+                (max(16, self._count - self.max_entries),)
+            ).fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                if self._count <= self.max_entries and self._total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM fetch_cache WHERE url = ?", (url,))
+                self._count -= 1
+                self._total -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._count, self._total
+        return {
+            "entries": count,
+            "size_bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "unchanged": self.revalidated,
+            "changed": self.changed,
+            "evictions": self.evictions
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --------------------------
+# Cache partagé (singleton)
+# --------------------------
+_fetch_cache: Optional[FetchCache] = None
+
+def get_fetch_cache() -> FetchCache:
+    global _fetch_cache
+    if _fetch_cache is None:
+        _fetch_cache = FetchCache()
+    return _fetch_cache
+
+def close_fetch_cache():
+    global _fetch_cache
+    if _fetch_cache is not None:
+        _fetch_cache.close()
+        _fetch_cache = None
@@ -0,0 +1,175 @@
+# app/utils/fingerprint.py
+import asyncio, hashlib, logging, re, threading, time, zlib
+from collections import Counter
+from typing import List, Optional
+import numpy as np
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
+from app.models import Article, ArticleFingerprintView, ContentFingerprint
+from app.config import (
+    FINGERPRINT_BACKFILL_BATCH, MINHASH_PERMUTATIONS, MINHASH_SHINGLE_WORDS, LSH_BANDS,
+    NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_MAX_CANDIDATES
+)
+from app.utils.search import fold
+
+logging.basicConfig(level=logging.INFO)
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_content(text: Optional[str]) -> str:
+    """Texte comparé pour la déduplication : espaces et retours à la ligne réduits."""
+    return " ".join((text or "").split())
+
+def content_hash(text: Optional[str]) -> str:
+    """Empreinte exacte (SHA-256 hex) du texte nettoyé normalisé."""
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+
+
+# --------------------------
+# MinHash + LSH
+# --------------------------
+def _permutation_params(n: int) -> np.ndarray:
+    """
+    Coefficients (a, b) des permutations, dérivés de SHA-256 et non d'un générateur aléatoire :
+    les signatures stockées en base restent comparables d'une version de numpy à l'autre.
+    """
+    params = np.empty((2, n), dtype="uint64")
+    for i in range(n):
+        digest = hashlib.sha256(f"minhash-{i}".encode()).digest()
+        params[0, i] = int.from_bytes(digest[:8], "little") | 1
+        params[1, i] = int.from_bytes(digest[8:16], "little")
+    return params
+
+_PERMUTATIONS = _permutation_params(MINHASH_PERMUTATIONS)
+_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+def shingles(text: Optional[str], size: int = MINHASH_SHINGLE_WORDS) -> np.ndarray:
+    """Hashs (crc32) des séquences de `size` mots, sans casse ni accents ; un texte court forme un seul shingle."""
+    words = _WORD.findall(fold(text or ""))
+    if not words:
+        return np.zeros(0, dtype="uint64")
+    grams = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype="uint64", count=len(grams))
+
+def minhash_signature(text: Optional[str]) -> List[int]:
+    """Signature MinHash : minimum de (a·x + b) mod 2⁶⁴ sur les shingles, 32 bits de poids fort par permutation."""
+    hashed = shingles(text)
+    if not len(hashed):
+        return []
+    a, b = _PERMUTATIONS
+    with np.errstate(over="ignore"):
+        values = (hashed[None, :] * a[:, None] + b[:, None]) >> np.uint64(32)
+    return values.min(axis=1).astype("uint32").tolist()
+
+def lsh_buckets(signature: Optional[List[int]]) -> List[str]:
+    """Une clé par bande de lignes de la signature : deux textes similaires partagent au moins une bande."""
+    if not signature:
+        return []
+    sig = np.asarray(signature, dtype="uint32")
+    return [
+        f"{band}:{hashlib.blake2b(sig[band * _ROWS:(band + 1) * _ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(LSH_BANDS)
+    ]
+
+def similarity(sig_a: Optional[List[int]], sig_b: Optional[List[int]]) -> float:
+    """Similarité de Jaccard estimée : part des permutations dont les minima coïncident."""
+    if not sig_a or not sig_b or len(sig_a) != len(sig_b):
+        return 0.0
+    return float(np.mean(np.asarray(sig_a) == np.asarray(sig_b)))
+
+def fingerprint_content(text: str) -> ContentFingerprint:
+    """Empreintes d'un texte (CPU-bound → à appeler via asyncio.to_thread pour les longs textes)."""
+    signature = minhash_signature(text)
+    return ContentFingerprint(source_hash=content_hash(text), minhash=signature, lsh_buckets=lsh_buckets(signature))
+
+
+# --------------------------
+# Lookup de doublons
+# --------------------------
+_stats_lock = threading.Lock()
+DEDUP_STATS: Counter = Counter()
+
+def dedup_stats() -> dict:
+    with _stats_lock:
+        stats = dict(DEDUP_STATS)
+    checks = stats.get("checks", 0)
+    duplicates = stats.get("exact", 0) + stats.get("near", 0)
+    stats["duplicate_rate"] = round(duplicates / checks, 3) if checks else 0.0
+    return stats
+
+async def find_duplicate(
+    fingerprint: ContentFingerprint,
+    threshold: float = NEAR_DUPLICATE_THRESHOLD,
+    exclude_id: Optional[PydanticObjectId] = None
+) -> Optional[dict]:
+    """
+    Cherche un doublon exact (source_hash) ou un quasi-doublon (bande LSH commune puis similarité MinHash)
+    en une seule requête indexée. Retourne {"article_id", "link", "kind", "similarity"} ou None.
+    `exclude_id` : article du même lien en cours de rafraîchissement, qui ne doit pas être son propre doublon.
+    """
+    clauses = [{"source_hash": fingerprint.source_hash}]
+    if fingerprint.lsh_buckets:
+        clauses.append({"lsh_buckets": {"$in": fingerprint.lsh_buckets}})
+    query = {"$or": clauses}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    candidates = await Article.find(query).project(ArticleFingerprintView).limit(
+        NEAR_DUPLICATE_MAX_CANDIDATES
+    ).to_list()
+
+    best = None
+    for candidate in candidates:
+        if candidate.source_hash == fingerprint.source_hash:
+            best = {"article_id": str(candidate.id), "link": candidate.link, "kind": "exact", "similarity": 1.0}
+            break
+        score = similarity(fingerprint.minhash, candidate.minhash)
+        if score >= threshold and (best is None or score > best["similarity"]):
+            best = {"article_id": str(candidate.id), "link": candidate.link, "kind": "near", "similarity": round(score, 3)}
+    with _stats_lock:
+        DEDUP_STATS["checks"] += 1
+        DEDUP_STATS["candidates"] += len(candidates)
+        if best is not None:
+            DEDUP_STATS[best["kind"]] += 1
+    return best
+
+
+async def backfill_fingerprints(batch_size: int = FINGERPRINT_BACKFILL_BATCH) -> int:
+    """
+    Calcule content_hash des articles antérieurs à ce champ (lecture projetée, écritures bulk_write).
+    Les signatures MinHash sont toujours calculées sur le Markdown source, qui n'est pas conservé :
+    les anciens articles restent hors du lookup de quasi-doublons jusqu'à leur prochain fetch,
+    et une signature sans source_hash (calculée sur le texte nettoyé) est effacée.
+    Retourne le nombre d'articles mis à jour.
+    """
+    start = time.time()
+    collection = Article.get_pymongo_collection()
+
+    cleared = await collection.update_many(
+        {"source_hash": None, "minhash": {"$ne": None}},
+        {"$set": {"minhash": None, "lsh_buckets": []}}
+    )
+    if cleared.modified_count:
+        logging.info(f"🧬 {cleared.modified_count} signature(s) MinHash sans Markdown source effacée(s)")
+
+    def build_ops(docs: List[dict]) -> List[UpdateOne]:
+        return [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"content_hash": content_hash(doc.get("cleaned_text"))}})
+            for doc in docs
+        ]
+
+    async def flush(docs: List[dict]) -> int:
+        ops = await asyncio.to_thread(build_ops, docs)
+        return (await collection.bulk_write(ops, ordered=False)).modified_count
+
+    updated, batch = 0, []
+    async for doc in collection.find({"content_hash": None}, {"cleaned_text": 1}):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            updated += await flush(batch)
+            batch = []
+    if batch:
+        updated += await flush(batch)
+    if updated:
+        logging.info(f"🧬 content_hash calculé pour {updated} articles en {time.time() - start:.2f}s")
+    return updated
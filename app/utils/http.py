@@ -0,0 +1,186 @@
+# app/utils/http.py
+import asyncio, logging, random, time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from app.config import (
+    HTTP_MAX_CONNECTIONS, HTTP_PER_HOST_CONCURRENCY, HTTP_PER_HOST_MIN_INTERVAL,
+    HTTP_TIMEOUT, HTTP_MAX_RETRIES, HTTP_MAX_RETRY_AFTER, HTTP_MAX_BYTES, HTTP_USER_AGENT
+)
+
+logging.basicConfig(level=logging.INFO)
+
+# HTTP/2 seulement si le paquet h2 est installé (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class FetchFailed(RuntimeError):
+    """Page non récupérable : statut HTTP hors 2xx / 304, ou tentatives épuisées."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FetchResponse:
+    """Réponse HTTP déjà lue (corps décompressé, plafonné à max_bytes)."""
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, content: bytes, encoding: str, http_version: str):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.http_version = http_version
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class _HostLimiter:
+    """Concurrence + intervalle minimal entre deux requêtes vers un même domaine."""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait_turn(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ArticleFetcher:
+    """
+    Client HTTP partagé pour le scraping des articles, pour toute la durée de l'app :
+    - pool de connexions keep-alive (HTTP/2 si disponible)
+    - limite de concurrence et de débit par domaine
+    - retry avec backoff exponentiel sur 5xx / 429 / timeouts (Retry-After plafonné)
+    - taille de réponse plafonnée
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        per_host_concurrency: int = HTTP_PER_HOST_CONCURRENCY,
+        per_host_min_interval: float = HTTP_PER_HOST_MIN_INTERVAL,
+        timeout: float = HTTP_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        max_retry_after: float = HTTP_MAX_RETRY_AFTER,
+        max_bytes: int = HTTP_MAX_BYTES
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_min_interval = per_host_min_interval
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.max_bytes = max_bytes
+        self._hosts: Dict[str, _HostLimiter] = {}
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+            headers={"User-Agent": HTTP_USER_AGENT}
+        )
+
+    def _limiter(self, url: str) -> _HostLimiter:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = _HostLimiter(self.per_host_concurrency, self.per_host_min_interval)
+        return self._hosts[host]
+
+    async def _read_limited(self, response: httpx.Response) -> bytes:
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ResponseTooLarge(f"Réponse trop volumineuse ({declared} octets)")
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ResponseTooLarge(f"Réponse trop volumineuse (> {self.max_bytes} octets)")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> FetchResponse:
+        """
+        GET avec politesse par domaine et retry. Retourne une réponse dont le corps
+        est déjà lu (dans la limite de max_bytes).
+        """
+        limiter = self._limiter(url)
+        last_exception = None
+        last_status = None
+        for attempt in range(1, self.max_retries + 2):
+            async with limiter.semaphore:
+                await limiter.wait_turn()
+                try:
+                    async with self._client.stream("GET", url, headers=headers) as response:
+                        content = await self._read_limited(response)
+                        if response.status_code not in RETRY_STATUS:
+                            return FetchResponse(
+                                url=str(response.url),
+                                status_code=response.status_code,
+                                headers=response.headers,
+                                content=content,
+                                encoding=response.charset_encoding,
+                                http_version=response.http_version
+                            )
+                        last_exception = httpx.HTTPStatusError(
+                            f"HTTP {response.status_code}", request=response.request, response=response
+                        )
+                        last_status = response.status_code
+                        retry_after = response.headers.get("retry-after")
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    last_exception = e
+                    retry_after = None
+
+            if attempt > self.max_retries:
+                break
+            if retry_after and retry_after.isdigit():
+                delay = min(float(retry_after), self.max_retry_after)
+            else:
+                delay = 2 ** (attempt - 1)
+            delay += random.uniform(0, 0.5)
+            logging.warning(f"⚠️ GET {url} échoué ({last_exception}), nouvelle tentative dans {delay:.1f}s")
+            await asyncio.sleep(delay)
+        raise FetchFailed(f"💥 Échec GET {url} après {self.max_retries + 1} tentatives: {last_exception}", last_status)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+# --------------------------
+# Client partagé (singleton)
+# --------------------------
+_fetcher: Optional[ArticleFetcher] = None
+
+def get_article_fetcher() -> ArticleFetcher:
+    """
+    Retourne le client HTTP partagé, créé au premier appel.
+    """
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = ArticleFetcher()
+    return _fetcher
+
+async def close_article_fetcher():
+    global _fetcher
+    if _fetcher is not None:
+        await _fetcher.close()
+        _fetcher = None
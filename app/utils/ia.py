@@ -1,16 +1,21 @@
 # app/services/article_service.py
-import re, json, asyncio, httpx
-from app.models import Article, CleanedArticle
-from app.agents import MarkdownCleanerAgent, MarketingAgent
-from bs4 import BeautifulSoup
-from typing import Optional, List
+import re, json, asyncio, time
+from app.models import Article, CleanedArticle, ArticleTextView, ArticlePostView, ContentFingerprint
+from app.agents import MarkdownCleanerAgent, MarketingAgent, RAGAgent
+from typing import Awaitable, Callable, Collection, Optional, List, Tuple
 from app.models import Article
 from deep_translator import GoogleTranslator
-from langchain.schema import Document
-from langchain_community.document_transformers import MarkdownifyTransformer
 from fastapi import APIRouter, Request, HTTPException, Query
 from app.models import Article
 from datetime import datetime
+from pymongo import UpdateOne
+from app.config import POSTS_CONCURRENCY, POSTS_WRITE_BATCH
+from app.utils.extraction import extract_markdown
+from app.utils.http import ArticleFetcher, FetchFailed, get_article_fetcher
+from app.utils.fetch_cache import FetchCache, CachedPage
+from app.database import FaissStore
+from app.utils.search import get_search_index
+from app.utils.fingerprint import content_hash
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -20,64 +25,105 @@ async def clean_markdown_with_llm(agent: MarkdownCleanerAgent, markdown_text: st
     """Nettoie le Markdown via l'agent MarkdownCleanerAgent."""
     return await agent.clean(markdown_text, link)
 
-async def get_article_html(url: str) -> str:
-    """Récupère le contenu HTML pertinent de l'article."""
+async def get_article_html(
+    url: str,
+    fetcher: Optional[ArticleFetcher] = None,
+    fetch_cache: Optional[FetchCache] = None
+) -> Tuple[str, bool, Optional[CachedPage]]:
+    """
+    Récupère le HTML brut de l'article via le client HTTP partagé (l'extraction est faite par html_to_markdown).
+    Avec un FetchCache, la page est revalidée par GET conditionnel (ETag / Last-Modified).
+    Retourne (html, unchanged, page) : unchanged=True si 304 ou corps identique à la version en cache ;
+    page = nouvelle version à enregistrer via commit_fetched_page une fois l'article ingéré.
+    Lève FetchFailed si le statut n'est ni 2xx ni 304 (page d'erreur jamais traitée comme un article).
+    """
     logging.info(f"🔗 Début récupération HTML pour {url}")
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url)
-        logging.info(f"📥 HTTP GET {url} → status {r.status_code}")
-        html = r.text
-    soup = BeautifulSoup(html, "html.parser")
-    content_divs = soup.find_all("div", class_=lambda x: x and "content" in x.lower())
-    if not content_divs:
-        logging.warning(f"⚠️ Aucun div 'content' trouvé pour {url}, utilisation du body")
-        content_divs = [soup.find("body")]
-    allowed_tags = ["p", "h1", "h2", "h3", "h4", "h5", "li", "strong", "em"]
-    cleaned_html = ""
-    for div in content_divs:
-        for tag in div.find_all(allowed_tags):
-            cleaned_html += str(tag)
-    logging.info(f"✅ HTML nettoyé pour {url}, longueur {len(cleaned_html)} caractères")
-    return cleaned_html
-
-
-async def html_to_markdown(html: str, batch_size: int = 1000) -> str:
-    """Convertit le HTML en Markdown avec un batching fiable."""
-    
-    # Nettoyage initial du HTML pour enlever scripts/styles
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    clean_html = str(soup)
-
-    # Découpage en batches sûrs
-    batches = []
-    start = 0
-    while start < len(clean_html):
-        end = min(start + batch_size, len(clean_html))
-        batches.append(clean_html[start:end])
-        start = end
-
-    # Transformation en Markdown
-    md_transformer = MarkdownifyTransformer()
-    final_md = ""
-    for batch_html in batches:
-        if not batch_html.strip():
-            continue
-        doc = Document(page_content=batch_html)
-        converted_docs = md_transformer.transform_documents([doc])
-        final_md += converted_docs[0].page_content + "\n\n"
+    fetcher = fetcher or get_article_fetcher()
+    cached = await asyncio.to_thread(fetch_cache.get, url) if fetch_cache is not None else None
+
+    r = await fetcher.get(url, headers=cached.conditional_headers() if cached else None)
+    logging.info(f"📥 HTTP GET {url} → status {r.status_code} ({r.http_version}, {len(r.content)} octets)")
+
+    if r.status_code == 304 and cached is not None:
+        await asyncio.to_thread(fetch_cache.touch, url)
+        fetch_cache.revalidated += 1
+        logging.info(f"♻️ Page inchangée (304) pour {url}")
+        return cached.text, True, None
+    if not 200 <= r.status_code < 300:
+        raise FetchFailed(f"HTTP {r.status_code} pour {url}", r.status_code)
+    if fetch_cache is None:
+        return r.text, False, None
+
+    page = CachedPage(
+        url, r.content, r.encoding, r.headers.get("etag"), r.headers.get("last-modified"), FetchCache.hash_body(r.content)
+    )
+    if cached is not None and cached.body_hash == page.body_hash:
+        # Corps déjà ingéré : seuls les validateurs changent, enregistrés tout de suite
+        await commit_fetched_page(fetch_cache, page)
+        fetch_cache.revalidated += 1
+        logging.info(f"♻️ Page inchangée (hash identique) pour {url}")
+        return r.text, True, None
+    fetch_cache.changed += 1
+    return r.text, False, page
+
+async def commit_fetched_page(fetch_cache: Optional[FetchCache], page: Optional[CachedPage]):
+    """
+    Enregistre la page et ses validateurs dans le cache, une fois l'article ingéré :
+    après un échec LLM ou DB, le prochain refresh ne reçoit pas de 304 et retraite la page.
+    """
+    if fetch_cache is None or page is None:
+        return
+    await asyncio.to_thread(fetch_cache.set, page.url, page.body, page.encoding, page.etag, page.last_modified)
 
-    return final_md
 
-async def create_article_in_db(cleaned: CleanedArticle) -> Article:
-    """Crée un Article Beanie à partir d'un CleanedArticle, le traduit en espagnol et l'insère dans la DB."""
+async def html_to_markdown(html: str) -> str:
+    """Convertit le HTML brut en Markdown (CPU-bound → exécuté hors de l'event loop)."""
+    markdown_text = await asyncio.to_thread(extract_markdown, html)
+    logging.info(f"✅ Markdown extrait, longueur {len(markdown_text)} caractères")
+    return markdown_text
+
+async def create_article_in_db(
+    cleaned: CleanedArticle,
+    fingerprint: Optional[ContentFingerprint] = None,
+    vector_store: Optional[FaissStore] = None
+) -> Tuple[Article, bool]:
+    """
+    Crée un Article Beanie à partir d'un CleanedArticle, le traduit en espagnol et l'insère dans la DB.
+    Retourne (article, duplicate) : duplicate=True si un article au texte nettoyé identique existait déjà
+    (il est renvoyé tel quel, sans traduction ni écriture).
+    Si un article existe déjà pour ce lien (page modifiée puis re-téléchargée), il est mis à jour
+    et son vecteur est retiré de `vector_store` : la prochaine vectorisation l'encode à nouveau.
+    `fingerprint` : empreintes du Markdown source calculées avant le LLM. Sans elles, l'article
+    n'a pas de signature (jamais de signature du texte nettoyé, incomparable à celles du Markdown).
+    """
     text = cleaned.text_clean
-    existing = await Article.find_one(Article.cleaned_text == text)
+    text_hash = content_hash(text)
+    # Lookup sur l'index haché content_hash (au lieu de comparer tout le texte)
+    existing = await Article.find_one(Article.content_hash == text_hash)
     if existing:
-        return existing
+        return existing, True
+    signature = fingerprint.model_dump() if fingerprint else {"source_hash": None, "minhash": None, "lsh_buckets": []}
+
+    # Traduction synchrone (requests) → exécutée hors de l'event loop
+    spanish = await asyncio.to_thread(GoogleTranslator(source='auto', target='es').translate, text)
 
-    spanish = GoogleTranslator(source='auto', target='es').translate(text)
+    previous = await Article.find_one(Article.link == cleaned.link)
+    if previous:
+        previous.name = cleaned.name
+        previous.description = cleaned.description
+        previous.cleaned_text = text
+        previous.content_hash = text_hash
+        previous.source_hash = signature["source_hash"]
+        previous.minhash = signature["minhash"]
+        previous.lsh_buckets = signature["lsh_buckets"]
+        previous.translation = spanish
+        previous.processed = False
+        previous.date_added = datetime.now()
+        await previous.save()
+        get_search_index().upsert(previous)
+        if vector_store is not None and vector_store.remove([str(previous.id)]):
+            await vector_store.asave()
+        return previous, False
 
     article = Article(
         name=cleaned.name,
@@ -85,8 +131,201 @@ async def create_article_in_db(cleaned: CleanedArticle) -> Article:
         link=cleaned.link,
         processed=False,
         cleaned_text=text,
-        translation=spanish
+        content_hash=text_hash,
+        translation=spanish,
+        **signature
     )
     await article.insert()
-    return article
+    get_search_index().upsert(article)
+    return article, False
+
+
+def article_embedding_text(article: ArticleTextView) -> str:
+    """Texte encodé pour un article : titre puis texte nettoyé (le modèle tronque la fin)."""
+    return f"{article.name}\n\n{article.cleaned_text}".strip()
+
+async def vectorize_new_articles(
+    vector_store: FaissStore,
+    rag_agent: RAGAgent,
+    on_batch: Optional[Callable[[List[str]], Awaitable[None]]] = None
+) -> int:
+    """
+    Encode le cleaned_text des articles absents de l'index FAISS et les y ajoute.
+    Les articles sont lus en streaming (projection légère) et encodés par batchs
+    sur le thread d'embeddings du RAGAgent. L'index est sauvegardé s'il a changé.
+    `on_batch` reçoit les ids de chaque batch ajouté (suivi de progression).
+    Retourne le nombre de vecteurs ajoutés.
+    """
+    added = 0
+    batch_ids: List[str] = []
+    batch_texts: List[str] = []
+
+    async def flush():
+        nonlocal added
+        vectors = await rag_agent.aembed_texts(batch_texts)
+        vector_store.add(batch_ids, vectors)
+        added += len(batch_ids)
+        logging.info(f"🧮 {len(batch_ids)} article(s) vectorisé(s) ({added} au total)")
+        if on_batch is not None:
+            await on_batch(list(batch_ids))
+        batch_ids.clear()
+        batch_texts.clear()
+
+    async for art in Article.find_all().project(ArticleTextView):
+        str_id = str(art.id)
+        text = article_embedding_text(art)
+        if vector_store.contains(str_id) or not text:
+            continue
+        batch_ids.append(str_id)
+        batch_texts.append(text)
+        if len(batch_texts) >= rag_agent.batch_size:
+            await flush()
+    if batch_texts:
+        await flush()
+    if added:
+        await vector_store.asave()
+        # Bascule éventuelle flat → IVF-PQ quand le corpus dépasse le seuil
+        vector_store.schedule_rebuild()
+    return added
+
+
+def format_social_posts(posts, count: int) -> List[dict]:
+    """Valide la structure des posts renvoyés par l'agent et garde les `count` premiers."""
+    if not posts or not isinstance(posts, list):
+        raise ValueError("Aucun post valide généré.")
+    formatted_posts = []
+    for post in posts[:count]:
+        # Validation structurelle de chaque post
+        if not isinstance(post, dict):
+            raise ValueError(f"Structure inattendue pour un post : {post}")
+        if not all(k in post for k in ("title", "text", "tags")):
+            raise ValueError(f"Post mal formé : {post}")
+        formatted_posts.append({
+            "title": post.get("title", "Sin título"),
+            "text": post.get("text", "").strip(),
+            "tags": post.get("tags", [])
+        })
+    if not formatted_posts:
+        raise ValueError("Aucun post utilisable généré.")
+    return formatted_posts
+
+async def generate_posts_for_article(marketing_agent: MarketingAgent, article: ArticlePostView, count: int) -> List[dict]:
+    """
+    Génère les posts d'un article à partir de sa traduction espagnole (sans écrire en DB).
+    Lève ValueError si la traduction est absente ou inutilisable.
+    """
+    if not isinstance(article.translation, str) or len(article.translation.strip()) < 30:
+        raise ValueError(f"Traduction espagnole absente ou trop courte pour l'article ({article.link}).")
+    try:
+        posts = await marketing_agent.generate_for_article(article.translation, article.link)
+    except Exception as e:
+        raise RuntimeError(f"Erreur lors de la génération par l'agent : {e}")
+    return format_social_posts(posts, count)
+
+async def generate_posts_for_unprocessed(
+    marketing_agent: MarketingAgent,
+    count: int,
+    on_event: Optional[Callable[[dict], Awaitable[None]]] = None,
+    exclude_ids: Collection[str] = (),
+    concurrency: int = POSTS_CONCURRENCY,
+    write_batch: int = POSTS_WRITE_BATCH
+) -> dict:
+    """
+    Génère les posts sociaux de tous les articles non traités (processed=False).
+    - Lecture par pages sur _id (projection translation / link / name) : pas de curseur
+      laissé ouvert pendant les appels LLM, pas de document complet en mémoire
+    - `concurrency` articles générés en parallèle
+    - Écriture par lots : un bulk_write de $set (articles, processed, date_added) toutes les `write_batch` réussites
+    `on_event` reçoit "started" puis "success" (après écriture en DB) ou "failed" pour chaque article.
+    Retourne {"total", "results", "errors"}.
+    """
+    results: List[dict] = []
+    errors: List[dict] = []
+    pending: List[Tuple[ArticlePostView, List[dict], dict]] = []
+    write_lock = asyncio.Lock()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks: List[asyncio.Task] = []
+    total = 0
+
+    async def emit(event: dict):
+        if on_event is not None:
+            await on_event(event)
+
+    def article_event(article: ArticlePostView, status: str, timings: dict, **extra) -> dict:
+        return {"article_id": str(article.id), "name": article.name, "link": article.link,
+                "status": status, "timings": timings, **extra}
+
+    async def flush():
+        async with write_lock:
+            if not pending:
+                return
+            batch = pending[:]
+            pending.clear()
+            now = datetime.now()
+            start = time.time()
+            try:
+                await Article.get_pymongo_collection().bulk_write([
+                    UpdateOne(
+                        {"_id": article.id},
+                        {"$set": {"articles": posts, "processed": True, "date_added": now}}
+                    )
+                    for article, posts, _ in batch
+                ], ordered=False)
+            except Exception as e:
+                logging.warning(f"💥 Échec de l'écriture groupée de {len(batch)} article(s) → {e}")
+                for article, _, timings in batch:
+                    event = article_event(article, "failed", timings, error=f"db: {e}")
+                    errors.append(event)
+                    await emit(event)
+                return
+            write_s = round(time.time() - start, 3)
+            logging.info(f"💾 {len(batch)} article(s) mis à jour en un bulk_write ({write_s}s)")
+            for article, posts, timings in batch:
+                event = article_event(article, "success", {**timings, "write_s": write_s}, posts_generated=len(posts))
+                results.append(event)
+                await emit(event)
+
+    async def process(article: ArticlePostView):
+        try:
+            await emit(article_event(article, "started", {}))
+            start = time.time()
+            try:
+                formatted_posts = await generate_posts_for_article(marketing_agent, article, count)
+            except Exception as e:
+                logging.warning(f"💥 Erreur avec {article.link} → {e}")
+                event = article_event(article, "failed", {"generate_s": round(time.time() - start, 2)}, error=str(e))
+                errors.append(event)
+                await emit(event)
+                return
+            logging.info(f"✅ {len(formatted_posts)} posts générés pour {article.name}")
+            pending.append((article, formatted_posts, {"generate_s": round(time.time() - start, 2)}))
+            if len(pending) >= write_batch:
+                await flush()
+        finally:
+            semaphore.release()
 
+    last_id = None
+    try:
+        while True:
+            query = Article.find(Article.processed == False)
+            if last_id is not None:
+                query = query.find({"_id": {"$gt": last_id}})
+            page = await query.sort("+_id").limit(write_batch).project(ArticlePostView).to_list()
+            if not page:
+                break
+            last_id = page[-1].id
+            for article in page:
+                if str(article.id) in exclude_ids:
+                    continue
+                total += 1
+                # Le sémaphore est pris avant de lancer la tâche : la lecture avance au rythme du LLM
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(process(article)))
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        # Même en cas d'annulation, les posts déjà générés sont enregistrés
+        await flush()
+    return {"total": total, "results": results, "errors": errors}
@@ -0,0 +1,250 @@
+# app/utils/jobs.py
+import asyncio, logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Set
+from beanie import PydanticObjectId
+from fastapi import FastAPI
+from app.models import Article, Job, JobItem
+from app.config import (
+    JOB_WORKERS, PIPELINE_FETCH_CONCURRENCY, PIPELINE_LLM_CONCURRENCY, POSTS_CONCURRENCY
+)
+from app.utils.ia import generate_posts_for_unprocessed, vectorize_new_articles
+from app.utils.pipeline import process_links_pipeline
+
+logging.basicConfig(level=logging.INFO)
+
+JOB_FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobContext:
+    """
+    Ce que voit un handler pendant l'exécution d'un job : l'app, les paramètres,
+    les éléments déjà traités (reprise après redémarrage) et l'enregistrement de la progression.
+    """
+
+    def __init__(self, app: FastAPI, job: Job):
+        self.app = app
+        self.job = job
+        self.done_keys: Set[str] = set()
+
+    async def load_done_keys(self):
+        """Clés des éléments enregistrés par une exécution précédente (reprise après redémarrage)."""
+        keys = await JobItem.get_pymongo_collection().distinct("key", {"job_id": self.job.id})
+        # Jobs antérieurs à la collection JobItems : éléments encore stockés dans le document
+        legacy = await Job.get_pymongo_collection().find_one({"_id": self.job.id, "items": {"$exists": True}}, {"items.key": 1})
+        self.done_keys = set(keys) | {item["key"] for item in (legacy or {}).get("items", [])}
+
+    @property
+    def params(self) -> dict:
+        return self.job.params
+
+    async def set_total(self, total: int):
+        self.job.total = total
+        await Job.find_one(Job.id == self.job.id).update({"$set": {"total": total}})
+
+    async def record(self, key: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        """Enregistre le résultat d'un élément (collection JobItems) et incrémente le compteur du job."""
+        item = JobItem(job_id=self.job.id, key=key, status=status, result=result, error=error)
+        counter = {"success": "succeeded", "skipped": "skipped", "failed": "failed"}[status]
+        setattr(self.job, counter, getattr(self.job, counter) + 1)
+        self.done_keys.add(key)
+        await item.insert()
+        await Job.find_one(Job.id == self.job.id).update({"$inc": {counter: 1}})
+
+
+JobHandler = Callable[[JobContext], Awaitable[Optional[dict]]]
+
+
+class JobManager:
+    """
+    File de jobs persistée dans Mongo (collection Jobs) et exécutée par `workers` tâches.
+    - submit() insère le job puis le met en file ; la réponse HTTP n'attend pas son exécution
+    - cancel() annule un job en file ou en cours (les éléments déjà traités restent enregistrés)
+    - start() reprend les jobs queued / running laissés par un arrêt précédent
+    """
+
+    def __init__(self, app: FastAPI, handlers: Dict[str, JobHandler], workers: int = JOB_WORKERS):
+        self.app = app
+        self.handlers = handlers
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list = []
+        self._running: Dict[PydanticObjectId, asyncio.Task] = {}
+        self._cancelled: Set[PydanticObjectId] = set()
+
+    async def start(self):
+        resumed = 0
+        async for job in Job.find({"status": {"$in": ["queued", "running"]}}).sort(+Job.created_at):
+            self._queue.put_nowait(job.id)
+            resumed += 1
+        if resumed:
+            logging.info(f"🔁 {resumed} job(s) non terminé(s) repris")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, kind: str, params: Optional[dict] = None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Type de job inconnu : {kind}")
+        job = Job(kind=kind, params=params or {})
+        await job.insert()
+        self._queue.put_nowait(job.id)
+        logging.info(f"📋 Job {job.id} ({kind}) mis en file")
+        return job
+
+    async def cancel(self, job_id: PydanticObjectId) -> Optional[Job]:
+        job = await Job.get(job_id)
+        if job is None or job.status in JOB_FINAL_STATUSES:
+            return job
+        await job.set({Job.cancel_requested: True})
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        elif job.status == "queued":
+            await self._finish(job, "cancelled")
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except Exception:
+                # Erreur Mongo (lecture ou mise à jour du job) : le worker continue à vider la file
+                logging.exception(f"💥 Worker de jobs : erreur sur le job {job_id}")
+
+    async def _process(self, job_id: PydanticObjectId):
+        job = await Job.get(job_id)
+        if job is None or job.status in JOB_FINAL_STATUSES:
+            return
+        if job.cancel_requested:
+            await self._finish(job, "cancelled")
+            return
+        task = asyncio.create_task(self._run(job))
+        self._running[job_id] = task
+        try:
+            await task
+        finally:
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    async def _run(self, job: Job):
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await self._finish(job, "failed", error=f"Type de job inconnu : {job.kind}")
+            return
+        await job.set({Job.status: "running", Job.started_at: job.started_at or datetime.now()})
+        logging.info(f"▶️ Job {job.id} ({job.kind}) démarré")
+        try:
+            ctx = JobContext(self.app, job)
+            await ctx.load_done_keys()
+            summary = await handler(ctx)
+        except asyncio.CancelledError:
+            if job.id not in self._cancelled:
+                # Arrêt du serveur : le job reste "running" et sera repris au démarrage
+                raise
+            await self._finish(job, "cancelled")
+            return
+        except Exception as e:
+            logging.exception(f"💥 Job {job.id} ({job.kind}) en échec")
+            await self._finish(job, "failed", error=str(e))
+            return
+        await self._finish(job, "completed", summary=summary)
+
+    async def _finish(self, job: Job, status: str, summary: Optional[dict] = None, error: Optional[str] = None):
+        job.status = status
+        await Job.find_one(Job.id == job.id).update({"$set": {
+            "status": status,
+            "summary": summary,
+            "error": error,
+            "finished_at": datetime.now()
+        }})
+        logging.info(f"🏁 Job {job.id} ({job.kind}) : {status}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# --------------------------
+# Handlers
+# --------------------------
+async def run_process_sheet_links(ctx: JobContext) -> dict:
+    """Ingestion des liens Google Sheets (pipeline fetch → LLM → DB), un élément par lien."""
+    state = ctx.app.state
+    await state.sheet_ready.wait()
+    links = getattr(state, "articles_links", [])
+    await ctx.set_total(len(links))
+    pending = [link for link in links if link not in ctx.done_keys]
+
+    async def on_event(event: dict):
+        if event["status"] == "started":
+            return
+        status = "success" if event["status"] == "created" else event["status"]
+        result = {
+            "article_id": event["article_id"], "timings": event["timings"],
+            "llm": event.get("llm"), "duplicate": event.get("duplicate")
+        }
+        await ctx.record(event["link"], status, result=result, error=event["error"])
+
+    summary = await process_links_pipeline(
+        pending,
+        state.markdownCleaner_agent,
+        fetch_concurrency=ctx.params.get("fetch_concurrency", PIPELINE_FETCH_CONCURRENCY),
+        llm_concurrency=ctx.params.get("llm_concurrency", PIPELINE_LLM_CONCURRENCY),
+        fetcher=state.http_fetcher,
+        fetch_cache=state.fetch_cache,
+        vector_store=getattr(state, "vector_store", None),
+        refresh=ctx.params.get("refresh", False),
+        on_event=on_event
+    )
+    return {
+        "created": len(summary["created_articles"]),
+        "skipped": len(summary["skipped_links"]),
+        "failed": len(summary["failed_links"]),
+        "failed_links": summary["failed_links"],
+        "total_links_processed": len(pending)
+    }
+
+async def run_generate_social_posts(ctx: JobContext) -> dict:
+    """Génération des posts sociaux des articles non traités, un élément par article."""
+    marketing_agent = ctx.app.state.marketing_agent
+    await marketing_agent._ready_event.wait()
+    # Les articles réussis lors d'une exécution précédente ne sont plus processed=False
+    await ctx.set_total(await Article.find(Article.processed == False).count() + ctx.job.succeeded)
+
+    async def on_event(event: dict):
+        if event["status"] == "started":
+            return
+        result = {"link": event["link"], "posts_generated": event.get("posts_generated", 0), "timings": event["timings"]}
+        await ctx.record(event["article_id"], event["status"], result=result, error=event.get("error"))
+
+    outcome = await generate_posts_for_unprocessed(
+        marketing_agent,
+        ctx.params.get("count", 1),
+        on_event=on_event,
+        exclude_ids=set(ctx.done_keys),
+        concurrency=ctx.params.get("concurrency", POSTS_CONCURRENCY)
+    )
+    return {"processed": len(outcome["results"]), "errors": len(outcome["errors"])}
+
+async def run_vectorize_articles(ctx: JobContext) -> dict:
+    """Vectorisation des articles absents de l'index FAISS, un élément par batch."""
+    state = ctx.app.state
+    await state.vector_store_ready.wait()
+    vector_store = getattr(state, "vector_store", None)
+    if vector_store is None:
+        raise RuntimeError("Index vectoriel indisponible (voir /stats/ready).")
+
+    async def on_batch(ids):
+        await ctx.record(ids[0], "success", result={"added": len(ids)})
+
+    added = await vectorize_new_articles(vector_store, state.rag_agent, on_batch=on_batch)
+    await ctx.set_total(ctx.job.succeeded)
+    return {"added": added, "total_in_index": len(vector_store)}
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "process_sheet_links": run_process_sheet_links,
+    "generate_social_posts": run_generate_social_posts,
+    "vectorize_articles": run_vectorize_articles,
+}
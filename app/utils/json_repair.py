@@ -0,0 +1,163 @@
+# app/utils/json_repair.py
+import json, logging, re, threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+logging.basicConfig(level=logging.INFO)
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_BARE_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(text: str) -> str:
+    """
+    Répare en une passe les défauts fréquents des sorties LLM :
+    blocs ``` autour du JSON, texte avant / après, quotes simples, clés sans quotes,
+    True / False / None Python, virgules finales, retours à la ligne dans les chaînes,
+    et sortie tronquée (chaînes et crochets refermés).
+    Ne garantit pas un JSON valide : le résultat est validé par json.loads.
+    """
+    text = _FENCE.sub("", text.strip())
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("Aucun objet ni tableau JSON dans la réponse")
+    i = min(starts)
+
+    out: List[str] = []
+    stack: List[str] = []
+    quote = None      # délimiteur de la chaîne en cours (" ou ')
+    escape = False
+    n = len(text)
+
+    def drop_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+
+    while i < n:
+        c = text[i]
+        if quote is not None:
+            if escape:
+                if c == "'":
+                    out[-1] = "'"   # \' n'est pas un échappement JSON
+                else:
+                    out.append(c)
+                escape = False
+            elif c == "\\":
+                out.append(c)
+                escape = True
+            elif c == quote:
+                out.append('"')
+                quote = None
+            elif c == '"':
+                out.append('\\"')
+            elif c == "\n":
+                out.append("\\n")
+            elif c == "\t":
+                out.append("\\t")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c in "\"'":
+            quote = c
+            out.append('"')
+        elif c in _CLOSERS:
+            stack.append(_CLOSERS[c])
+            out.append(c)
+        elif c in "}]":
+            drop_trailing_comma()
+            if stack and stack[-1] == c:
+                stack.pop()
+                out.append(c)
+            if not stack:
+                break
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] in "_-"):
+                j += 1
+            word = text[i:j]
+            rest = text[j:].lstrip()
+            if rest.startswith(":") and stack and stack[-1] == "}":
+                out.append(json.dumps(word))          # clé sans quotes
+            else:
+                out.append(_BARE_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+
+    # Sortie tronquée : refermer la chaîne, compléter une clé orpheline, fermer les crochets
+    if quote is not None:
+        if escape:
+            out.pop()
+        out.append('"')
+    drop_trailing_comma()
+    if out and out[-1] == ":":
+        out.append("null")
+    for closer in reversed(stack):
+        out.append(closer)
+    return "".join(out)
+
+def _truncate_last_item(text: str) -> str:
+    """Retire le dernier élément (souvent incomplet) d'un JSON tronqué avant de le refermer."""
+    cut = text.rfind(",")
+    if cut <= 0:
+        raise ValueError("Impossible de réduire davantage le JSON")
+    return text[:cut]
+
+
+# --------------------------
+# Statistiques de parsing
+# --------------------------
+_stats_lock = threading.Lock()
+JSON_PARSE_STATS: Dict[str, Counter] = defaultdict(Counter)
+
+def record_parse(source: str, outcome: str):
+    """outcome : strict (json.loads direct), repaired (après réparation) ou failed."""
+    with _stats_lock:
+        JSON_PARSE_STATS[source][outcome] += 1
+
+def parse_stats() -> dict:
+    with _stats_lock:
+        snapshot = {source: dict(counter) for source, counter in JSON_PARSE_STATS.items()}
+    for counts in snapshot.values():
+        total = sum(counts.values())
+        counts["total"] = total
+        counts["failure_rate"] = round(counts.get("failed", 0) / total, 3) if total else 0.0
+        counts["repair_rate"] = round(counts.get("repaired", 0) / total, 3) if total else 0.0
+    return snapshot
+
+
+def loads_tolerant(text: str, source: str = "llm", max_truncations: int = 3) -> Any:
+    """
+    json.loads, puis réparation tolérante en cas d'échec.
+    Le résultat (strict / repaired / failed) est comptabilisé par `source`.
+    """
+    try:
+        value = json.loads(text)
+        record_parse(source, "strict")
+        return value
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    candidate = text
+    last_error: Exception = ValueError("JSON vide")
+    for _ in range(max_truncations + 1):
+        try:
+            value = json.loads(repair_json(candidate))
+            record_parse(source, "repaired")
+            logging.info(f"🩹 JSON réparé ({source})")
+            return value
+        except (json.JSONDecodeError, ValueError) as e:
+            last_error = e
+            try:
+                candidate = _truncate_last_item(candidate)
+            except ValueError:
+                break
+    record_parse(source, "failed")
+    raise ValueError(f"JSON invalide même après réparation : {last_error}")
@@ -0,0 +1,141 @@
+# app/utils/llm.py
+import asyncio, logging, time
+from typing import List, Optional, Union
+import httpx
+import ollama
+from app.config import OLLAMA_HOST, LLM_MODEL, LLM_MAX_CONCURRENCY, LLM_TIMEOUT, LLM_MAX_CONNECTIONS, LLM_NUM_CTX, LLM_CACHE_ENABLED
+from app.utils.llm_cache import LLMResponseCache
+
+logging.basicConfig(level=logging.INFO)
+
+
+class AsyncLLMClient:
+    """
+    Client Ollama asynchrone partagé par tous les agents.
+    - Pool de connexions HTTP unique (keep-alive)
+    - Timeout par appel
+    - Plafond de concurrence global (sémaphore)
+    - Fenêtre de contexte fixe (options.num_ctx) pour tous les appels
+    - Cache disque optionnel des réponses (LLMResponseCache)
+    """
+
+    def __init__(
+        self,
+        host: str = OLLAMA_HOST,
+        model: str = LLM_MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        num_ctx: int = LLM_NUM_CTX,
+        cache: Optional[LLMResponseCache] = None
+    ):
+        self.model = model
+        self.cache = cache
+        self.timeout = timeout
+        self.num_ctx = num_ctx
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = ollama.AsyncClient(
+            host=host,
+            timeout=httpx.Timeout(timeout, connect=10),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.calls = 0
+        self.in_flight = 0
+
+    async def chat(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        format: Optional[Union[str, dict]] = None
+    ) -> str:
+        """
+        Envoie une conversation au modèle et retourne le contenu texte de la réponse.
+        `format` : "json" ou un JSON schema (sortie contrainte par Ollama).
+        """
+        model = model or self.model
+        key = None
+        if self.cache is not None and use_cache:
+            key = self._cache_key(model, messages, format)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                logging.info("💾 Réponse LLM servie depuis le cache")
+                return cached
+
+        async with self._semaphore:
+            self.in_flight += 1
+            start = time.time()
+            try:
+                response = await asyncio.wait_for(
+                    self._client.chat(model=model, messages=messages, stream=False, format=format,
+                                      options=self._options()),
+                    timeout=timeout or self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Ollama n'a pas répondu en {timeout or self.timeout}s")
+            finally:
+                self.in_flight -= 1
+                self.calls += 1
+            logging.info(f"🤖 Appel Ollama terminé en {time.time() - start:.2f}s")
+
+        content = self._extract_content(response)
+        if key is not None and content:
+            await asyncio.to_thread(self.cache.set, key, model, content)
+        return content
+
+    async def invalidate(
+        self,
+        messages: List[dict],
+        model: Optional[str] = None,
+        format: Optional[Union[str, dict]] = None
+    ):
+        """Retire du cache une réponse jugée inutilisable (ex: JSON invalide)."""
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.delete, self._cache_key(model or self.model, messages, format))
+
+    def _cache_key(self, model: str, messages: List[dict], format: Optional[Union[str, dict]]) -> str:
+        # Les options envoyées à Ollama (num_ctx) font partie de la clé : une réponse obtenue
+        # avec une autre fenêtre de contexte (éventuellement tronquée) n'est pas resservie
+        params = {"options": self._options()}
+        if format is not None:
+            params["format"] = format
+        return self.cache.make_key(model, messages, **params)
+
+    def _options(self) -> dict:
+        return {"num_ctx": self.num_ctx}
+
+    def _extract_content(self, response) -> str:
+        if isinstance(response, dict):
+            return response.get("message", {}).get("content")
+        return getattr(getattr(response, "message", None), "content", None)
+
+    async def close(self):
+        """Ferme le pool HTTP sous-jacent."""
+        http_client = getattr(self._client, "_client", None)
+        if http_client is not None:
+            await http_client.aclose()
+        if self.cache is not None:
+            self.cache.close()
+
+
+# --------------------------
+# Client partagé (singleton)
+# --------------------------
+_llm_client: Optional[AsyncLLMClient] = None
+
+def get_llm_client() -> AsyncLLMClient:
+    """
+    Retourne le client LLM partagé, créé au premier appel.
+    """
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = AsyncLLMClient(cache=LLMResponseCache() if LLM_CACHE_ENABLED else None)
+    return _llm_client
+
+async def close_llm_client():
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
@@ -0,0 +1,166 @@
+# app/utils/llm_cache.py
+import hashlib, json, logging, os, sqlite3, threading, time
+from typing import List, Optional
+from app.config import (
+    LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_PURGE_EVERY
+)
+
+logging.basicConfig(level=logging.INFO)
+
+
+class LLMResponseCache:
+    """
+    Cache disque (SQLite) des réponses LLM, adressé par contenu :
+    clé = sha256(modèle + messages système/utilisateur).
+    Éviction LRU par nombre d'entrées et taille totale, expiration par TTL.
+    Le nombre d'entrées et la taille totale sont tenus en mémoire (pas de COUNT / SUM à chaque écriture),
+    les entrées expirées sont purgées toutes les `purge_every` écritures.
+    Les méthodes sont synchrones : les appeler via asyncio.to_thread.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl: float = LLM_CACHE_TTL,
+        purge_every: int = LLM_CACHE_PURGE_EVERY
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " response TEXT,"
+            " size INTEGER,"
+            " created_at REAL,"
+            " last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at)")
+        # Seul scan complet : totaux initiaux, ensuite mis à jour à chaque écriture
+        self._count, self._total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        self._purge_expired()
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[dict], **params) -> str:
+        payload = json.dumps({"model": model, "messages": messages, **params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at, size FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at, size = row
+            if now - created_at > self.ttl:
+                self._delete(key, size)
+                self._conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, key: str, model: str, response: str):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            if previous is None:
+                self._count += 1
+            self._total += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._delete(key, row[0])
+                self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._count, self._total = 0, 0
+
+    def _delete(self, key: str, size: int):
+        self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        self._count -= 1
+        self._total -= size
+
+    def _purge_expired(self):
+        """Supprime les entrées expirées (index sur created_at)."""
+        cutoff = time.time() - self.ttl
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache WHERE created_at < ?", (cutoff,)
+        ).fetchone()
+        if count:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (cutoff,))
+            self._count -= count
+            self._total -= total
+            self.evictions += count
+
+    def _evict(self):
+        """Purge périodique des entrées expirées, puis LRU jusqu'à respecter les limites."""
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self._purge_expired()
+        while self._count > self.max_entries or self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access ASC LIMIT ?",
+                (max(16, self._count - self.max_entries),)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._count <= self.max_entries and self._total <= self.max_bytes:
+                    break
+                self._delete(key, size)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._count, self._total
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "size_bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
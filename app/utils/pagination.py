@@ -0,0 +1,77 @@
+# app/utils/pagination.py
+import base64, json
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from bson import ObjectId
+from app.models import Article
+
+# Champs internes de déduplication, exclus des réponses par défaut
+INTERNAL_FIELDS = ("minhash", "lsh_buckets")
+# Champs projetables d'un Article (noms Mongo)
+ARTICLE_FIELDS = tuple(name for name in Article.model_fields if name not in ("id", "revision_id", *INTERNAL_FIELDS))
+# Tris supportés : clé de keyset → (champ, sens) ; _id sert toujours de départage
+ARTICLE_SORTS = {
+    "_id": ("_id", 1),
+    "-date_added": ("date_added", -1),
+}
+
+
+def parse_fields(fields: Optional[str]) -> dict:
+    """'name,link' → projection Mongo {"name": 1, "link": 1} (vide = document complet sans les champs internes)."""
+    if not fields:
+        return {name: 0 for name in INTERNAL_FIELDS}
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in ARTICLE_FIELDS and f != "_id"]
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)}. Disponibles: {', '.join(ARTICLE_FIELDS)}")
+    return {name: 1 for name in names}
+
+def encode_cursor(doc: dict, sort: str) -> str:
+    """Curseur opaque : position du dernier document renvoyé (valeur de tri + _id)."""
+    field, _ = ARTICLE_SORTS[sort]
+    position = {"id": str(doc["_id"])}
+    if field != "_id":
+        value = doc.get(field)
+        position["v"] = value.isoformat() if isinstance(value, datetime) else value
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def keyset_filter(cursor: Optional[str], sort: str) -> dict:
+    """Filtre Mongo des documents situés strictement après le curseur dans l'ordre de tri."""
+    if not cursor:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+        last_id = ObjectId(position["id"])
+    except Exception:
+        raise ValueError("Cursor inválido.")
+    field, direction = ARTICLE_SORTS[sort]
+    op = "$gt" if direction == 1 else "$lt"
+    if field == "_id":
+        return {"_id": {op: last_id}}
+    value = position.get("v")
+    if field == "date_added" and value is not None:
+        value = datetime.fromisoformat(value)
+    return {"$or": [
+        {field: {op: value}},
+        {field: value, "_id": {op: last_id}}
+    ]}
+
+def sort_spec(sort: str) -> List[Tuple[str, int]]:
+    field, direction = ARTICLE_SORTS[sort]
+    return [("_id", direction)] if field == "_id" else [(field, direction), ("_id", direction)]
+
+def json_default(value):
+    """Sérialisation JSON des types BSON (ObjectId, datetime)."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+def serialize_doc(doc: dict) -> dict:
+    """ObjectId → str pour la réponse JSON (les datetime sont gérés par FastAPI)."""
+    if "_id" in doc:
+        doc["_id"] = str(doc["_id"])
+    return doc
@@ -0,0 +1,199 @@
+# app/utils/pipeline.py
+import asyncio, logging, time
+from typing import Awaitable, Callable, List, Optional
+from app.models import Article
+from app.agents import MarkdownCleanerAgent
+from app.config import PIPELINE_FETCH_CONCURRENCY, PIPELINE_LLM_CONCURRENCY, PIPELINE_QUEUE_SIZE
+from app.utils.ia import get_article_html, html_to_markdown, create_article_in_db, commit_fetched_page
+from app.utils.http import ArticleFetcher
+from app.utils.fetch_cache import FetchCache
+from app.database import FaissStore
+from app.utils.fingerprint import fingerprint_content, find_duplicate
+
+logging.basicConfig(level=logging.INFO)
+
+# Marqueur de fin de file pour arrêter les workers
+_STOP = object()
+
+
+async def process_links_pipeline(
+    links: List[str],
+    markdown_agent: MarkdownCleanerAgent,
+    fetch_concurrency: int = PIPELINE_FETCH_CONCURRENCY,
+    llm_concurrency: int = PIPELINE_LLM_CONCURRENCY,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+    fetcher: Optional[ArticleFetcher] = None,
+    fetch_cache: Optional[FetchCache] = None,
+    vector_store: Optional[FaissStore] = None,
+    refresh: bool = False,
+    on_event: Optional[Callable[[dict], Awaitable[None]]] = None,
+) -> dict:
+    """
+    Traite une liste de liens avec un pipeline à concurrence bornée :
+    fetch (HTML → Markdown) → LLM (nettoyage + JSON) → DB (traduction + insertion).
+    Chaque étape a sa propre file et son propre nombre de workers, ce qui permet
+    aux téléchargements de se chevaucher avec les appels LLM.
+    Avec refresh=True, les liens déjà en DB sont revalidés par GET conditionnel
+    et ne repassent par le LLM que si la page a changé ; la nouvelle version n'entre dans
+    le cache qu'après l'écriture en DB, et le vecteur FAISS de l'article mis à jour est retiré.
+    Avant le LLM, le Markdown est comparé aux articles existants (SHA-256 exact, puis MinHash / LSH) :
+    un doublon ou quasi-doublon est ignoré sans appel LLM ni traduction. Le writer refait ce lookup
+    juste avant l'insertion, pour les doublons d'un article du même lot écrit entre-temps.
+    `on_event` reçoit un événement par lien : "started", puis "created", "skipped" ou "failed"
+    avec les durées de chaque étape (fetch_s, llm_s, db_s) et le rapport LLM (appels / tokens économisés).
+    """
+    fetch_queue: asyncio.Queue = asyncio.Queue()
+    llm_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    db_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    created_articles: List[str] = []
+    skipped_links: List[str] = []
+    failed_links: List[str] = []
+    outcomes = {"created": created_articles, "skipped": skipped_links, "failed": failed_links}
+
+    async def emit(event: dict):
+        if on_event is None:
+            return
+        try:
+            await on_event(event)
+        except Exception as e:
+            logging.warning(f"Échec du callback de progression: {e}")
+
+    async def finish(
+        link: str, status: str, timings: dict,
+        article_id: Optional[str] = None, error: Optional[str] = None, llm: Optional[dict] = None,
+        duplicate: Optional[dict] = None
+    ):
+        outcomes[status].append(article_id if status == "created" else link)
+        await emit({
+            "link": link, "status": status, "article_id": article_id, "error": error,
+            "timings": timings, "llm": llm, "duplicate": duplicate
+        })
+
+    for link in links:
+        fetch_queue.put_nowait(link)
+    for _ in range(fetch_concurrency):
+        fetch_queue.put_nowait(_STOP)
+
+    async def fetch_worker():
+        while True:
+            link = await fetch_queue.get()
+            if link is _STOP:
+                return
+            timings: dict = {}
+            await emit({"link": link, "status": "started"})
+            try:
+                # Vérifier si l'article existe déjà dans MongoDB
+                existing = await Article.find_one(Article.link == link)
+                if existing and not refresh:
+                    logging.info(f"Lien déjà présent en DB, ignoré: {link}")
+                    await finish(link, "skipped", timings, article_id=str(existing.id))
+                    continue
+
+                start = time.time()
+                clean_html, unchanged, page = await get_article_html(link, fetcher, fetch_cache)
+                if existing and unchanged:
+                    timings["fetch_s"] = round(time.time() - start, 2)
+                    logging.info(f"Page inchangée depuis la dernière ingestion, LLM évité: {link}")
+                    await finish(link, "skipped", timings, article_id=str(existing.id))
+                    continue
+                if not clean_html:
+                    logging.warning(f"Impossible d'extraire HTML: {link}")
+                    await finish(link, "failed", timings, error="HTML vide")
+                    continue
+
+                markdown_text = await html_to_markdown(clean_html)
+                timings["fetch_s"] = round(time.time() - start, 2)
+                if not markdown_text.strip():
+                    logging.warning(f"Markdown vide après conversion: {link}")
+                    await finish(link, "failed", timings, error="Markdown vide après conversion")
+                    continue
+                logging.info(f"📥 [fetch] {link} prêt en {timings['fetch_s']:.2f}s")
+
+                # Doublon exact ou quasi-doublon d'un article existant : ni LLM ni traduction
+                start = time.time()
+                fingerprint = await asyncio.to_thread(fingerprint_content, markdown_text)
+                existing_id = existing.id if existing else None
+                duplicate = await find_duplicate(fingerprint, exclude_id=existing_id)
+                timings["dedup_s"] = round(time.time() - start, 3)
+                if duplicate:
+                    logging.info(f"♊ Doublon {duplicate['kind']} ({duplicate['similarity']}) de {duplicate['link']}, LLM évité: {link}")
+                    await finish(link, "skipped", timings, article_id=duplicate["article_id"], duplicate=duplicate)
+                    continue
+                await llm_queue.put((link, markdown_text, fingerprint, existing_id, page, timings))
+            except Exception as e:
+                logging.warning(f"Échec récupération pour {link}: {e}")
+                await finish(link, "failed", timings, error=f"fetch: {e}")
+
+    async def llm_worker():
+        while True:
+            item = await llm_queue.get()
+            if item is _STOP:
+                return
+            link, markdown_text, fingerprint, existing_id, page, timings = item
+            start = time.time()
+            try:
+                # Un seul appel structuré pour les articles courts, segmentation sinon
+                cleaned_article, llm_report = await markdown_agent.clean_and_extract(markdown_text, link)
+                timings["llm_s"] = round(time.time() - start, 2)
+                logging.info(f"🤖 [llm] {link} traité en {timings['llm_s']:.2f}s ({llm_report['mode']}, {llm_report['llm_calls']} appel(s))")
+                await db_queue.put((link, cleaned_article, fingerprint, existing_id, page, timings, llm_report))
+            except Exception as e:
+                timings["llm_s"] = round(time.time() - start, 2)
+                logging.warning(f"Échec nettoyage ou génération JSON pour {link}: {e}")
+                await finish(link, "failed", timings, error=f"llm: {e}")
+
+    async def db_worker():
+        # Un seul writer : évite les doublons concurrents sur le même contenu
+        while True:
+            item = await db_queue.get()
+            if item is _STOP:
+                return
+            link, cleaned_article, fingerprint, existing_id, page, timings, llm_report = item
+            start = time.time()
+            try:
+                # Un lien du même lot au contenu identique a pu être inséré pendant l'appel LLM
+                duplicate = await find_duplicate(fingerprint, exclude_id=existing_id)
+                if duplicate:
+                    timings["db_s"] = round(time.time() - start, 2)
+                    logging.info(f"♊ Doublon {duplicate['kind']} ({duplicate['similarity']}) de {duplicate['link']} inséré entre-temps: {link}")
+                    await finish(link, "skipped", timings, article_id=duplicate["article_id"], llm=llm_report, duplicate=duplicate)
+                    continue
+                article, is_duplicate = await create_article_in_db(cleaned_article, fingerprint, vector_store)
+                await commit_fetched_page(fetch_cache, page)
+                timings["db_s"] = round(time.time() - start, 2)
+                if is_duplicate:
+                    # Texte nettoyé identique à un article existant : rien n'a été écrit
+                    logging.info(f"♊ Texte nettoyé identique à {article.link}, article existant conservé: {link}")
+                    duplicate = {"article_id": str(article.id), "link": article.link, "kind": "exact", "similarity": 1.0}
+                    await finish(link, "skipped", timings, article_id=str(article.id), llm=llm_report, duplicate=duplicate)
+                    continue
+                logging.info(f"Article créé avec succès: {link}")
+                await finish(link, "created", timings, article_id=str(article.id), llm=llm_report)
+            except Exception as e:
+                timings["db_s"] = round(time.time() - start, 2)
+                logging.warning(f"Erreur insertion DB pour {link}: {e}")
+                await finish(link, "failed", timings, error=f"db: {e}", llm=llm_report)
+
+    fetchers = [asyncio.create_task(fetch_worker()) for _ in range(fetch_concurrency)]
+    llm_workers = [asyncio.create_task(llm_worker()) for _ in range(llm_concurrency)]
+    writer = asyncio.create_task(db_worker())
+
+    try:
+        await asyncio.gather(*fetchers)
+        for _ in llm_workers:
+            await llm_queue.put(_STOP)
+        await asyncio.gather(*llm_workers)
+        await db_queue.put(_STOP)
+        await writer
+    finally:
+        # En cas d'annulation / erreur, ne laisser aucun worker orphelin
+        for task in (*fetchers, *llm_workers, writer):
+            if not task.done():
+                task.cancel()
+
+    return {
+        "created_articles": created_articles,
+        "skipped_links": skipped_links,
+        "failed_links": failed_links,
+    }
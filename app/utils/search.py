@@ -0,0 +1,474 @@
+# app/utils/search.py
+import asyncio, logging, math, re, threading, time, unicodedata
+from array import array
+from collections import Counter, OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from beanie import PydanticObjectId
+from app.models import Article, ArticleSearchView
+from app.config import (
+    SEARCH_FIELD_WEIGHTS, SEARCH_BM25_K1, SEARCH_BM25_B, SEARCH_BUILD_BATCH, SEARCH_COMPACT_RATIO,
+    SEARCH_SNIPPET_CHARS, SEARCH_MAX_SNIPPETS, SEARCH_HIGHLIGHT_TAGS,
+    HYBRID_RRF_K, HYBRID_CACHE_SIZE, HYBRID_CACHE_TTL
+)
+
+logging.basicConfig(level=logging.INFO)
+
+_TOKEN = re.compile(r"\w+")
+_COMBINING = re.compile("[\u0300-\u036f]")
+# Mots vides fréquents (espagnol, anglais, français) : absents de l'index et des requêtes
+STOPWORDS = frozenset("""
+de la el en y a los las del se un una por con para es al lo como mas o pero sus su le ya este esta entre
+cuando muy sin sobre tambien me hasta hay donde desde todo nos durante uno ni contra ese eso mi que no
+the of and to in is for on that with as by it at from be are was this an or which its has have not but
+le les des et du un une dans pour sur au aux ce ces qui que est sont par plus ne pas avec il elle
+""".split())
+
+# Variantes accentuées d'une lettre, pour surligner le texte original à partir des termes normalisés
+_ACCENT_CLASSES = {
+    "a": "[aàáâãäå]", "e": "[eèéêë]", "i": "[iìíîï]", "o": "[oòóôõö]",
+    "u": "[uùúûü]", "n": "[nñ]", "c": "[cç]", "y": "[yýÿ]",
+}
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ("Piedras Preciosas Ñ" → "piedras preciosas n")."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return _COMBINING.sub("", unicodedata.normalize("NFKD", text))
+
+def _singular(token: str) -> str:
+    """Pluriel simple (es / en / fr) : esmeraldas → esmeralda, emeralds → emerald ; « ss » conservé."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [_singular(t) for t in _TOKEN.findall(fold(text)) if len(t) > 1 and t not in STOPWORDS]
+
+def parse_keywords(keywords: Optional[str] = None, query: Optional[str] = None) -> List[List[str]]:
+    """
+    Groupes de termes d'une requête : un groupe par mot-clé de `keywords` (séparés par des virgules),
+    un groupe par mot de `query` (texte libre). Un groupe correspond à un document
+    si tous ses termes y apparaissent.
+    """
+    groups = [tokenize(k) for k in (keywords or "").split(",")]
+    groups += [[t] for t in tokenize(query)]
+    unique, seen = [], set()
+    for group in groups:
+        key = tuple(group)
+        if group and key not in seen:
+            seen.add(key)
+            unique.append(group)
+    return unique
+
+
+class InvertedIndex:
+    """
+    Index inversé BM25 en mémoire.
+    - postings : terme → (indices internes des documents, fréquences pondérées par champ),
+      stockés en `array` compacts et convertis en numpy pour le scoring vectorisé
+    - un document modifié ou supprimé est marqué mort (tombstone) ; la place est récupérée
+      par reconstruction complète (voir SearchIndex.schedule_rebuild)
+    """
+
+    def __init__(self, weights: Dict[str, float] = SEARCH_FIELD_WEIGHTS):
+        self.weights = weights
+        self.doc_ids: List[str] = []             # indice interne → id Mongo
+        self.positions: Dict[str, int] = {}      # id Mongo → indice interne (documents vivants)
+        self.alive = bytearray()
+        self.doc_len = array("f")
+        self.total_len = 0.0
+        self.postings: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def dead(self) -> int:
+        return len(self.doc_ids) - len(self.positions)
+
+    def term_frequencies(self, fields: Dict[str, Optional[str]]) -> Counter:
+        tf: Counter = Counter()
+        for field, weight in self.weights.items():
+            for token, count in Counter(tokenize(fields.get(field))).items():
+                tf[token] += weight * count
+        return tf
+
+    def add(self, doc_id: str, tf: Counter) -> bool:
+        """Indexe un document ; True s'il remplace une version vivante (qui devient une entrée morte)."""
+        replaced = self.remove([doc_id]) > 0
+        idx = len(self.doc_ids)
+        length = float(sum(tf.values()))
+        self.doc_ids.append(doc_id)
+        self.positions[doc_id] = idx
+        self.alive.append(1)
+        self.doc_len.append(length)
+        self.total_len += length
+        for term, freq in tf.items():
+            docs, freqs = self.postings.setdefault(term, (array("i"), array("f")))
+            docs.append(idx)
+            freqs.append(freq)
+        return replaced
+
+    def remove(self, doc_ids: List[str]) -> int:
+        removed = 0
+        for doc_id in doc_ids:
+            idx = self.positions.pop(doc_id, None)
+            if idx is None:
+                continue
+            self.alive[idx] = 0
+            self.total_len -= self.doc_len[idx]
+            removed += 1
+        return removed
+
+    def score(
+        self, groups: List[List[str]], match: str = "any", k1: float = SEARCH_BM25_K1, b: float = SEARCH_BM25_B
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores BM25 de tous les documents pour la requête.
+        Retourne (indices des documents correspondants, scores complets par indice interne).
+        match="any" : au moins un groupe correspond ; "all" : tous les groupes.
+        """
+        n = len(self.positions)
+        scores = np.zeros(len(self.doc_ids), dtype="float32")
+        if not n or not groups:
+            return np.zeros(0, dtype="int64"), scores
+        alive = np.frombuffer(bytes(self.alive), dtype="uint8").astype(bool)
+        doc_len = np.array(self.doc_len, dtype="float32")
+        avgdl = max(self.total_len / n, 1e-9)
+        matched = np.ones(len(self.doc_ids), dtype=bool) if match == "all" else np.zeros(len(self.doc_ids), dtype=bool)
+        scored_terms: Dict[str, np.ndarray] = {}
+
+        for group in groups:
+            group_mask = alive.copy()
+            for term in group:
+                if term not in scored_terms:
+                    scored_terms[term] = self._score_term(term, alive, doc_len, avgdl, n, k1, b, scores)
+                term_mask = np.zeros(len(self.doc_ids), dtype=bool)
+                term_mask[scored_terms[term]] = True
+                group_mask &= term_mask
+            if match == "all":
+                matched &= group_mask
+            else:
+                matched |= group_mask
+        return np.flatnonzero(matched), scores
+
+    def _score_term(self, term, alive, doc_len, avgdl, n, k1, b, scores) -> np.ndarray:
+        posting = self.postings.get(term)
+        if posting is None:
+            return np.zeros(0, dtype="int64")
+        docs = np.array(posting[0], dtype="int64")
+        freqs = np.array(posting[1], dtype="float32")
+        live = alive[docs]
+        docs, freqs = docs[live], freqs[live]
+        df = len(docs)
+        if not df:
+            return docs
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * doc_len[docs] / avgdl)
+        # Un terme n'apparaît qu'une fois par document dans ses postings : addition sans collision
+        scores[docs] += idf * freqs * (k1 + 1) / (freqs + norm)
+        return docs
+
+
+class SearchIndex:
+    """
+    Index plein texte des articles (name, description, cleaned_text, translation) classé par BM25.
+    Construit au démarrage depuis Mongo, tenu à jour à chaque création / modification / suppression,
+    et reconstruit en arrière-plan quand les documents morts dépassent SEARCH_COMPACT_RATIO.
+    Comme pour FaissStore, les mutations survenues pendant une reconstruction sont journalisées
+    puis rejouées avant la bascule.
+    """
+
+    def __init__(self, weights: Dict[str, float] = SEARCH_FIELD_WEIGHTS):
+        self.weights = weights
+        self.core = InvertedIndex(weights)
+        self._lock = threading.RLock()
+        self._journal: Optional[list] = None
+        self.rebuilding = False
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self.ready = asyncio.Event()
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        # Incrémentée à chaque mutation : invalide les fenêtres de la recherche hybride
+        self.version = 0
+        self._latencies = deque(maxlen=2000)
+
+    def __len__(self) -> int:
+        return len(self.core)
+
+    # ---------- Mutations ----------
+    def upsert(self, article) -> None:
+        """
+        Indexe (ou réindexe) un Article ou une projection ArticleSearchView.
+        Une réindexation laisse l'ancienne entrée morte : compactage planifié au-delà du seuil.
+        """
+        doc_id = str(article.id)
+        tf = self.core.term_frequencies({field: getattr(article, field, None) for field in self.weights})
+        with self._lock:
+            replaced = self.core.add(doc_id, tf)
+            self.version += 1
+            if self._journal is not None:
+                self._journal.append(("add", doc_id, tf))
+        if replaced:
+            self.schedule_rebuild()
+
+    def remove(self, article_ids: List[str]) -> int:
+        article_ids = [str(a) for a in article_ids]
+        with self._lock:
+            removed = self.core.remove(article_ids)
+            self.version += 1
+            if self._journal is not None:
+                self._journal.append(("remove", article_ids, None))
+        return removed
+
+    # ---------- Recherche ----------
+    def search(self, groups: List[List[str]], match: str = "any", limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[str, float]]]:
+        """Retourne (nombre total de documents correspondants, page [(article_id, score)] par score décroissant)."""
+        start = time.perf_counter()
+        with self._lock:
+            hits, scores = self.core.score(groups, match)
+            total = len(hits)
+            top = offset + limit
+            if total > top:
+                hits = hits[np.argpartition(-scores[hits], top - 1)[:top]]
+            # Tri par score décroissant, puis par ordre d'indexation (pagination stable)
+            hits = hits[np.lexsort((hits, -scores[hits]))][offset:top]
+            page = [(self.core.doc_ids[i], float(scores[i])) for i in hits.tolist()]
+        self._latencies.append((time.perf_counter() - start) * 1000)
+        return total, page
+
+    # ---------- Construction ----------
+    async def rebuild(self, batch_size: int = SEARCH_BUILD_BATCH):
+        """
+        Reconstruit l'index depuis Mongo : lecture par projection, tokenisation par lots hors de l'event loop,
+        puis rejeu des mutations journalisées et bascule. Les requêtes continuent sur l'index courant.
+        """
+        with self._lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+            self._journal = []
+        try:
+            start = time.time()
+            fresh = InvertedIndex(self.weights)
+
+            def add_batch(batch: List[ArticleSearchView]):
+                for doc in batch:
+                    fresh.add(str(doc.id), fresh.term_frequencies({f: getattr(doc, f, None) for f in self.weights}))
+
+            batch: List[ArticleSearchView] = []
+            async for doc in Article.find_all().project(ArticleSearchView):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    await asyncio.to_thread(add_batch, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(add_batch, batch)
+
+            with self._lock:
+                for op, key, tf in self._journal:
+                    if op == "add":
+                        fresh.add(key, tf)
+                    else:
+                        fresh.remove(key)
+                self.core = fresh
+                self.version += 1
+            self.built_at = time.time()
+            self.build_seconds = round(self.built_at - start, 2)
+            logging.info(f"🔎 Index plein texte construit : {len(fresh)} articles, {len(fresh.postings)} termes en {self.build_seconds}s")
+        finally:
+            with self._lock:
+                self._journal = None
+                self.rebuilding = False
+
+    def needs_compaction(self) -> bool:
+        return self.core.dead > SEARCH_COMPACT_RATIO * max(1, len(self.core.doc_ids))
+
+    def schedule_rebuild(self, force: bool = False) -> bool:
+        """Lance une reconstruction en tâche de fond (compactage des documents morts)."""
+        if self.rebuilding or not (force or self.needs_compaction()):
+            return False
+        self._rebuild_task = asyncio.create_task(self.rebuild())
+        return True
+
+    def stats(self) -> dict:
+        latencies = np.array(self._latencies) if self._latencies else None
+        return {
+            "ready": self.ready.is_set(),
+            "documents": len(self.core),
+            "version": self.version,
+            "dead_documents": self.core.dead,
+            "terms": len(self.core.postings),
+            "postings": sum(len(docs) for docs, _ in self.core.postings.values()),
+            "avg_doc_length": round(self.core.total_len / len(self.core), 1) if len(self.core) else None,
+            "rebuilding": self.rebuilding,
+            "build_seconds": self.build_seconds,
+            "field_weights": self.weights,
+            "queries": len(self._latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3) if latencies is not None else None,
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3) if latencies is not None else None,
+        }
+
+
+_search_index: Optional[SearchIndex] = None
+
+def get_search_index() -> SearchIndex:
+    """Index plein texte partagé (créé vide ; construit par le préchauffage de l'app)."""
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex()
+    return _search_index
+
+async def get_ready_search_index() -> SearchIndex:
+    index = get_search_index()
+    await index.ready.wait()
+    return index
+
+
+# --------------------------
+# Surlignage
+# --------------------------
+def _term_pattern(term: str) -> str:
+    # Les termes indexés sont au singulier : le pluriel du texte original est aussi surligné
+    return "".join(_ACCENT_CLASSES.get(c, re.escape(c)) for c in term) + "s?"
+
+def highlight_pattern(terms: List[str]) -> Optional[re.Pattern]:
+    """Regex insensible à la casse et aux accents reconnaissant les termes (mots entiers) dans le texte original."""
+    terms = sorted(set(terms), key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(?:" + "|".join(_term_pattern(t) for t in terms) + r")\b", re.IGNORECASE)
+
+def mark(text: str, pattern: re.Pattern) -> str:
+    open_tag, close_tag = SEARCH_HIGHLIGHT_TAGS
+    return pattern.sub(lambda m: f"{open_tag}{m.group(0)}{close_tag}", text)
+
+def snippets(
+    text: Optional[str], pattern: re.Pattern, width: int = SEARCH_SNIPPET_CHARS, max_snippets: int = SEARCH_MAX_SNIPPETS
+) -> List[str]:
+    """Extraits de `width` caractères centrés sur les premières occurrences, termes surlignés."""
+    if not text:
+        return []
+    out, covered_until = [], -1
+    for m in pattern.finditer(text):
+        if m.start() < covered_until:
+            continue
+        start = max(0, m.start() - width // 2)
+        end = min(len(text), start + width)
+        excerpt = " ".join(text[start:end].split())
+        out.append(("…" if start > 0 else "") + mark(excerpt, pattern) + ("…" if end < len(text) else ""))
+        covered_until = end
+        if len(out) >= max_snippets:
+            break
+    return out
+
+def highlight_article(doc: ArticleSearchView, pattern: Optional[re.Pattern]) -> dict:
+    """Champs courts surlignés en entier, champs longs réduits à des extraits ; seuls les champs trouvés sont renvoyés."""
+    if pattern is None:
+        return {}
+    highlights: Dict[str, object] = {}
+    for field in ("name", "description"):
+        value = getattr(doc, field) or ""
+        if pattern.search(value):
+            highlights[field] = mark(value, pattern)
+    for field in ("cleaned_text", "translation"):
+        found = snippets(getattr(doc, field), pattern)
+        if found:
+            highlights[field] = found
+    return highlights
+
+async def hydrate_hits(hits: List[Tuple[str, float]], groups: List[List[str]]) -> List[dict]:
+    """Charge les articles d'une page de résultats en une requête $in et les renvoie dans l'ordre du classement."""
+    if not hits:
+        return []
+    ids = [PydanticObjectId(article_id) for article_id, _ in hits]
+    docs = await Article.find({"_id": {"$in": ids}}).project(ArticleSearchView).to_list()
+    by_id = {str(doc.id): doc for doc in docs}
+    pattern = highlight_pattern([term for group in groups for term in group])
+    results = []
+    for article_id, score in hits:
+        doc = by_id.get(article_id)
+        if doc is None:
+            continue    # supprimé entre le classement et la lecture
+        results.append({
+            "_id": article_id,
+            "name": doc.name,
+            "description": doc.description,
+            "link": doc.link,
+            "date_added": doc.date_added,
+            "score": round(score, 4),
+            "highlights": highlight_article(doc, pattern)
+        })
+    return results
+
+
+# --------------------------
+# Recherche hybride (BM25 + FAISS)
+# --------------------------
+def reciprocal_rank_fusion(
+    rankings: Dict[str, List[str]], k: int = HYBRID_RRF_K, weights: Optional[Dict[str, float]] = None
+) -> List[dict]:
+    """
+    Fusion RRF : score(d) = Σ poids(source) / (k + rang de d dans la source), rangs à partir de 1.
+    Ne dépend que des rangs, donc pas de normalisation entre scores BM25 et distances L2.
+    Retourne les documents par score décroissant avec leur rang dans chaque source.
+    """
+    weights = weights or {}
+    fused: Dict[str, dict] = {}
+    for source, article_ids in rankings.items():
+        weight = weights.get(source, 1.0)
+        for rank, article_id in enumerate(article_ids, start=1):
+            entry = fused.setdefault(article_id, {"id": article_id, "score": 0.0})
+            entry["score"] += weight / (k + rank)
+            entry[f"{source}_rank"] = rank
+    return sorted(fused.values(), key=lambda e: -e["score"])
+
+
+class HybridResultCache:
+    """
+    Fenêtres de résultats fusionnés par requête (LRU + TTL), pour paginer sans relancer BM25 ni FAISS.
+    La clé contient la version de l'index plein texte et celle de l'index FAISS :
+    une mutation rend les anciennes fenêtres inaccessibles, elles sortent ensuite par LRU.
+    """
+
+    def __init__(self, max_entries: int = HYBRID_CACHE_SIZE, ttl: float = HYBRID_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple, window: dict):
+        self._entries[key] = (time.time(), window)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,58 @@
+# app/utils/sse.py
+import asyncio, json, logging
+from typing import AsyncIterator, Awaitable, Callable
+from fastapi.responses import StreamingResponse
+
+logging.basicConfig(level=logging.INFO)
+
+# Commentaire SSE envoyé pendant les longs appels LLM (évite la coupure des proxys type ngrok)
+SSE_KEEPALIVE_SECONDS = 15
+
+ProgressCallback = Callable[[dict], Awaitable[None]]
+
+
+def format_sse(event: str, data: dict) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+async def stream_progress(run: Callable[[ProgressCallback], Awaitable[dict]]) -> AsyncIterator[str]:
+    """
+    Exécute `run(on_event)` en tâche de fond et relaie chaque événement au client SSE.
+    Le type d'événement SSE est le champ "status" (started, created, success, skipped, failed) ;
+    le flux se termine par "done" (résumé) ou "error". Si le client se déconnecte, le traitement est annulé.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_event(event: dict):
+        await queue.put((event.get("status", "progress"), event))
+
+    async def runner():
+        try:
+            summary = await run(on_event)
+            await queue.put(("done", summary))
+        except Exception as e:
+            logging.exception("💥 Erreur pendant le traitement diffusé en SSE")
+            await queue.put(("error", {"error": str(e)}))
+
+    task = asyncio.create_task(runner())
+    try:
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event, data)
+            if event in ("done", "error"):
+                break
+    finally:
+        if not task.done():
+            logging.info("🔌 Client SSE déconnecté, traitement annulé")
+            task.cancel()
+
+def sse_response(run: Callable[[ProgressCallback], Awaitable[dict]]) -> StreamingResponse:
+    return StreamingResponse(
+        stream_progress(run),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,8 +2,6 @@ import os, re, json, httpx, asyncio
 from bs4 import BeautifulSoup
 from pydantic import ValidationError
 from fastapi import Request
-from langchain.schema import Document
-from langchain_community.document_transformers import MarkdownifyTransformer
 from app.models import Article, CleanedArticle
 from deep_translator import GoogleTranslator
 from datetime import datetime
@@ -4,6 +4,7 @@ from components.constant_components import show_feedback
 from datetime import datetime
 
 API_COLLECTIONS_URL = "https://gradely-dee-greaseproof.ngrok-free.dev/collections"
+API_SEARCH_URL = "https://gradely-dee-greaseproof.ngrok-free.dev/search"
 
 def render_crud_collection():
     st.header("🗃️ Operaciones CRUD sobre la colección MongoDB")
@@ -24,14 +25,36 @@ Este modo te permite **manipular directamente los datos** en la colección Mongo
     # --- Listar todos los documentos ---
     if accion == "Listar todos los documentos":
         st.subheader("📄 Lista de documentos")
-        if st.button("Cargar documentos"):
+        campos = st.multiselect(
+            "Campos a mostrar",
+            ["name", "description", "link", "date_added", "processed", "cleaned_text", "translation", "articles"],
+            default=["name", "link", "date_added", "processed"]
+        )
+        por_pagina = st.number_input("Documentos por página", min_value=10, max_value=500, value=50)
+        col_first, col_next = st.columns(2)
+        if col_first.button("Cargar documentos"):
+            st.session_state["all_cursor"] = None
+            st.session_state["all_page"] = 1
+            st.session_state["all_load"] = True
+        if col_next.button("Página siguiente"):
+            if st.session_state.get("all_next_cursor"):
+                st.session_state["all_cursor"] = st.session_state["all_next_cursor"]
+                st.session_state["all_page"] = st.session_state.get("all_page", 1) + 1
+                st.session_state["all_load"] = True
+            else:
+                show_feedback(False, "No hay más documentos.")
+        if st.session_state.pop("all_load", False):
             try:
-                res = requests.get(f"{API_COLLECTIONS_URL}/all")
+                params = {"limit": por_pagina, "sort": "-date_added", "fields": ",".join(campos)}
+                if st.session_state.get("all_cursor"):
+                    params["cursor"] = st.session_state["all_cursor"]
+                res = requests.get(f"{API_COLLECTIONS_URL}/all", params=params)
                 res.raise_for_status()
                 data = res.json()
-                st.write(f"**{data.get('count', 0)} documentos encontrados**")
+                st.session_state["all_next_cursor"] = data.get("next_cursor")
+                st.write(f"**Página {st.session_state['all_page']} — {data.get('count', 0)} documentos**")
                 for d in data.get("articles", []):
-                    st.json(d)
+                    st.json(d, expanded=False)
             except Exception as e:
                 show_feedback(False, f"Error al listar documentos: {e}")
 
@@ -55,21 +78,50 @@ Este modo te permite **manipular directamente los datos** en la colección Mongo
         st.subheader("🔍 Búsqueda por palabras clave")
         query = st.text_input(label="Palabras clave", placeholder="Palabras clave (separadas por comas)")
         limit = st.number_input(label="Límite de resultados", min_value=1, max_value=50, value=20, help="Número máximo de artículos a mostrar")
-        if st.button("Buscar"):
+        todas = st.checkbox("Exigir todas las palabras clave", value=False)
+        hibrida = st.checkbox("Búsqueda híbrida (palabras clave + semántica)", value=False,
+                              help="Combina el índice de texto (BM25) con FAISS mediante fusión de rankings")
+        col_search, col_more = st.columns(2)
+        if col_search.button("Buscar"):
             if not query:
                 show_feedback(False, "Ingresa al menos una palabra clave para buscar.")
             else:
-                keywords = [q.strip() for q in query.split(",") if q.strip()]
-                try:
-                    res = requests.get(
-                        f"{API_COLLECTIONS_URL}/search",
-                        params={"keywords": ",".join(keywords), "limit": limit}
-                    )
-                    res.raise_for_status()
-                    data = res.json()
-                    st.write(f"**{data.get('count', 0)} resultados encontrados**")
-                    for a in data.get("articles", []):
-                        st.json(a)
-                except Exception as e:
-                    show_feedback(False, f"Error en búsqueda: {e}")
+                st.session_state["search_offset"] = 0
+                st.session_state["search_load"] = True
+        if col_more.button("Más resultados"):
+            if st.session_state.get("search_next_offset") is not None:
+                st.session_state["search_offset"] = st.session_state["search_next_offset"]
+                st.session_state["search_load"] = True
+            else:
+                show_feedback(False, "No hay más resultados.")
+        if st.session_state.pop("search_load", False) and query:
+            keywords = [q.strip() for q in query.split(",") if q.strip()]
+            try:
+                params = {
+                    "limit": limit,
+                    "offset": st.session_state.get("search_offset", 0),
+                    "match": "all" if todas else "any"
+                }
+                if hibrida:
+                    res = requests.get(f"{API_SEARCH_URL}/hybrid", params={**params, "q": " ".join(keywords)})
+                else:
+                    res = requests.get(f"{API_COLLECTIONS_URL}/search", params={**params, "keywords": ",".join(keywords)})
+                res.raise_for_status()
+                data = res.json()
+                st.session_state["search_next_offset"] = data.get("next_offset")
+                desde = data.get("offset", 0)
+                duracion = data.get("took_ms") or data.get("timings", {}).get("total_ms")
+                st.write(f"**{data.get('total', 0)} resultados encontrados** (mostrando {desde + 1}–{desde + data.get('count', 0)}, {duracion} ms)")
+                for a in data.get("articles", []):
+                    resaltado = a.get("highlights", {})
+                    st.markdown(f"#### [{resaltado.get('name', a.get('name'))}]({a.get('link')})")
+                    if hibrida:
+                        st.caption(f"RRF: {a.get('score')} — rango texto: {a.get('lexical_rank') or '–'}, rango semántico: {a.get('vector_rank') or '–'} — {a.get('date_added')}")
+                    else:
+                        st.caption(f"Puntuación BM25: {a.get('score')} — {a.get('date_added')}")
+                    st.markdown(resaltado.get("description", a.get("description", "")))
+                    for extracto in resaltado.get("cleaned_text", []) + resaltado.get("translation", []):
+                        st.markdown(f"> {extracto}")
+            except Exception as e:
+                show_feedback(False, f"Error en búsqueda: {e}")
 
@@ -1,8 +1,61 @@
 import streamlit as st
-import requests
+import requests, time
 from components.constant_components import show_feedback
 
 API_IA_URL = "https://gradely-dee-greaseproof.ngrok-free.dev/ia"
+API_COLLECTIONS_URL = "https://gradely-dee-greaseproof.ngrok-free.dev/collections"
+API_JOBS_URL = "https://gradely-dee-greaseproof.ngrok-free.dev/jobs"
+
+STATUS_ICONS = {"created": "✅", "success": "✅", "skipped": "⏭️", "failed": "❌"}
+
+JOB_FINAL_STATUSES = ("completed", "failed", "cancelled")
+JOB_POLL_SECONDS = 2
+
+def render_job_progress(url: str, params: dict, label_key: str):
+    """
+    Encola un trabajo en el backend (POST) y sigue su progreso en /jobs/{job_id}
+    artículo por artículo, sin mantener abierta una petición larga.
+    Devuelve el resumen final del trabajo o None si falló o fue cancelado.
+    """
+    res = requests.post(url, params=params, timeout=30)
+    if res.status_code not in (200, 202):
+        show_feedback(False, f"Error: {res.text}")
+        return None
+    job_id = res.json()["job_id"]
+    st.caption(f"Trabajo `{job_id}` en cola")
+    progress_bar = st.progress(0.0)
+    summary_box = st.empty()
+    log = st.container()
+    offset = 0
+
+    while True:
+        res = requests.get(f"{API_JOBS_URL}/{job_id}", params={"offset": offset, "limit": 200}, timeout=30)
+        res.raise_for_status()
+        job = res.json()
+        progress = job["progress"]
+        if progress["percent"] is not None:
+            progress_bar.progress(min(progress["percent"] / 100, 1.0))
+        summary_box.markdown(
+            f"⏳ Estado: **{job['status']}** · ✅ Éxitos: **{progress['succeeded']}** · "
+            f"⏭️ Omitidos: **{progress['skipped']}** · ❌ Errores: **{progress['failed']}**"
+        )
+        for item in job["items"]:
+            result = item.get("result") or {}
+            label = result.get(label_key) or item["key"]
+            timings = " · ".join(f"{k}: {v}s" for k, v in (result.get("timings") or {}).items())
+            timings = f" ({timings})" if timings else ""
+            detail = f" — {item['error']}" if item.get("error") else ""
+            log.markdown(f"{STATUS_ICONS.get(item['status'], '•')} {label}{timings}{detail}")
+        offset += len(job["items"])
+        if job["status"] in JOB_FINAL_STATUSES and offset >= job["items_total"]:
+            break
+        time.sleep(JOB_POLL_SECONDS)
+
+    if job["status"] != "completed":
+        show_feedback(False, f"Trabajo {job['status']}: {job.get('error') or ''}")
+        return None
+    progress_bar.progress(1.0)
+    return job.get("summary") or {}
 
 def render_ia_articles():
     st.header("🤖 Inteligencia Artificial — Artículos")
@@ -16,6 +69,7 @@ Este modo aplica funciones de **procesamiento y generación IA** sobre los artí
     accion = st.radio("Selecciona una acción:", [
         "Cargar artículo desde enlace",
         "Listar artículos existentes",
+        "Procesar enlaces de Google Sheets",
         "Generar publicaciones sociales"
     ])
 
@@ -56,18 +110,32 @@ Este modo aplica funciones de **procesamiento y generación IA** sobre los artí
             except Exception as e:
                 show_feedback(False, f"Error al obtener artículos: {e}")
 
+    # --- Procesar enlaces de Google Sheets ---
+    elif accion == "Procesar enlaces de Google Sheets":
+        st.subheader("📥 Ingesta de los enlaces de la hoja de Google")
+        refresh = st.checkbox("Revalidar los artículos ya importados", value=False)
+        if st.button("Procesar enlaces"):
+            try:
+                summary = render_job_progress(
+                    f"{API_COLLECTIONS_URL}/process_all_sheets_links/", {"refresh": refresh}, label_key="link"
+                )
+                if summary is not None:
+                    show_feedback(True, f"{summary.get('created', 0)} creado(s), {summary.get('skipped', 0)} omitido(s), "
+                                        f"{summary.get('failed', 0)} error(es).")
+            except Exception as e:
+                show_feedback(False, f"Error al procesar los enlaces: {e}")
+
     # --- Generar publicaciones sociales ---
     elif accion == "Generar publicaciones sociales":
         st.subheader("📢 Generación automática de publicaciones sociales")
         count = st.number_input("Número de publicaciones por artículo", min_value=1, max_value=5, value=2)
         if st.button("Generar publicaciones"):
             try:
-                res = requests.post(f"{API_IA_URL}/generate-posts", params={"count": count})
-                if res.status_code == 200:
-                    data = res.json()
-                    show_feedback(True, data.get("message", "Publicaciones generadas con éxito."))
-                    st.json(data.get("details", {}))
-                else:
-                    show_feedback(False, f"Error: {res.text}")
+                summary = render_job_progress(
+                    f"{API_IA_URL}/generate_social_posts/", {"count": count}, label_key="link"
+                )
+                if summary is not None:
+                    show_feedback(True, f"{summary.get('processed', 0)} artículo(s) procesado(s), "
+                                        f"{summary.get('errors', 0)} error(es).")
             except Exception as e:
                 show_feedback(False, f"Error al generar: {e}")
@@ -0,0 +1,68 @@
+# 📏 bench_extraction.py — micro-benchmark extraction HTML → Markdown
+# Usage : python scripts/bench_extraction.py [fichiers.html ...]
+import glob, logging, os, statistics, sys, time
+from bs4 import BeautifulSoup
+from markdownify import markdownify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.extraction import extract_markdown, HTML_PARSER
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ROUNDS = 20
+logging.disable(logging.WARNING)
+
+
+def legacy_extract(html: str, batch_size: int = 1000) -> str:
+    """Ancien chemin : get_article_html (find_all + +=) puis html_to_markdown (re-parse + slicing)."""
+    soup = BeautifulSoup(html, "html.parser")
+    content_divs = soup.find_all("div", class_=lambda x: x and "content" in x.lower())
+    if not content_divs:
+        content_divs = [soup.find("body")]
+    allowed_tags = ["p", "h1", "h2", "h3", "h4", "h5", "li", "strong", "em"]
+    cleaned_html = ""
+    for div in content_divs:
+        for tag in div.find_all(allowed_tags):
+            cleaned_html += str(tag)
+
+    soup = BeautifulSoup(cleaned_html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    clean_html = str(soup)
+    # MarkdownifyTransformer appelle markdownify() sur chaque document
+    final_md = ""
+    for start in range(0, len(clean_html), batch_size):
+        batch_html = clean_html[start:start + batch_size]
+        if batch_html.strip():
+            final_md += markdownify(batch_html, heading_style="ATX") + "\n\n"
+    return final_md
+
+
+def timeit(fn, html: str) -> list:
+    durations = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(html)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main():
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    if not paths:
+        print("❌ Aucun fixture HTML trouvé.")
+        return
+    print(f"Parser : {HTML_PARSER} — {ROUNDS} itérations par fixture\n")
+    print(f"{'fixture':<32}{'taille':>9}{'legacy ms':>12}{'new ms':>10}{'speedup':>9}{'md legacy':>11}{'md new':>9}")
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        legacy = statistics.median(timeit(legacy_extract, html))
+        new = statistics.median(timeit(extract_markdown, html))
+        print(
+            f"{os.path.basename(path):<32}{len(html):>9}{legacy:>12.2f}{new:>10.2f}{legacy / new:>8.1f}x"
+            f"{len(legacy_extract(html)):>11}{len(extract_markdown(html)):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# 📏 bench_faiss.py — rappel@k et latence p95 des modes d'index FAISS
+# Usage : python scripts/bench_faiss.py [--sizes 100000,1000000] [--dim 384] [--k 10] [--queries 500]
+import argparse, os, sys, time
+import numpy as np
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.faiss_index import build_faiss_index, FAISS_INDEX_MODES
+
+
+def synthetic_corpus(n: int, dim: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Vecteurs normalisés en mélange de gaussiennes (proche d'embeddings de phrases)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype("float32")
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centers[labels] + rng.normal(scale=0.6, size=(n, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def bench_mode(mode: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    start = time.perf_counter()
+    index = build_faiss_index(mode, corpus.shape[1], corpus)
+    index.add(corpus)
+    build_s = time.perf_counter() - start
+
+    latencies = []
+    found = []
+    for q in queries:
+        t = time.perf_counter()
+        _, I = index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - t) * 1000)
+        found.append(I[0])
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return {
+        "mode": mode,
+        "build_s": build_s,
+        "recall": recall,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    faiss.omp_set_num_threads(1)  # latence mono-requête comparable entre modes
+
+    for n in [int(x) for x in args.sizes.split(",")]:
+        data = synthetic_corpus(n + args.queries, args.dim)
+        corpus, queries = data[:n], data[n:]
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(corpus)
+        _, truth = exact.search(queries, args.k)
+
+        print(f"\n=== {n:,} vecteurs, dim {args.dim}, {args.queries} requêtes, k={args.k} ===")
+        print(f"{'mode':<8}{'build s':>10}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for mode in FAISS_INDEX_MODES:
+            r = bench_mode(mode, corpus, queries, truth, args.k)
+            print(f"{r['mode']:<8}{r['build_s']:>10.1f}{r['recall']:>10.3f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
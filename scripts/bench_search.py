@@ -0,0 +1,126 @@
+# 🔎 bench_search.py — recherche BM25 (index inversé) contre l'ancien chemin regex non ancré de /collections/search
+# Usage : python scripts/bench_search.py [--sizes 10000,50000] [--queries 200] [--limit 20]
+#         python scripts/bench_search.py --mongo   (collection Articles réelle : $regex Mongo contre index + hydratation $in)
+import argparse, asyncio, os, re, sys, time
+import numpy as np
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.search import InvertedIndex, SearchIndex, parse_keywords
+
+
+def synthetic_corpus(n: int, vocab_size: int = 30_000, seed: int = 0) -> Tuple[List[dict], np.ndarray]:
+    """Articles synthétiques : vocabulaire zipfien, titre court, description, texte et traduction longs."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}x" for i in range(vocab_size)])
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    sizes = {"name": 8, "description": 40, "cleaned_text": 600, "translation": 600}
+    words = vocab[rng.choice(vocab_size, size=(n, sum(sizes.values())), p=weights)]
+
+    docs = []
+    for i, row in enumerate(words):
+        doc, start = {"id": f"{i:024x}"}, 0
+        for field, size in sizes.items():
+            doc[field] = " ".join(row[start:start + size])
+            start += size
+        docs.append(doc)
+    return docs, vocab
+
+
+def percentiles(latencies: list) -> str:
+    return f"{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}"
+
+
+def bench_synthetic(n: int, n_queries: int, limit: int):
+    docs, vocab = synthetic_corpus(n)
+    rng = np.random.default_rng(1)
+    # Mots de fréquence moyenne (ni mots vides, ni hapax), 1 à 3 mots-clés par requête
+    pool = vocab[50:5000]
+    queries = [",".join(rng.choice(pool, size=rng.integers(1, 4), replace=False)) for _ in range(n_queries)]
+
+    start = time.perf_counter()
+    index = InvertedIndex()
+    for doc in docs:
+        index.add(doc["id"], index.term_frequencies(doc))
+    build_s = time.perf_counter() - start
+    postings = sum(len(d) for d, _ in index.postings.values())
+    postings_mb = postings * 8 / 1e6
+
+    search_index = SearchIndex()
+    search_index.core = index
+    bm25 = []
+    for q in queries:
+        t = time.perf_counter()
+        search_index.search(parse_keywords(q), limit=limit)
+        bm25.append((time.perf_counter() - t) * 1000)
+
+    def regex_scan(fields, stop_at_limit: bool) -> list:
+        latencies = []
+        for q in queries:
+            # Ancien chemin : un seul motif non ancré, scan de chaque document
+            pattern = re.compile("|".join(re.escape(k) for k in q.split(",")), re.IGNORECASE)
+            t = time.perf_counter()
+            found = 0
+            for doc in docs:
+                if any(pattern.search(doc[f]) for f in fields):
+                    found += 1
+                    if stop_at_limit and found >= limit:
+                        break
+            latencies.append((time.perf_counter() - t) * 1000)
+        return latencies
+
+    regex_short = regex_scan(("name", "description"), stop_at_limit=True)
+    regex_full = regex_scan(("name", "description", "cleaned_text", "translation"), stop_at_limit=False)
+
+    print(f"\n=== {n:,} articles, {n_queries} requêtes, limit={limit} ===")
+    print(f"index : construit en {build_s:.1f}s, {len(index.postings):,} termes, {postings:,} postings (~{postings_mb:.0f} Mo)")
+    print(f"{'chemin':<42}{'p50 ms':>9}{'p95 ms':>9}")
+    print(f"{'regex name/description (arrêt à limit)':<42}{percentiles(regex_short)}")
+    print(f"{'regex 4 champs (total exact, sans classement)':<42}{percentiles(regex_full)}")
+    print(f"{'BM25 4 champs (total + classement)':<42}{percentiles(bm25)}")
+
+
+async def bench_mongo(terms: list, limit: int):
+    from beanie import init_beanie
+    from app.database import init_db
+    from app.models import Article, Job
+    from app.utils.search import hydrate_hits
+
+    db = await init_db()
+    await init_beanie(database=db, document_models=[Article, Job])
+    index = SearchIndex()
+    await index.rebuild()
+    print(f"\n=== Collection Articles : {len(index)} articles indexés en {index.build_seconds}s ===")
+    print(f"{'requête':<24}{'regex ms':>10}{'trouvés':>9}{'bm25 ms':>10}{'total':>8}")
+    for term in terms:
+        regex = re.compile(term, re.IGNORECASE)
+        t = time.perf_counter()
+        found = await Article.find({"$or": [{"name": regex}, {"description": regex}]}).limit(limit).to_list()
+        regex_ms = (time.perf_counter() - t) * 1000
+        t = time.perf_counter()
+        groups = parse_keywords(term)
+        total, hits = index.search(groups, limit=limit)
+        await hydrate_hits(hits, groups)
+        bm25_ms = (time.perf_counter() - t) * 1000
+        print(f"{term:<24}{regex_ms:>10.1f}{len(found):>9}{bm25_ms:>10.1f}{total:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--mongo", action="store_true", help="Comparer sur la collection Mongo réelle")
+    parser.add_argument("--terms", default="esmeralda,oro,diamond,precio,mining")
+    args = parser.parse_args()
+
+    if args.mongo:
+        asyncio.run(bench_mongo(args.terms.split(","), args.limit))
+        return
+    for n in [int(x) for x in args.sizes.split(",")]:
+        bench_synthetic(n, args.queries, args.limit)
+
+
+if __name__ == "__main__":
+    main()
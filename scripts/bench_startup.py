@@ -0,0 +1,74 @@
+# ⏱️ bench_startup.py — temps d'import de l'app, délai avant la première réponse HTTP et préchauffage complet
+# Usage : python scripts/bench_startup.py [--port 8765] [--runs 3] [--timeout 300]
+import argparse, json, os, subprocess, sys, time
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_seconds() -> float:
+    """Import de app.main dans un interpréteur neuf (aucun module en cache)."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def serve_once(port: int, timeout: float) -> dict:
+    """
+    Lance uvicorn et mesure :
+    - first_response_s : première réponse de /stats/ready (le serveur accepte les requêtes)
+    - ready_s          : /stats/ready renvoie 200 (modèle, FAISS et Google Sheets chargés)
+    """
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT
+    )
+    url = f"http://127.0.0.1:{port}/stats/ready"
+    result = {"first_response_s": None, "ready_s": None, "components": None}
+    try:
+        with httpx.Client(timeout=2) as client:
+            while time.perf_counter() - start < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn s'est arrêté (code {server.returncode})")
+                try:
+                    r = client.get(url)
+                except httpx.TransportError:
+                    time.sleep(0.05)
+                    continue
+                elapsed = time.perf_counter() - start
+                if result["first_response_s"] is None:
+                    result["first_response_s"] = elapsed
+                body = r.json()
+                result["components"] = body.get("components")
+                if r.status_code == 200 or not body.get("warming_up", True):
+                    result["ready_s"] = elapsed
+                    result["server"] = body
+                    break
+                time.sleep(0.1)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f"{'run':<5}{'import s':>10}{'1st resp s':>12}{'ready s':>10}")
+    for run in range(1, args.runs + 1):
+        imp = import_seconds()
+        r = serve_once(args.port, args.timeout)
+        first = f"{r['first_response_s']:.2f}" if r["first_response_s"] is not None else "-"
+        ready = f"{r['ready_s']:.2f}" if r["ready_s"] is not None else "timeout"
+        print(f"{run:<5}{imp:>10.2f}{first:>12}{ready:>10}")
+    print("\nDernier état /stats/ready :")
+    print(json.dumps(r.get("server", {"components": r["components"]}), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
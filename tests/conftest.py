@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.fixture
+def mongo():
+    """
+    Initialise Beanie sur une base Mongo en mémoire (mongomock_motor), vide à chaque appel.
+    À attendre en tête du scénario asynchrone du test.
+    """
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from beanie import init_beanie
+    from app.models import Article, Job, JobItem
+
+    async def init():
+        client = mongomock_motor.AsyncMongoMockClient()
+        await init_beanie(database=client["tests"], document_models=[Article, Job, JobItem], skip_indexes=True)
+
+    return init
@@ -0,0 +1,68 @@
+from app.utils.chunking import chunk_markdown, estimate_tokens, split_markdown_blocks
+
+ARTICLE = """# Título principal
+
+Primer párrafo con varias frases. Habla del mercado. Y termina aquí.
+
+## Sección uno
+
+- elemento uno
+- elemento dos
+
+```python
+def f():
+
+    return 1
+```
+
+## Sección dos
+
+Segundo párrafo bastante más largo que el primero, con algo de contenido extra.
+"""
+
+
+def test_split_keeps_structure():
+    blocks = split_markdown_blocks(ARTICLE)
+    assert blocks[0] == "# Título principal"
+    assert "- elemento uno" in blocks and "- elemento dos" in blocks
+    # Un bloc de code reste entier, lignes vides comprises
+    code = [b for b in blocks if b.startswith("```")]
+    assert code == ["```python\ndef f():\n\n    return 1\n```"]
+
+
+def test_chunks_respect_budget_and_keep_all_text():
+    text = "\n\n".join(f"Párrafo {i}." + " palabra" * 10 for i in range(30))
+    chunks = chunk_markdown(text, max_tokens=120)
+    assert 1 < len(chunks) < 30
+    assert all(estimate_tokens(c) <= 120 for c in chunks)
+    # Aucun paragraphe coupé ni perdu
+    assert "\n\n".join(chunks) == text
+
+
+def test_heading_is_never_left_alone_at_chunk_end():
+    text = "\n\n".join(
+        ["# Intro", "a " * 150, "## Sección", "b " * 150, "## Otra", "c " * 150]
+    )
+    for chunk in chunk_markdown(text, max_tokens=100):
+        assert not chunk.rstrip().splitlines()[-1].startswith("#")
+
+
+def test_oversized_block_is_split_on_sentences():
+    sentence = "Esta es una frase de prueba bastante larga. "
+    chunks = chunk_markdown(sentence * 100, max_tokens=50)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 50 for c in chunks)
+    assert all(c.rstrip().endswith(".") for c in chunks)
+
+
+def test_overlap_repeats_previous_block():
+    paragraphs = [f"Párrafo {i} " + "x" * 150 for i in range(6)]
+    chunks = chunk_markdown("\n\n".join(paragraphs), max_tokens=100, overlap_tokens=60)
+    assert len(chunks) > 1
+    for previous, following in zip(chunks, chunks[1:]):
+        assert following.split("\n\n")[0] == previous.split("\n\n")[-1]
+
+
+def test_empty_text():
+    assert chunk_markdown("") == []
+    assert estimate_tokens("") == 0
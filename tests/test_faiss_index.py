@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from app.utils import faiss_index
+from app.utils.faiss_index import FaissStore, build_faiss_index, choose_index_mode
+
+DIM = 32
+
+
+def make_store(tmp_path, n, mode, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM)).astype("float32")
+    ids = [f"article-{i}" for i in range(n)]
+    store = FaissStore(DIM, path=str(tmp_path / "faiss.index"), mode=mode)
+    store.add(ids, vectors)
+    if mode != "flat":
+        store.rebuild(mode)
+        assert store.active_mode == mode
+    return store, ids, vectors
+
+
+def top1(store, vectors):
+    return [hits[0][0] if hits else None for hits in store.search(vectors, 1)]
+
+
+@pytest.mark.parametrize("mode, n", [("flat", 500), ("hnsw", 2_000), ("ivfpq", 12_000)])
+def test_remove_then_search(tmp_path, mode, n):
+    store, ids, vectors = make_store(tmp_path, n, mode)
+    assert store.remove(ids[:100]) == 100
+    assert len(store) == n - 100
+
+    kept = list(range(200, 260))
+    assert top1(store, vectors[kept]) == [ids[i] for i in kept]
+    removed = set(ids[:100])
+    assert not any(a in removed for hits in store.search(vectors[:20], 5) for a, _ in hits)
+
+
+@pytest.mark.parametrize("mode, n", [("flat", 500), ("hnsw", 2_000), ("ivfpq", 12_000)])
+def test_replace_then_search(tmp_path, mode, n):
+    store, ids, vectors = make_store(tmp_path, n, mode)
+    moved = np.random.default_rng(1).normal(size=(10, DIM)).astype("float32")
+    store.add(ids[100:110], moved)
+    assert len(store) == n
+
+    # Le vecteur remplacé est retrouvé à sa nouvelle position, pas à l'ancienne
+    assert top1(store, moved) == ids[100:110]
+    for hits in store.search(vectors[100:110], 1):
+        assert hits[0][1] > 1e-3
+    kept = list(range(200, 260))
+    assert top1(store, vectors[kept]) == [ids[i] for i in kept]
+
+
+def test_readd_after_remove_on_hnsw(tmp_path):
+    store, ids, vectors = make_store(tmp_path, 2_000, "hnsw")
+    store.remove(ids[:5])
+    assert store.tombstones
+    store.add(ids[:5], vectors[:5] + 5)
+    assert not store.tombstones
+    assert top1(store, vectors[:5] + 5) == ids[:5]
+
+
+def test_mutations_during_rebuild_are_replayed(tmp_path, monkeypatch):
+    store, ids, vectors = make_store(tmp_path, 12_000, "flat")
+    moved = np.random.default_rng(1).normal(size=(10, DIM)).astype("float32")
+
+    def build_then_mutate(mode, dim, train_vectors=None):
+        # Mutations arrivées pendant la construction (hors verrou) : journalisées puis rejouées
+        store.remove(ids[:50])
+        store.add(ids[50:60], moved)
+        return build_faiss_index(mode, dim, train_vectors)
+
+    monkeypatch.setattr(faiss_index, "build_faiss_index", build_then_mutate)
+    store.rebuild("ivfpq")
+    assert store.active_mode == "ivfpq"
+    assert top1(store, moved) == ids[50:60]
+    removed = set(ids[:50])
+    assert not any(a in removed for hits in store.search(vectors[:50], 3) for a, _ in hits)
+
+
+def test_version_bumps_on_mutation(tmp_path):
+    store, ids, vectors = make_store(tmp_path, 100, "flat")
+    version = store.version
+    store.add(ids[:1], vectors[:1])
+    store.remove(ids[1:2])
+    assert store.version == version + 2
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store, ids, vectors = make_store(tmp_path, 200, "flat")
+    store.remove(ids[:10])
+    store.save()
+    loaded = FaissStore(DIM, path=store.path, mode="flat")
+    assert loaded.load()
+    assert len(loaded) == 190
+    assert top1(loaded, vectors[10:20]) == ids[10:20]
+
+
+def test_choose_index_mode():
+    assert choose_index_mode(100, "auto") == "flat"
+    assert choose_index_mode(100, "ivfpq") == "flat"
+    assert choose_index_mode(100, "hnsw") == "hnsw"
+    with pytest.raises(ValueError):
+        choose_index_mode(100, "annoy")
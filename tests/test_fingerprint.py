@@ -0,0 +1,75 @@
+import asyncio
+
+from app.models import Article
+from app.utils.fingerprint import (
+    content_hash, find_duplicate, fingerprint_content, similarity
+)
+
+ARTICLE = (
+    "Las esmeraldas colombianas son famosas en todo el mundo por su color verde intenso. "
+    "La mayoría proviene de las minas de Muzo, Chivor y Coscuez, en la cordillera oriental. "
+    "Su valor depende del color, la claridad, el corte y el peso en quilates. "
+    "Las inclusiones, llamadas jardín, son habituales y ayudan a distinguir una piedra natural. "
+    "El tratamiento con aceites es una práctica común para mejorar la apariencia de la gema. "
+    "Los compradores deben pedir un certificado de un laboratorio gemológico reconocido."
+)
+# Même article republié : une phrase modifiée, retours à la ligne différents
+NEAR_COPY = ARTICLE.replace("en la cordillera oriental", "en la cordillera oriental de Boyacá").replace(". ", ".\n")
+UNRELATED = (
+    "El precio del oro alcanzó un nuevo máximo histórico esta semana impulsado por la demanda de los bancos centrales. "
+    "Los analistas esperan que la volatilidad continúe mientras persista la incertidumbre sobre las tasas de interés."
+)
+
+
+def test_content_hash_ignores_whitespace_only():
+    assert content_hash("a  b\n c") == content_hash("a b c")
+    assert content_hash("a b c") != content_hash("a b d")
+
+
+def test_minhash_similarity_separates_near_copies_from_unrelated_text():
+    original, near, unrelated = (fingerprint_content(t) for t in (ARTICLE, NEAR_COPY, UNRELATED))
+    assert original.source_hash != near.source_hash
+    assert similarity(original.minhash, near.minhash) >= 0.8
+    assert similarity(original.minhash, unrelated.minhash) < 0.1
+    # Une bande LSH commune suffit à retrouver le candidat
+    assert set(original.lsh_buckets) & set(near.lsh_buckets)
+    assert not set(original.lsh_buckets) & set(unrelated.lsh_buckets)
+
+
+def test_signature_is_stable():
+    assert fingerprint_content(ARTICLE).minhash == fingerprint_content(ARTICLE).minhash
+    assert fingerprint_content("").minhash == []
+
+
+async def insert_article(link: str, text: str) -> Article:
+    article = Article(link=link, cleaned_text=text, **fingerprint_content(text).model_dump())
+    await article.insert()
+    return article
+
+
+def test_find_duplicate_exact_near_and_none(mongo):
+    async def scenario():
+        await mongo()
+        original = await insert_article("https://e.com/original", ARTICLE)
+        await insert_article("https://e.com/oro", UNRELATED)
+        return (
+            original,
+            await find_duplicate(fingerprint_content(ARTICLE)),
+            await find_duplicate(fingerprint_content(NEAR_COPY)),
+            await find_duplicate(fingerprint_content("Un texto sin relación con nada de lo anterior, sobre fútbol."))
+        )
+
+    original, exact, near, none = asyncio.run(scenario())
+    assert exact == {"article_id": str(original.id), "link": original.link, "kind": "exact", "similarity": 1.0}
+    assert near["article_id"] == str(original.id)
+    assert near["kind"] == "near" and near["similarity"] >= 0.8
+    assert none is None
+
+
+def test_find_duplicate_excludes_the_refreshed_article(mongo):
+    async def scenario():
+        await mongo()
+        original = await insert_article("https://e.com/original", ARTICLE)
+        return await find_duplicate(fingerprint_content(NEAR_COPY), exclude_id=original.id)
+
+    assert asyncio.run(scenario()) is None
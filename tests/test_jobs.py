@@ -0,0 +1,132 @@
+import asyncio
+
+from app.models import Job, JobItem
+from app.utils.jobs import JOB_FINAL_STATUSES, JobManager
+
+KEYS = ["a", "b", "c", "d"]
+
+
+def make_manager(processed, workers=1):
+    async def handler(ctx):
+        await ctx.set_total(len(ctx.params["keys"]))
+        for key in ctx.params["keys"]:
+            if key in ctx.done_keys:
+                continue
+            processed.append(key)
+            await ctx.record(key, "success", result={"key": key})
+        return {"processed": len(processed)}
+
+    return JobManager(app=None, handlers={"demo": handler}, workers=workers)
+
+
+async def wait_final(job_id, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await Job.get(job_id)
+        if job.status in JOB_FINAL_STATUSES:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job bloqué en {job.status}"
+        await asyncio.sleep(0.01)
+
+
+def test_submit_runs_job_and_records_items(mongo):
+    async def scenario():
+        await mongo()
+        processed = []
+        manager = make_manager(processed)
+        await manager.start()
+        job = await manager.submit("demo", {"keys": KEYS})
+        job = await wait_final(job.id)
+        await manager.close()
+        return processed, job, await JobItem.find(JobItem.job_id == job.id).count()
+
+    processed, job, items = asyncio.run(scenario())
+    assert processed == KEYS
+    assert job.status == "completed"
+    assert (job.total, job.succeeded, job.summary) == (4, 4, {"processed": 4})
+    assert items == 4
+
+
+def test_restart_resumes_unfinished_job_without_redoing_items(mongo):
+    async def scenario():
+        await mongo()
+        # Exécution interrompue par un arrêt du serveur : job "running", deux éléments enregistrés
+        job = Job(kind="demo", params={"keys": KEYS}, status="running", succeeded=2)
+        await job.insert()
+        for key in KEYS[:2]:
+            await JobItem(job_id=job.id, key=key, status="success").insert()
+
+        processed = []
+        manager = make_manager(processed)
+        await manager.start()
+        job = await wait_final(job.id)
+        await manager.close()
+        return processed, job
+
+    processed, job = asyncio.run(scenario())
+    assert processed == ["c", "d"]
+    assert job.status == "completed"
+    assert job.succeeded == 4
+
+
+def test_resume_reads_legacy_items_stored_on_the_job(mongo):
+    async def scenario():
+        await mongo()
+        job = Job(kind="demo", params={"keys": KEYS}, status="queued")
+        await job.insert()
+        await Job.get_pymongo_collection().update_one(
+            {"_id": job.id}, {"$set": {"items": [{"key": "a", "status": "success"}]}}
+        )
+        processed = []
+        manager = make_manager(processed)
+        await manager.start()
+        await wait_final(job.id)
+        await manager.close()
+        return processed
+
+    assert asyncio.run(scenario()) == ["b", "c", "d"]
+
+
+def test_cancel_queued_job(mongo):
+    async def scenario():
+        await mongo()
+        processed = []
+        manager = make_manager(processed)
+        # Pas de worker démarré : le job reste en file
+        job = await manager.submit("demo", {"keys": KEYS})
+        await manager.cancel(job.id)
+        return processed, await Job.get(job.id)
+
+    processed, job = asyncio.run(scenario())
+    assert processed == []
+    assert job.status == "cancelled"
+
+
+def test_worker_survives_mongo_error(mongo, monkeypatch):
+    async def scenario():
+        await mongo()
+        first = Job(kind="demo", params={"keys": ["x"]})
+        second = Job(kind="demo", params={"keys": ["y"]})
+        await first.insert()
+        await second.insert()
+        original_get = Job.get.__func__
+
+        async def flaky_get(cls, job_id, *args, **kwargs):
+            if job_id == first.id:
+                raise RuntimeError("Mongo indisponible")
+            return await original_get(cls, job_id, *args, **kwargs)
+
+        monkeypatch.setattr(Job, "get", classmethod(flaky_get))
+        processed = []
+        manager = make_manager(processed)
+        await manager.start()
+        job = await wait_final(second.id)
+        worker_alive = not manager._tasks[0].done()
+        await manager.close()
+        return processed, job, worker_alive
+
+    processed, job, worker_alive = asyncio.run(scenario())
+    # Lecture du premier job en erreur : le worker continue avec le suivant
+    assert processed == ["y"]
+    assert job.status == "completed"
+    assert worker_alive
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app.utils.json_repair import loads_tolerant, parse_stats, repair_json
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Voici le JSON : {"a": 1} Bonne journée !', {"a": 1}),
+    ("{'name': 'Titre', 'tags': ['x', 'y']}", {"name": "Titre", "tags": ["x", "y"]}),
+    ('{name: "Titre", text_clean: "ok"}', {"name": "Titre", "text_clean": "ok"}),
+    ('{"a": True, "b": False, "c": None}', {"a": True, "b": False, "c": None}),
+    ('{"tags": ["x", "y",], "n": 2,}', {"tags": ["x", "y"], "n": 2}),
+    ('{"text": "ligne 1\nligne 2\tfin"}', {"text": "ligne 1\nligne 2\tfin"}),
+    ("{'text': 'l\\'article dit \"oui\"'}", {"text": "l'article dit \"oui\""}),
+    ('[{"a": 1}, {"b": 2}]', [{"a": 1}, {"b": 2}]),
+])
+def test_repair_common_llm_defects(raw, expected):
+    assert json.loads(repair_json(raw)) == expected
+
+
+def test_repair_closes_truncated_output():
+    assert json.loads(repair_json('{"name": "Titre", "tags": ["a", "b')) == {"name": "Titre", "tags": ["a", "b"]}
+    assert json.loads(repair_json('{"name": "Titre", "description":')) == {"name": "Titre", "description": None}
+
+
+def test_repair_keeps_words_inside_strings():
+    # True / None / clés sans quotes ne sont réécrits qu'en dehors des chaînes
+    value = json.loads(repair_json('{"text": "True or None: key: value"}'))
+    assert value == {"text": "True or None: key: value"}
+
+
+def test_repair_without_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("Je ne peux pas répondre.")
+
+
+def test_loads_tolerant_counts_outcomes():
+    source = "test_loads_tolerant"
+    assert loads_tolerant('{"a": 1}', source=source) == {"a": 1}
+    assert loads_tolerant("{'a': 1,}", source=source) == {"a": 1}
+    with pytest.raises(ValueError):
+        loads_tolerant("pas de JSON", source=source)
+    stats = parse_stats()[source]
+    assert (stats["strict"], stats["repaired"], stats["failed"], stats["total"]) == (1, 1, 1, 3)
+
+
+def test_loads_tolerant_drops_incomplete_last_item():
+    # Refermer ne suffit pas (littéral ou nombre coupé) : le dernier élément est retiré
+    assert loads_tolerant('{"a": 1, "b": tru', source="test_truncated") == {"a": 1}
+    assert loads_tolerant('[{"a": 1}, {"b": 12.', source="test_truncated") == [{"a": 1}]
+    # Refermer suffit : rien n'est perdu
+    raw = '[{"text": "complet"}, {"text": "coupé", "tags": [1, 2'
+    assert loads_tolerant(raw, source="test_truncated") == [{"text": "complet"}, {"text": "coupé", "tags": [1, 2]}]
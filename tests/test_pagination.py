@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models import Article
+from app.utils.pagination import encode_cursor, keyset_filter, parse_fields, sort_spec
+
+
+def test_cursor_round_trip_by_id():
+    last_id = ObjectId()
+    cursor = encode_cursor({"_id": last_id, "name": "x"}, "_id")
+    assert "=" not in cursor
+    assert keyset_filter(cursor, "_id") == {"_id": {"$gt": last_id}}
+
+
+def test_cursor_round_trip_by_date():
+    last_id, date = ObjectId(), datetime(2025, 3, 1, 12, 30, 15, 123000)
+    cursor = encode_cursor({"_id": last_id, "date_added": date}, "-date_added")
+    assert keyset_filter(cursor, "-date_added") == {"$or": [
+        {"date_added": {"$lt": date}},
+        {"date_added": date, "_id": {"$lt": last_id}}
+    ]}
+
+
+@pytest.mark.parametrize("cursor", ["pas-un-curseur", "e30", encode_cursor({"_id": "abc"}, "_id")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        keyset_filter(cursor, "_id")
+
+
+def test_no_cursor_is_first_page():
+    assert keyset_filter(None, "-date_added") == {}
+
+
+def test_parse_fields():
+    assert parse_fields(None) == {"minhash": 0, "lsh_buckets": 0}
+    assert parse_fields("name, link") == {"name": 1, "link": 1}
+    with pytest.raises(ValueError):
+        parse_fields("name,password")
+
+
+@pytest.mark.parametrize("sort", ["_id", "-date_added"])
+def test_keyset_pages_cover_collection_once(mongo, sort):
+    async def scenario():
+        await mongo()
+        collection = Article.get_pymongo_collection()
+        base = datetime(2025, 1, 1)
+        # Dates en double : le départage par _id doit éviter trous et doublons entre pages
+        await collection.insert_many([
+            {"name": f"a{i}", "link": f"https://e.com/{i}", "date_added": base + timedelta(days=i // 3)}
+            for i in range(20)
+        ])
+        expected = [doc["_id"] async for doc in collection.find({}, {"_id": 1}).sort(sort_spec(sort))]
+
+        seen, cursor = [], None
+        while True:
+            docs = await collection.find(keyset_filter(cursor, sort), {"_id": 1, "date_added": 1}).sort(
+                sort_spec(sort)
+            ).limit(6).to_list(length=6)
+            seen.extend(doc["_id"] for doc in docs)
+            if len(docs) < 6:
+                break
+            cursor = encode_cursor(docs[-1], sort)
+        return expected, seen
+
+    expected, seen = asyncio.run(scenario())
+    assert len(expected) == 20
+    assert seen == expected
@@ -0,0 +1,146 @@
+import asyncio
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.models import Article
+from app.utils.search import SearchIndex, highlight_pattern, mark, parse_keywords, reciprocal_rank_fusion, tokenize
+
+
+def make_doc(**fields):
+    """Document indexable hors Mongo (mêmes attributs qu'une projection ArticleSearchView)."""
+    return SimpleNamespace(id=ObjectId(), **{"name": "", "description": "", "cleaned_text": "", "translation": None, **fields})
+
+def make_article(**fields):
+    fields.setdefault("link", f"https://e.com/{ObjectId()}")
+    return Article(**fields)
+
+
+def ids(page):
+    return [article_id for article_id, _ in page]
+
+
+def test_tokenize_folds_accents_plurals_and_stopwords():
+    assert tokenize("Las Esmeraldas de Colombia") == ["esmeralda", "colombia"]
+    assert tokenize("Piedras PRECIOSAS, émeraudes") == ["piedra", "preciosa", "emeraude"]
+    assert tokenize("glass") == ["glass"]
+    assert parse_keywords("piedras preciosas, oro", "Colombia oro") == [["piedra", "preciosa"], ["oro"], ["colombia"]]
+
+
+def test_upsert_and_search_ranks_by_field_weight():
+    index = SearchIndex()
+    in_name = make_doc(name="Esmeraldas de Colombia", cleaned_text="Un texto sobre minería.")
+    in_text = make_doc(name="Minería", cleaned_text="Se habla de esmeraldas una vez en este texto largo.")
+    other = make_doc(name="Oro", cleaned_text="Nada que ver.")
+    for article in (in_name, in_text, other):
+        index.upsert(article)
+
+    total, page = index.search(parse_keywords(query="esmeralda"))
+    assert total == 2
+    assert ids(page) == [str(in_name.id), str(in_text.id)]
+
+
+def test_match_all_requires_every_group():
+    index = SearchIndex()
+    both = make_doc(name="Esmeraldas y oro")
+    one = make_doc(name="Solo esmeraldas")
+    index.upsert(both)
+    index.upsert(one)
+    groups = parse_keywords("esmeralda, oro")
+    assert index.search(groups, match="any")[0] == 2
+    assert ids(index.search(groups, match="all")[1]) == [str(both.id)]
+
+
+def test_reupsert_replaces_terms_and_schedules_compaction():
+    index = SearchIndex()
+    scheduled = []
+    index.schedule_rebuild = lambda force=False: scheduled.append(force)
+    article = make_doc(name="Esmeraldas")
+    index.upsert(article)
+    assert scheduled == []
+    article.name = "Zafiros"
+    index.upsert(article)
+
+    assert len(index) == 1
+    assert index.core.dead == 1
+    assert scheduled == [False]
+    assert index.search(parse_keywords(query="esmeralda"))[0] == 0
+    assert ids(index.search(parse_keywords(query="zafiro"))[1]) == [str(article.id)]
+
+
+def test_remove_hides_document():
+    index = SearchIndex()
+    article = make_doc(name="Esmeraldas")
+    index.upsert(article)
+    version = index.version
+    assert index.remove([article.id]) == 1
+    assert index.search(parse_keywords(query="esmeralda"))[0] == 0
+    assert index.version > version
+
+
+def test_pagination_is_stable():
+    index = SearchIndex()
+    articles = [make_doc(name=f"Esmeralda {i}") for i in range(7)]
+    for article in articles:
+        index.upsert(article)
+    groups = parse_keywords(query="esmeralda")
+    pages = [ids(index.search(groups, limit=3, offset=offset)[1]) for offset in (0, 3, 6)]
+    assert sum(pages, []) == [str(a.id) for a in articles]
+
+
+def test_replacements_trigger_compaction_from_mongo(mongo):
+    async def scenario():
+        await mongo()
+        index = SearchIndex()
+        articles = [make_article(name=f"Esmeralda {i}", link=f"https://e.com/{i}") for i in range(10)]
+        for article in articles:
+            await article.insert()
+            index.upsert(article)
+        # Mises à jour : au-delà de SEARCH_COMPACT_RATIO de documents morts, compactage en arrière-plan
+        for article in articles[:4]:
+            article.name = f"Rubí {article.link[-1]}"
+            await article.save()
+            index.upsert(article)
+        assert index._rebuild_task is not None
+        await index._rebuild_task
+        return index, articles
+
+    index, articles = asyncio.run(scenario())
+    assert index.core.dead == 0
+    assert len(index.core.doc_ids) == 10
+    assert index.search(parse_keywords(query="esmeralda"))[0] == 6
+    assert sorted(ids(index.search(parse_keywords(query="rubi"))[1])) == sorted(str(a.id) for a in articles[:4])
+
+
+def test_mutations_during_rebuild_are_replayed(mongo):
+    async def scenario():
+        await mongo()
+        index = SearchIndex()
+        kept = make_article(name="Esmeralda", link="https://e.com/kept")
+        removed = make_article(name="Esmeralda", link="https://e.com/removed")
+        for article in (kept, removed):
+            await article.insert()
+            index.upsert(article)
+        rebuild = asyncio.create_task(index.rebuild())
+        await asyncio.sleep(0)
+        assert index.rebuilding
+        # Arrivées pendant la reconstruction, après la lecture Mongo
+        added = make_article(name="Esmeralda nueva", link="https://e.com/added")
+        index.upsert(added)
+        index.remove([removed.id])
+        await rebuild
+        return index, kept, added
+
+    index, kept, added = asyncio.run(scenario())
+    assert sorted(ids(index.search(parse_keywords(query="esmeralda"))[1])) == sorted([str(kept.id), str(added.id)])
+
+
+def test_highlight_matches_accents_and_plurals():
+    pattern = highlight_pattern(["esmeralda"])
+    assert mark("Las Esmeraldas y la ésmeralda", pattern) == "Las **Esmeraldas** y la **ésmeralda**"
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion({"bm25": ["a", "b"], "vector": ["b", "c"]}, k=60)
+    assert [doc["id"] for doc in fused] == ["b", "a", "c"]
+    assert (fused[0]["bm25_rank"], fused[0]["vector_rank"]) == (2, 1)